@@ -1,53 +1,135 @@
-from flask import Flask, request, jsonify
+from flask import Blueprint, Flask, Response, current_app, request, jsonify, stream_with_context
 from flask_cors import CORS
 import os
 import json
-from openai import OpenAI
-import time
+import threading
 from dotenv import load_dotenv
+from werkzeug.local import LocalProxy
 from models import SummaryResponse
+from assistant import AssistantTimeout, create_assistant
+from data_cache import DatasetCache
+from formats import arrow_response, columnar, compress, requested_format, requested_metrics
+from render_cache import RenderCache, figure_png, subplots
+from metrics import Metrics, SlowRequestProfiler
 import logging
-import pandas as pd
-# Set the Matplotlib backend to a non-interactive, thread-safe option
-import matplotlib
-matplotlib.use('Agg')  # Use the Agg backend which doesn't require a GUI
-import matplotlib.pyplot as plt
-import io
 import base64
 from typing import Optional
 from werkzeug.datastructures import MultiDict
 
 logger = logging.getLogger(__name__)
-load_dotenv()
-app = Flask(__name__)
-CORS(app)
-DATA_DIR = "data"
+DATA_DIR = os.environ.get("DATA_DIR", "data")
+bp = Blueprint('api', __name__)
 
-# Initialize the OpenAI client
-client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
-# Replace with your assistant ID
-ASSISTANT_ID = os.environ.get("OPENAI_ASSISTANT_ID")
 
-@app.route('/api/health', methods=['GET'])
+def _once(factory):
+    """Property built by the first access; request threads may race for it, so under a lock."""
+    name = factory.__name__
+
+    def get(self):
+        with self._lock:
+            if name not in self._built:
+                self._built[name] = factory(self)
+            return self._built[name]
+
+    return property(get, doc=factory.__doc__)
+
+
+class Services:
+    """
+    Caches and clients of one app.
+
+    Only the cheap ones are created with the app. The block query layer
+    (pyarrow.dataset), the optimization pool (numpy, the engine) and the chat
+    backend are built by the first request that needs them, so a worker that
+    only answers /api/health or JSON endpoints starts fast and stays small.
+    """
+
+    def __init__(self, data_dir):
+        self.data_dir = data_dir
+        self._built = {}
+        self._lock = threading.Lock()
+        # Per-endpoint and per-phase latency, request counts and cache hit ratios at /api/metrics,
+        # summed over the workers sharing METRICS_DIR; PROFILE_SLOW_MS enables sampling profiles of slow requests
+        self.metrics = Metrics(profiler=SlowRequestProfiler.from_env(), shared_dir=os.environ.get("METRICS_DIR"))
+        # Tables and JSON files in data_dir are loaded once and reloaded when they change on disk;
+        # prediction tables are memory-mapped Arrow files shared by all worker processes
+        self.cache = DatasetCache(data_dir, max_bytes=int(os.environ.get("DATA_CACHE_MB", 512)) * 2**20)
+        # Rendered chart PNGs keyed on endpoint, query parameters and data file versions
+        self.render_cache = RenderCache(max_bytes=int(os.environ.get("RENDER_CACHE_MB", 64)) * 2**20)
+        self.metrics.register_cache("data", self.cache)
+        self.metrics.register_cache("render", self.render_cache)
+
+    @_once
+    def block_queries(self):
+        """Block table queries with filter pushdown and a per-(date, category) rollup."""
+        from queries import BlockQueries
+        return BlockQueries(self.data_dir)
+
+    @_once
+    def jobs(self):
+        """Optimization runs execute in worker processes and publish into data_dir."""
+        from jobs import JobManager
+        return JobManager(os.path.join(self.data_dir, "jobs"),
+                          os.path.join(self.data_dir, "optimization_results.json"),
+                          workers=int(os.environ.get("OPTIMIZE_WORKERS", 1)),
+                          max_pending=int(os.environ.get("OPTIMIZE_MAX_PENDING", 8)))
+
+    @_once
+    def pricer(self):
+        """What-if repricing of the saved per-strategy aggregates (engine.py --stats)."""
+        from pricing import STATS_FILE, WhatIfPricer
+        return WhatIfPricer(os.environ.get("STRATEGY_STATS", os.path.join(self.data_dir, STATS_FILE)))
+
+    @_once
+    def assistant(self):
+        """Chat backend: "openai" (Assistants API) or "local" (in-process stand-in for load tests)."""
+        return create_assistant(timeout=float(os.environ.get("ASSISTANT_TIMEOUT", 120)))
+
+
+def create_app(data_dir=None):
+    """
+    The API as a Flask app serving `data_dir` (default $DATA_DIR or "data").
+    Call once per worker process, e.g. `gunicorn -c gunicorn.conf.py wsgi:app`.
+    """
+    load_dotenv()
+    app = Flask(__name__)
+    CORS(app)
+    app.extensions['qpu'] = svc = Services(data_dir or DATA_DIR)
+    svc.metrics.init_app(app)
+    app.register_blueprint(bp)
+    return app
+
+
+def services(app=None):
+    """`Services` of `app`, by default of the app handling the current request."""
+    return (app or current_app).extensions['qpu']
+
+
+# Shorthands for the current app's services inside request handlers
+metrics = LocalProxy(lambda: services().metrics)
+cache = LocalProxy(lambda: services().cache)
+render_cache = LocalProxy(lambda: services().render_cache)
+block_queries = LocalProxy(lambda: services().block_queries)
+jobs = LocalProxy(lambda: services().jobs)
+assistant = LocalProxy(lambda: services().assistant)
+pricer = LocalProxy(lambda: services().pricer)
+
+@bp.route('/api/health', methods=['GET'])
 def health_check():
     """Simple health check endpoint"""
     return jsonify({"status": "healthy", "message": "Service is running"})
 
-@app.route('/api/summary', methods=['GET'])
+@bp.route('/api/summary', methods=['GET'])
 def get_summary():
     """Get a summary of the current QPU block allocation and costs."""
     try:
         # Load data
-        daily_stats_path = f"{DATA_DIR}/daily_stats.csv"
-        optimization_path = f"{DATA_DIR}/optimization_summary.json"
-        
-        if not os.path.exists(daily_stats_path) or not os.path.exists(optimization_path):
+        if not cache.exists("daily_stats.csv") or not cache.exists("optimization_summary.json"):
             return jsonify({"error": "Required data files not found"}), 404
         
-        df = pd.read_csv(daily_stats_path)
-        
-        with open(optimization_path, 'r') as f:
-            optimization_data = json.load(f)
+        with metrics.phase("load"):
+            df = cache.table("daily_stats.csv")
+            optimization_data = cache.json("optimization_summary.json")
         
         # Calculate summary metrics
         total_blocks = df['new_blocks_leased'].sum() if 'new_blocks_leased' in df.columns else 0
@@ -76,7 +158,43 @@ def get_summary():
         logger.error(f"Error in summary endpoint: {e}")
         return jsonify({"error": f"Error retrieving summary: {str(e)}"}), 500
 
-@app.route('/api/chart/daily-costs', methods=['GET'])
+class ChartError(ValueError):
+    """Raised by a chart's `render()` for parameters only checkable against the data; answered with 400."""
+
+
+def chart_response(endpoint, data_versions, render):
+    """
+    Serve a chart through the render cache.
+    - The ETag covers the endpoint, query parameters and `data_versions`,
+      so a matching If-None-Match is answered with 304 before any work.
+    - `format=png` (or an Accept header preferring image/png) returns raw PNG
+      bytes; otherwise the JSON base64 data URI of the original API.
+    - A `ChartError` from `render()` becomes a 400 without an ETag.
+    """
+    params = [(k, v) for k, v in request.args.items(multi=True) if k != 'format']
+    key = render_cache.key(endpoint, params, data_versions)
+    as_png = (request.args.get('format') == 'png'
+              or request.accept_mimetypes.best_match(['application/json', 'image/png']) == 'image/png')
+    etag = f"{key}-{'png' if as_png else 'json'}"
+    
+    if etag in request.if_none_match:
+        response = Response(status=304)
+    else:
+        try:
+            png = render_cache.get_or_render(key, render)
+        except ChartError as e:
+            return jsonify({"error": str(e)}), 400
+        if as_png:
+            response = Response(png, mimetype='image/png')
+        else:
+            with metrics.phase("encode"):
+                img_base64 = base64.b64encode(png).decode('utf-8')
+                response = jsonify({"image": f"data:image/png;base64,{img_base64}"})
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@bp.route('/api/chart/daily-costs', methods=['GET'])
 def get_daily_costs_chart():
     """Generate a chart for daily costs."""
     try:
@@ -85,42 +203,38 @@ def get_daily_costs_chart():
         end_date = request.args.get('end_date')
         
         # Load data
-        data_path = f"{DATA_DIR}/daily_stats.csv"
-        
-        if not os.path.exists(data_path):
+        if not cache.exists("daily_stats.csv"):
             return jsonify({"error": "Daily stats data not found"}), 404
         
-        df = pd.read_csv(data_path)
-        
-        # Filter by date if provided
-        if start_date:
-            df = df[df['date'] >= start_date]
-        if end_date:
-            df = df[df['date'] <= end_date]
-        
-        # Create chart using the non-interactive backend
-        fig, ax = plt.subplots(figsize=(10, 6))
-        ax.plot(df['date'], df['total_cost'], marker='o')
-        ax.set_title('Daily Costs')
-        ax.set_xlabel('Date')
-        ax.set_ylabel('Cost ($)')
-        ax.grid(True)
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        
-        # Convert to base64 image
-        buf = io.BytesIO()
-        fig.savefig(buf, format='png')
-        buf.seek(0)
-        img_base64 = base64.b64encode(buf.read()).decode('utf-8')
-        plt.close(fig)  # Make sure to close the figure
-        
-        return jsonify({"image": f"data:image/png;base64,{img_base64}"})
+        def render():
+            with metrics.phase("load"):
+                df = cache.table("daily_stats.csv")
+            
+            # Filter by date if provided
+            with metrics.phase("filter"):
+                if start_date:
+                    df = df[df['date'] >= start_date]
+                if end_date:
+                    df = df[df['date'] <= end_date]
+            
+            # Create chart using the non-interactive backend
+            with metrics.phase("render"):
+                fig, ax = subplots(figsize=(10, 6))
+                ax.plot(df['date'], df['total_cost'], marker='o')
+                ax.set_title('Daily Costs')
+                ax.set_xlabel('Date')
+                ax.set_ylabel('Cost ($)')
+                ax.grid(True)
+                ax.tick_params(axis='x', labelrotation=45)
+                fig.tight_layout()
+                return figure_png(fig)
+        
+        return chart_response('daily-costs', [cache.version("daily_stats.csv")], render)
     except Exception as e:
         logger.error(f"Error generating daily costs chart: {e}")
         return jsonify({"error": f"Error generating chart: {str(e)}"}), 500
 
-@app.route('/api/chart/block-utilization', methods=['GET'])
+@bp.route('/api/chart/block-utilization', methods=['GET'])
 def get_block_utilization_chart():
     """Generate a chart for block utilization."""
     try:
@@ -129,52 +243,36 @@ def get_block_utilization_chart():
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
         
-        # Load data
-        data_path = f"{DATA_DIR}/qpu_blocks.csv"
-        
-        if not os.path.exists(data_path):
+        if block_queries.source() is None:
             return jsonify({"error": "QPU blocks data not found"}), 404
         
-        df = pd.read_csv(data_path)
-        
-        # Filter by date and block type if provided
-        if start_date:
-            df = df[df['lease_date'] >= start_date]
-        if end_date:
-            df = df[df['lease_date'] <= end_date]
-        if block_type and block_type.lower() != "all":
-            df = df[df['category'] == block_type]
-        
-        # Aggregate data
-        agg_df = df.groupby(['lease_date', 'category'])['workloads_executed'].mean().reset_index()
-        
-        # Create chart using the non-interactive backend
-        fig, ax = plt.subplots(figsize=(10, 6))
-        for block_type in agg_df['category'].unique():
-            subset = agg_df[agg_df['category'] == block_type]
-            ax.plot(subset['lease_date'], subset['workloads_executed'], marker='o', label=block_type)
-        
-        ax.set_title('Block Utilization (Average Workloads per Block)')
-        ax.set_xlabel('Date')
-        ax.set_ylabel('Average Workloads')
-        ax.grid(True)
-        ax.legend()
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        
-        # Convert to base64 image
-        buf = io.BytesIO()
-        fig.savefig(buf, format='png')
-        buf.seek(0)
-        img_base64 = base64.b64encode(buf.read()).decode('utf-8')
-        plt.close(fig)  # Make sure to close the figure
-        
-        return jsonify({"image": f"data:image/png;base64,{img_base64}"})
+        def render():
+            # Pre-aggregated per (lease_date, category); filters applied to the rollup
+            with metrics.phase("load"):
+                agg_df = block_queries.utilization(start_date, end_date, block_type)
+            
+            # Create chart using the non-interactive backend
+            with metrics.phase("render"):
+                fig, ax = subplots(figsize=(10, 6))
+                for category in agg_df['category'].unique():
+                    subset = agg_df[agg_df['category'] == category]
+                    ax.plot(subset['lease_date'], subset['workloads_executed'], marker='o', label=category)
+                
+                ax.set_title('Block Utilization (Average Workloads per Block)')
+                ax.set_xlabel('Date')
+                ax.set_ylabel('Average Workloads')
+                ax.grid(True)
+                ax.legend()
+                ax.tick_params(axis='x', labelrotation=45)
+                fig.tight_layout()
+                return figure_png(fig)
+        
+        return chart_response('block-utilization', [block_queries.version()], render)
     except Exception as e:
         logger.error(f"Error generating block utilization chart: {e}")
         return jsonify({"error": f"Error generating chart: {str(e)}"}), 500
 
-@app.route('/api/chart/predictions', methods=['GET'])
+@bp.route('/api/chart/predictions', methods=['GET'])
 def get_predictions_chart():
     """
     Generate a chart of future predictions.
@@ -193,55 +291,65 @@ def get_predictions_chart():
         if days <= 0 or days > 365:
             return jsonify({"error": "Days parameter must be between 1 and 365"}), 400
         
-        data_path = f"{DATA_DIR}/future_predictions.csv"
-        if not os.path.exists(data_path):
+        if not cache.exists("future_predictions.csv"):
             return jsonify({"error": "Predictions data not found"}), 404
         
-        # Load and filter
-        df = pd.read_csv(data_path)
-        if start_date:
-            df = df[df['date'] >= start_date]
-        if end_date:
-            df = df[df['date'] <= end_date]
-        df = df.head(days)
-        
-        # Choose columns
-        if metric:
-            if metric not in df.columns:
-                return jsonify({
-                    "error": f"Invalid metric. Available: {df.select_dtypes(include=['number']).columns.tolist()}"
-                }), 400
-            cols_to_plot = [metric]
-        else:
-            cols_to_plot = df.select_dtypes(include=['number']).columns.tolist()
-        
-        if not cols_to_plot:
-            return jsonify({"error": "No numeric columns available to plot"}), 400
-        
-        # Plot
-        fig, ax = plt.subplots(figsize=(10, 6))
-        for col in cols_to_plot:
-            ax.plot(df['date'], df[col], marker='o', label=col)
-        ax.set_title("Future Predictions")
-        ax.set_xlabel("Date")
-        ax.set_ylabel("Value")
-        ax.legend()
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        
-        # Encode as base64
-        buf = io.BytesIO()
-        fig.savefig(buf, format='png')
-        buf.seek(0)
-        img_b64 = base64.b64encode(buf.read()).decode('utf-8')
-        plt.close(fig)
-        
-        return jsonify({"image": f"data:image/png;base64,{img_b64}"})
+        def render():
+            # Load and filter only on a cache miss
+            with metrics.phase("load"):
+                df = cache.table("future_predictions.csv")
+            with metrics.phase("filter"):
+                if start_date:
+                    df = df[df['date'] >= start_date]
+                if end_date:
+                    df = df[df['date'] <= end_date]
+                df = df.head(days)
+            
+            # Choose columns
+            if metric:
+                if metric not in df.columns:
+                    raise ChartError(f"Invalid metric. Available: {df.select_dtypes(include=['number']).columns.tolist()}")
+                cols_to_plot = [metric]
+            else:
+                cols_to_plot = df.select_dtypes(include=['number']).columns.tolist()
+            
+            if not cols_to_plot:
+                raise ChartError("No numeric columns available to plot")
+            
+            with metrics.phase("render"):
+                fig, ax = subplots(figsize=(10, 6))
+                for col in cols_to_plot:
+                    ax.plot(df['date'], df[col], marker='o', label=col)
+                ax.set_title("Future Predictions")
+                ax.set_xlabel("Date")
+                ax.set_ylabel("Value")
+                ax.legend()
+                ax.tick_params(axis='x', labelrotation=45)
+                fig.tight_layout()
+                return figure_png(fig)
+        
+        return chart_response('predictions', [cache.version("future_predictions.csv")], render)
     except Exception as e:
         logger.error(f"Error generating predictions chart: {e}")
         return jsonify({"error": f"Error generating chart: {str(e)}"}), 500
 
-@app.route('/api/chat', methods=['POST'])
+def _chat_request():
+    """(message, thread_id) of a chat request body, or an error response."""
+    data = request.json
+    
+    if not data:
+        return None, None, (jsonify({"error": "Request body is empty"}), 400)
+    
+    user_message = data.get('message')
+    if not user_message:
+        return None, None, (jsonify({"error": "Message is required"}), 400)
+    
+    return user_message, data.get('thread_id'), None
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@bp.route('/api/chat', methods=['POST'])
 def chat():
     """
     Chat with your OpenAI Assistant
@@ -253,58 +361,20 @@ def chat():
     }
     """
     try:
-        data = request.json
-        
-        if not data:
-            return jsonify({"error": "Request body is empty"}), 400
-        
-        user_message = data.get('message')
-        thread_id = data.get('thread_id')
-        
-        if not user_message:
-            return jsonify({"error": "Message is required"}), 400
-        
-        # Create a new thread if thread_id is not provided
-        if not thread_id:
-            thread = client.beta.threads.create()
-            thread_id = thread.id
-        
-        # Add the user message to the thread
-        client.beta.threads.messages.create(
-            thread_id=thread_id,
-            role="user",
-            content=user_message
-        )
-        
-        # Run the Assistant on the thread
-        run = client.beta.threads.runs.create(
-            thread_id=thread_id,
-            assistant_id=ASSISTANT_ID
-        )
-        
-        # Wait for the run to complete
-        while run.status in ["queued", "in_progress"]:
-            time.sleep(0.5)
-            run = client.beta.threads.runs.retrieve(
-                thread_id=thread_id,
-                run_id=run.id
-            )
-        
-        # Get the latest message from the assistant
-        messages = client.beta.threads.messages.list(
-            thread_id=thread_id
-        )
-        
-        # Extract the assistant's response
-        assistant_messages = [msg for msg in messages.data if msg.role == "assistant"]
-        latest_message = assistant_messages[0] if assistant_messages else None
-        
-        if latest_message:
-            assistant_response = ""
-            for content_item in latest_message.content:
-                if content_item.type == "text":
-                    assistant_response += content_item.text.value
+        user_message, thread_id, error = _chat_request()
+        if error:
+            return error
+        
+        with metrics.phase("assistant"):
+            # Create a new thread if thread_id is not provided
+            if not thread_id:
+                thread_id = assistant.create_thread()
             
+            # Add the user message to the thread and wait for the answer
+            assistant.add_message(thread_id, user_message)
+            assistant_response = assistant.reply(thread_id)
+        
+        if assistant_response is not None:
             return jsonify({
                 "response": assistant_response,
                 "thread_id": thread_id
@@ -315,223 +385,334 @@ def chat():
                 "thread_id": thread_id
             }), 500
     
+    except AssistantTimeout as e:
+        return jsonify({"error": str(e), "thread_id": thread_id}), 504
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/api/chat/stream', methods=['POST'])
+def chat_stream():
+    """
+    Chat with the assistant, streaming the answer as server-sent events.
+    
+    Same JSON body as /api/chat. Events:
+    - `thread`: {"thread_id": ...}, sent first
+    - `delta`: {"text": ...}, one per piece of the answer as it is generated
+    - `done`: {"thread_id": ..., "response": full answer}
+    - `error`: {"error": ...}, ends the stream early
+    """
+    try:
+        user_message, thread_id, error = _chat_request()
+        if error:
+            return error
+        
+        with metrics.phase("assistant"):
+            if not thread_id:
+                thread_id = assistant.create_thread()
+            assistant.add_message(thread_id, user_message)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+    
+    def events():
+        yield _sse("thread", {"thread_id": thread_id})
+        parts = []
+        try:
+            with metrics.phase("assistant_stream"):
+                for text in assistant.stream(thread_id):
+                    parts.append(text)
+                    yield _sse("delta", {"text": text})
+        except Exception as e:
+            logger.error(f"Error streaming chat response: {e}")
+            yield _sse("error", {"error": str(e), "thread_id": thread_id})
+            return
+        yield _sse("done", {"thread_id": thread_id, "response": "".join(parts)})
+    
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
-@app.route('/api/threads/<thread_id>', methods=['GET'])
+@bp.route('/api/threads/<thread_id>', methods=['GET'])
 def get_thread_history(thread_id):
     """
     Get the conversation history for a specific thread
     """
     try:
-        messages = client.beta.threads.messages.list(
-            thread_id=thread_id
-        )
-        
-        history = []
-        for msg in messages.data:
-            content_text = ""
-            for content_item in msg.content:
-                if content_item.type == "text":
-                    content_text += content_item.text.value
-            
-            history.append({
-                "role": msg.role,
-                "content": content_text,
-                "created_at": msg.created_at
-            })
-        
+        with metrics.phase("assistant"):
+            messages = assistant.history(thread_id)
         return jsonify({
             "thread_id": thread_id,
-            "messages": history
+            "messages": messages
         })
     
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-@app.route('/threads/<thread_id>', methods=['DELETE'])
+@bp.route('/threads/<thread_id>', methods=['DELETE'])
 def delete_thread(thread_id):
     """
     Delete a specific thread
     """
     try:
-        response = client.beta.threads.delete(thread_id=thread_id)
+        assistant.delete_thread(thread_id)
         return jsonify({"success": True, "deleted": thread_id})
     
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/optimize', methods=['POST'])
+@bp.route('/api/optimize', methods=['POST'])
 def optimize_blocks():
-    """Run block optimization based on specified strategy."""
+    """
+    Queue a block optimization run in the worker pool.
+    - Body: {"strategy": "D", "parameters": {...}}; see optimizer.DEFAULTS.
+    - Requests with the same parameters share one job.
+    Returns 202 with the job id to poll at /api/optimization/status.
+    """
+    import optimizer
+    from jobs import QueueFull
     try:
         # Get the request data
         request_data = request.json
         if not request_data:
             return jsonify({"error": "Request body is empty"}), 400
-            
-        # In Flask, we don't have background_tasks like in FastAPI
-        # We would need to use something like Celery or a thread for true background processing
-        # For now, we'll just return as if optimization was completed
         
-        return jsonify({"message": "Optimization started in the background", "status": "completed"})
+        try:
+            params = optimizer.normalize(request_data)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        try:
+            job, created = jobs.submit(params)
+        except QueueFull as e:
+            return jsonify({"error": str(e)}), 503
+        
+        message = "Optimization started in the background" if created else "Optimization already requested"
+        return jsonify({"message": message, **job.to_dict()}), 202
     except Exception as e:
         logger.error(f"Error starting optimization: {e}")
         return jsonify({"error": f"Error starting optimization: {str(e)}"}), 500
 
-@app.route('/api/optimization/status', methods=['GET'])
+@bp.route('/api/optimization/status', methods=['GET'])
 def get_optimization_status():
-    """Get the status of the most recent optimization run."""
+    """Get the status of an optimization job (`job_id`), by default the most recent one."""
     try:
-        status_path = f"{DATA_DIR}/optimization_results.json"
-        
-        if not os.path.exists(status_path):
+        job_id = request.args.get('job_id')
+        job = jobs.get(job_id) if job_id else jobs.latest()
+        if job is not None:
+            return jsonify(job.to_dict())
+        if job_id:
+            return jsonify({"error": f"Unknown job {job_id}"}), 404
+        
+        if not cache.exists("optimization_results.json"):
             return jsonify({"status": "No optimization has been run yet"})
         
-        with open(status_path, 'r') as f:
-            status_data = json.load(f)
-        
         return jsonify({"status": "completed"})
     except Exception as e:
         logger.error(f"Error retrieving optimization status: {e}")
         return jsonify({"error": f"Error retrieving status: {str(e)}"}), 500
 
-@app.route('/api/optimization/results', methods=['GET'])
+@bp.route('/api/optimization/jobs', methods=['GET'])
+def list_optimization_jobs():
+    """List known optimization jobs, oldest first."""
+    return jsonify({"jobs": [job.to_dict() for job in jobs.jobs()]})
+
+@bp.route('/api/optimization/jobs/<job_id>', methods=['DELETE'])
+def cancel_optimization_job(job_id):
+    """Cancel a queued or running optimization job."""
+    try:
+        if not jobs.cancel(job_id):
+            job = jobs.get(job_id)
+            if job is None:
+                return jsonify({"error": f"Unknown job {job_id}"}), 404
+            return jsonify({"error": f"Job {job_id} is already {job.status}"}), 409
+        return jsonify({"success": True, "cancelled": job_id})
+    except Exception as e:
+        logger.error(f"Error cancelling optimization job: {e}")
+        return jsonify({"error": f"Error cancelling job: {str(e)}"}), 500
+
+@bp.route('/api/optimization/results', methods=['GET'])
 def get_optimization_results():
-    """Get the results of the most recent optimization run."""
+    """Get the results of the most recent optimization run, or of `job_id`."""
     try:
-        results_path = f"{DATA_DIR}/optimization_results.json"
-        
-        if not os.path.exists(results_path):
+        job_id = request.args.get('job_id')
+        if job_id:
+            path = jobs.results_file(job_id)
+            if path is None:
+                return jsonify({"error": f"No results for job {job_id}"}), 404
+            return jsonify(cache.json(os.path.relpath(path, services().data_dir)))
+        
+        if not cache.exists("optimization_results.json"):
             return jsonify({"error": "Optimization results not found"}), 404
         
-        with open(results_path, 'r') as f:
-            results_data = json.load(f)
+        results_data = cache.json("optimization_results.json")
         
         return jsonify(results_data)
     except Exception as e:
         logger.error(f"Error retrieving optimization results: {e}")
         return jsonify({"error": f"Error retrieving results: {str(e)}"}), 500
 
-@app.route('/api/predictions', methods=['GET'])
-def get_future_predictions():
-    """Get future predictions for QPU usage and costs."""
+@bp.route('/api/pricing/whatif', methods=['POST'])
+def price_what_if():
+    """
+    Total cost of every strategy under a modified price sheet, without resimulating.
+    
+    Expected JSON format (both keys optional, applied to the base sheet in this order):
+    {
+        "price_sheet": {"lease_fee": {"Atom": 2.4}, "trigger_fee": 0.02},
+        "scale": {"lease_fee": {"Atom": 0.8}}
+    }
+    Fees may be numbers or time-of-use schedules as in provider_configs/*.yml.
+    """
     try:
-        # Get query parameters
-        metric = request.args.get('metric')
-        days = request.args.get('days', default=30, type=int)
-        
-        # Validate days parameter
-        if days <= 0 or days > 365:
-            return jsonify({"error": "Days parameter must be between 1 and 365"}), 400
-            
-        predictions_path = f"{DATA_DIR}/future_predictions.csv"
-        
-        if not os.path.exists(predictions_path):
-            return jsonify({"error": "Predictions data not found"}), 404
-        
-        # Load predictions
-        df = pd.read_csv(predictions_path)
-        
-        # Filter by days requested
-        df = df.head(days)
-        
-        # If specific metric requested, filter columns
-        if metric:
-            available_metrics = df.columns.tolist()
-            if metric not in available_metrics:
-                return jsonify({
-                    "error": f"Invalid metric. Available metrics: {available_metrics}"
-                }), 400
-            result = {
-                "dates": df['date'].tolist(),
-                "predictions": df[metric].tolist()
-            }
-        else:
-            # Return all metrics
-            result = {
-                "dates": df['date'].tolist(),
-                "predictions": df.to_dict(orient='records')
-            }
-        
+        request_data = request.get_json(silent=True)
+        if not isinstance(request_data, dict):
+            return jsonify({"error": "Request body must be a JSON object"}), 400
+        if not pricer.exists():
+            return jsonify({"error": "Strategy aggregates not found; run engine.py --stats"}), 404
+        
+        try:
+            with metrics.phase("price"):
+                result = pricer.price(request_data.get('price_sheet'), request_data.get('scale'))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        return jsonify(result)
+    except Exception as e:
+        logger.error(f"Error pricing what-if sheet: {e}")
+        return jsonify({"error": f"Error pricing what-if sheet: {str(e)}"}), 500
+
+def prediction_response(name, key, not_found, details=None):
+    """
+    Serve a predictions table in the layout the client asks for.
+    - `metric`: one or more columns (repeated and/or comma-separated); default all.
+    - `days`: number of leading rows (1-365, default 30).
+    - `format`: `records` (rows as objects, the default), `columnar`
+      ({column: values}) or `arrow` (Arrow IPC stream; also chosen by
+      `Accept: application/vnd.apache.arrow.stream`).
+    - `ci=true` adds the `_lower_ci`/`_upper_ci` columns of the chosen metrics.
+    A single `metric` without `format` keeps the original response shape.
+    Responses are gzip/br compressed when the client accepts it.
+    """
+    selected = requested_metrics(request.args)
+    days = request.args.get('days', default=30, type=int)
+    include_ci = request.args.get('ci', 'false').lower() in ('1', 'true', 'yes')
+    
+    # Validate days parameter
+    if days <= 0 or days > 365:
+        return jsonify({"error": "Days parameter must be between 1 and 365"}), 400
+    try:
+        fmt = requested_format(request)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    if not cache.exists(name):
+        return jsonify({"error": not_found}), 404
+    
+    # Load predictions (a zero-copy view of the shared Arrow file) and keep the days requested
+    with metrics.phase("load"):
+        table = cache.arrow(name).slice(0, days)
+    
+    available_metrics = table.column_names
+    if any(metric not in available_metrics for metric in selected):
+        return jsonify({
+            "error": f"Invalid metric. Available metrics: {available_metrics}"
+        }), 400
+    
+    extra = details(table) if details else {}
+    with metrics.phase("encode"):
+        response = _prediction_body(table, key, fmt, selected, include_ci, extra)
+    with metrics.phase("compress"):
+        return compress(request, response)
+
+def _prediction_body(table, key, fmt, selected, include_ci, extra):
+    """Response for `prediction_response` (Arrow `table`) before compression."""
+    columns = table.column_names
+    dates = table.column('date').to_pylist()
+    if fmt is None and len(selected) == 1:
+        metric = selected[0]
+        result = {
+            "dates": dates,
+            key: table.column(metric).to_pylist()
+        }
         # Add confidence intervals if available
-        if metric and f"{metric}_lower_ci" in df.columns and f"{metric}_upper_ci" in df.columns:
+        if f"{metric}_lower_ci" in columns and f"{metric}_upper_ci" in columns:
             result["confidence_intervals"] = {
-                "lower": df[f"{metric}_lower_ci"].tolist(),
-                "upper": df[f"{metric}_upper_ci"].tolist()
+                "lower": table.column(f"{metric}_lower_ci").to_pylist(),
+                "upper": table.column(f"{metric}_upper_ci").to_pylist()
             }
-        
-        return jsonify(result)
+        return jsonify({**result, **extra})
+    
+    # Column projection
+    if selected:
+        projection = ['date'] + [m for m in selected if m != 'date']
+        if include_ci:
+            projection += [f"{m}_{bound}_ci" for m in selected for bound in ("lower", "upper")
+                           if f"{m}_{bound}_ci" in columns and f"{m}_{bound}_ci" not in projection]
+        table = table.select(projection)
+    
+    if fmt == "arrow":
+        metadata = {k: json.dumps(v) for k, v in extra.items()}
+        return arrow_response(table, metadata)
+    if fmt == "columnar":
+        result = {"dates": dates, key: columnar(table, [c for c in table.column_names if c != 'date'])}
+    else:
+        result = {"dates": dates, key: table.to_pylist()}
+    return jsonify({**result, **extra})
+
+@bp.route('/api/predictions', methods=['GET'])
+def get_future_predictions():
+    """Get future predictions for QPU usage and costs."""
+    try:
+        return prediction_response("future_predictions.csv", "predictions", "Predictions data not found")
     except Exception as e:
         logger.error(f"Error retrieving predictions: {e}")
         return jsonify({"error": f"Error retrieving predictions: {str(e)}"}), 500
 
-@app.route('/api/optimized_predictions', methods=['GET'])
+def _optimization_details(table):
+    """Strategy and mean estimated savings recorded in the optimized predictions, if any."""
+    if "optimization_strategy" not in table.column_names:
+        return {}
+    import pyarrow.compute as pc
+    return {
+        "optimization_details": {
+            "strategy": table.column('optimization_strategy')[0].as_py(),
+            "estimated_savings": pc.mean(table.column('estimated_savings')).as_py()
+                                 if 'estimated_savings' in table.column_names else None
+        }
+    }
+
+@bp.route('/api/optimized_predictions', methods=['GET'])
 def get_optimized_predictions():
     """Get optimized future predictions for QPU usage and costs after applying optimization strategies."""
     try:
-        # Get query parameters
-        metric = request.args.get('metric')
-        days = request.args.get('days', default=30, type=int)
-        
-        # Validate days parameter
-        if days <= 0 or days > 365:
-            return jsonify({"error": "Days parameter must be between 1 and 365"}), 400
-            
-        predictions_path = f"{DATA_DIR}/optimized_predictions.csv"
-        
-        if not os.path.exists(predictions_path):
-            return jsonify({"error": "Optimized predictions data not found"}), 404
-        
-        # Load predictions
-        df = pd.read_csv(predictions_path)
-        
-        # Filter by days requested
-        df = df.head(days)
-        
-        # If specific metric requested, filter columns
-        if metric:
-            available_metrics = df.columns.tolist()
-            if metric not in available_metrics:
-                return jsonify({
-                    "error": f"Invalid metric. Available metrics: {available_metrics}"
-                }), 400
-            result = {
-                "dates": df['date'].tolist(),
-                "optimized_predictions": df[metric].tolist()
-            }
-        else:
-            # Return all metrics
-            result = {
-                "dates": df['date'].tolist(),
-                "optimized_predictions": df.to_dict(orient='records')
-            }
-        
-        # Add confidence intervals if available
-        if metric and f"{metric}_lower_ci" in df.columns and f"{metric}_upper_ci" in df.columns:
-            result["confidence_intervals"] = {
-                "lower": df[f"{metric}_lower_ci"].tolist(),
-                "upper": df[f"{metric}_upper_ci"].tolist()
-            }
-            
-        # Add optimization details if available
-        if "optimization_strategy" in df.columns:
-            result["optimization_details"] = {
-                "strategy": df['optimization_strategy'].iloc[0],
-                "estimated_savings": df['estimated_savings'].mean() if 'estimated_savings' in df.columns else None
-            }
-        
-        return jsonify(result)
+        return prediction_response("optimized_predictions.csv", "optimized_predictions",
+                                   "Optimized predictions data not found", _optimization_details)
     except Exception as e:
         logger.error(f"Error retrieving optimized predictions: {e}")
         return jsonify({"error": f"Error retrieving optimized predictions: {str(e)}"}), 500
 
+@bp.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Request, phase latency and cache metrics in the Prometheus text format."""
+    return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+@bp.route('/api/metrics/slow', methods=['GET'])
+def get_slow_requests():
+    """Sampled stacks of the most recent slow requests of this worker (enabled by PROFILE_SLOW_MS)."""
+    if metrics.profiler is None:
+        return jsonify({"error": "Slow request profiling is disabled; set PROFILE_SLOW_MS"}), 404
+    return jsonify({
+        "threshold_ms": metrics.profiler.threshold * 1000,
+        "slow_requests": metrics.profiler.slow_requests,
+        "profiles": list(metrics.profiler.profiles)
+    })
+
 if __name__ == '__main__':
+    # Development server; production runs wsgi:app under gunicorn
+    app = create_app()
     # Check if environment variables are set
-    if not os.environ.get("OPENAI_API_KEY"):
-        raise ValueError("OPENAI_API_KEY environment variable is not set")
-    
-    if not os.environ.get("OPENAI_ASSISTANT_ID"):
-        raise ValueError("OPENAI_ASSISTANT_ID environment variable is not set")
+    if services(app).assistant.name == "openai":
+        if not os.environ.get("OPENAI_API_KEY"):
+            raise ValueError("OPENAI_API_KEY environment variable is not set")
+        
+        if not os.environ.get("OPENAI_ASSISTANT_ID"):
+            raise ValueError("OPENAI_ASSISTANT_ID environment variable is not set")
     
     app.run(debug=True, host='0.0.0.0', port=int(os.environ.get("PORT", 8000)))
\ No newline at end of file
@@ -0,0 +1,174 @@
+import os
+import re
+import threading
+import time
+import uuid
+
+
+class AssistantTimeout(Exception):
+    pass
+
+
+def backoff(initial=0.05, factor=1.6, maximum=2.0):
+    """Poll delays: start short so quick runs return fast, grow so long runs poll rarely."""
+    delay = initial
+    while True:
+        yield delay
+        delay = min(delay * factor, maximum)
+
+
+class OpenAIAssistant:
+    """
+    Assistant backed by an OpenAI Assistants thread.
+    - `stream` forwards text deltas as the run produces them.
+    - `reply` is the non-streaming fallback: it polls the run with exponential
+      backoff and cancels it after `timeout` seconds.
+    """
+
+    name = "openai"
+
+    def __init__(self, api_key=None, assistant_id=None, timeout=120.0):
+        self.api_key = api_key or os.environ.get("OPENAI_API_KEY")
+        self.assistant_id = assistant_id or os.environ.get("OPENAI_ASSISTANT_ID")
+        self.timeout = timeout
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        with self._lock:
+            if self._client is None:
+                from openai import OpenAI
+                self._client = OpenAI(api_key=self.api_key)
+            return self._client
+
+    def create_thread(self):
+        return self.client.beta.threads.create().id
+
+    def add_message(self, thread_id, content):
+        self.client.beta.threads.messages.create(thread_id=thread_id, role="user", content=content)
+
+    def stream(self, thread_id):
+        """Yield the assistant's answer to the thread's last message, piece by piece."""
+        deadline = time.monotonic() + self.timeout
+        with self.client.beta.threads.runs.stream(thread_id=thread_id, assistant_id=self.assistant_id,
+                                                  timeout=self.timeout) as run:
+            for text in run.text_deltas:
+                yield text
+                if time.monotonic() > deadline:
+                    raise AssistantTimeout(f"Assistant did not finish within {self.timeout:.0f}s")
+
+    def reply(self, thread_id):
+        """The assistant's complete answer to the thread's last message."""
+        threads = self.client.beta.threads
+        run = threads.runs.create(thread_id=thread_id, assistant_id=self.assistant_id)
+        deadline = time.monotonic() + self.timeout
+        delays = backoff()
+        while run.status in ["queued", "in_progress"]:
+            if time.monotonic() > deadline:
+                threads.runs.cancel(thread_id=thread_id, run_id=run.id)
+                raise AssistantTimeout(f"Assistant did not finish within {self.timeout:.0f}s")
+            time.sleep(next(delays))
+            run = threads.runs.retrieve(thread_id=thread_id, run_id=run.id)
+
+        # The newest assistant message is the answer
+        messages = threads.messages.list(thread_id=thread_id, order="desc", limit=20)
+        for msg in messages.data:
+            if msg.role == "assistant":
+                return self._text(msg)
+        return None
+
+    def history(self, thread_id):
+        messages = self.client.beta.threads.messages.list(thread_id=thread_id)
+        return [{"role": msg.role, "content": self._text(msg), "created_at": msg.created_at}
+                for msg in messages.data]
+
+    def delete_thread(self, thread_id):
+        self.client.beta.threads.delete(thread_id=thread_id)
+
+    @staticmethod
+    def _text(msg):
+        return "".join(item.text.value for item in msg.content if item.type == "text")
+
+
+class LocalAssistant:
+    """
+    In-process stand-in with the same interface as OpenAIAssistant.
+
+    Answers are canned, and the timing comes from `first_token_delay` and `token_delay`.
+    Use it to exercise streaming and concurrency without network access or API usage.
+    """
+
+    name = "local"
+
+    def __init__(self, first_token_delay=0.2, token_delay=0.02, timeout=120.0):
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+        self.timeout = timeout
+        self._threads = {}  # thread id -> list of message dicts, oldest first
+        self._lock = threading.Lock()
+
+    def create_thread(self):
+        thread_id = f"local_{uuid.uuid4().hex}"
+        with self._lock:
+            self._threads[thread_id] = []
+        return thread_id
+
+    def add_message(self, thread_id, content):
+        self._append(thread_id, "user", content)
+
+    def stream(self, thread_id):
+        answer = self._answer(thread_id)
+        deadline = time.monotonic() + self.timeout
+        time.sleep(self.first_token_delay)
+        sent = []
+        for token in re.findall(r"\S+\s*", answer):
+            if time.monotonic() > deadline:
+                raise AssistantTimeout(f"Assistant did not finish within {self.timeout:.0f}s")
+            sent.append(token)
+            yield token
+            time.sleep(self.token_delay)
+        self._append(thread_id, "assistant", "".join(sent))
+
+    def reply(self, thread_id):
+        return "".join(self.stream(thread_id))
+
+    def history(self, thread_id):
+        with self._lock:
+            messages = list(self._messages(thread_id))
+        return messages[::-1]  # newest first, like the Assistants API
+
+    def delete_thread(self, thread_id):
+        with self._lock:
+            self._messages(thread_id)
+            del self._threads[thread_id]
+
+    def _messages(self, thread_id):
+        if thread_id not in self._threads:
+            raise KeyError(f"No thread found with id '{thread_id}'")
+        return self._threads[thread_id]
+
+    def _append(self, thread_id, role, content):
+        with self._lock:
+            self._messages(thread_id).append(
+                {"role": role, "content": content, "created_at": int(time.time())})
+
+    def _answer(self, thread_id):
+        with self._lock:
+            messages = self._messages(thread_id)
+            question = next((m["content"] for m in reversed(messages) if m["role"] == "user"), "")
+            turn = sum(m["role"] == "assistant" for m in messages) + 1
+        return (f"(local assistant, turn {turn}) You asked: \"{question}\". "
+                "Blocks with steady high daily workloads are cheapest on Atom, moderate ones on "
+                "Photon and idle ones on Spin; retag only when the saving outlasts the transfer fee.")
+
+
+BACKENDS = {"openai": OpenAIAssistant, "local": LocalAssistant}
+
+
+def create_assistant(name=None, **kwargs):
+    """Assistant backend by name, defaulting to $ASSISTANT_BACKEND or "openai"."""
+    name = name or os.environ.get("ASSISTANT_BACKEND", "openai")
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown assistant backend {name!r}; choose from {sorted(BACKENDS)}")
+    return BACKENDS[name](**kwargs)
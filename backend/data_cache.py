@@ -0,0 +1,195 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+
+# Columnar copies of a table are preferred over the CSV of the same name
+COLUMNAR_SUFFIXES = (".parquet", ".arrow", ".feather")
+# Arrow IPC copies of tables, written once per source version and memory-mapped by every worker
+SHARED_DIR = ".shared"
+
+
+# pandas and pyarrow are imported by the first table read, not at startup
+def _read_arrow(path):
+    return _map_arrow(path).to_pandas()
+
+
+def _read_pandas(method):
+    def read(path):
+        import pandas as pd
+        return getattr(pd, method)(path)
+    return read
+
+
+_TABLE_READERS = {
+    ".parquet": _read_pandas("read_parquet"),
+    ".arrow": _read_arrow,
+    ".feather": _read_pandas("read_feather"),
+    ".csv": _read_pandas("read_csv"),
+}
+
+
+def _map_arrow(path):
+    """Table whose buffers point into a memory map of the Arrow IPC file at `path` (no copy)."""
+    import pyarrow as pa
+    with pa.memory_map(path) as source:
+        return pa.ipc.open_file(source).read_all()
+
+
+def _arrow_csv(path):
+    """CSV as Arrow; date/time columns keep their text, as pandas.read_csv leaves them."""
+    import pyarrow as pa
+    import pyarrow.csv as pv
+    table = pv.read_csv(path)
+    temporal = [f.name for f in table.schema if pa.types.is_temporal(f.type)]
+    if temporal:
+        table = pv.read_csv(path, convert_options=pv.ConvertOptions(
+            column_types={name: pa.string() for name in temporal}))
+    return table
+
+
+def _arrow_parquet(path):
+    import pyarrow.parquet as pq
+    return pq.read_table(path)
+
+
+def _arrow_feather(path):
+    import pyarrow.feather as feather
+    return feather.read_table(path, memory_map=False)
+
+
+_ARROW_READERS = {
+    ".parquet": _arrow_parquet,
+    ".feather": _arrow_feather,
+    ".csv": _arrow_csv,
+}
+
+
+class DatasetCache:
+    """
+    Process-wide cache of the tables and JSON documents in a data directory.
+
+    - Each file is loaded once and served from memory afterwards.
+    - An entry is reloaded when the file's mtime or size changes.
+    - Total size is kept under `max_bytes` by evicting least recently used entries.
+    - `table("x.csv")` transparently reads x.parquet / x.arrow / x.feather if present.
+    - `arrow("x.csv")` returns the same table as a pyarrow Table memory-mapped
+      from a shared Arrow IPC file, so worker processes share its pages through
+      the OS page cache instead of each holding a decoded copy. The first
+      process to need a version of a table writes `.shared/<file>.<mtime>-<size>.arrow`;
+      `.arrow` sources are mapped directly.
+
+    Returned objects are shared between requests and must not be mutated.
+    """
+
+    def __init__(self, data_dir, max_bytes=512 * 2**20):
+        self.data_dir = data_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # (kind, path) -> (signature, value, nbytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def resolve(self, name):
+        """Path that backs `name`, preferring columnar versions of a CSV; None if missing."""
+        path = os.path.join(self.data_dir, name)
+        stem, ext = os.path.splitext(path)
+        candidates = [stem + suffix for suffix in COLUMNAR_SUFFIXES] if ext == ".csv" else []
+        for candidate in candidates + [path]:
+            if os.path.exists(candidate):
+                return candidate
+        return None
+
+    def exists(self, name):
+        return self.resolve(name) is not None
+
+    def version(self, name):
+        """Cheap identifier of the file's current contents (changes when it is rewritten)."""
+        path = self.resolve(name)
+        if path is None:
+            return None
+        st = os.stat(path)
+        return f"{os.path.basename(path)}:{st.st_mtime_ns}:{st.st_size}"
+
+    def table(self, name):
+        """DataFrame for `name` (CSV, Parquet, Arrow IPC or Feather)."""
+        path = self._require(name)
+        reader = _TABLE_READERS[os.path.splitext(path)[1]]
+        return self._get(("table", path), path, reader, lambda df: int(df.memory_usage(deep=True).sum()))
+
+    def arrow(self, name):
+        """Memory-mapped pyarrow Table for `name`; mapped pages do not count towards `max_bytes`."""
+        path = self._require(name)
+        return self._get(("arrow", path), path, self._shared, lambda table: 0)
+
+    def json(self, name):
+        """Parsed JSON document for `name`."""
+        path = self._require(name)
+
+        def load(p):
+            with open(p, 'r') as f:
+                return json.load(f)
+
+        return self._get(("json", path), path, load, lambda doc: os.path.getsize(path))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _require(self, name):
+        path = self.resolve(name)
+        if path is None:
+            raise FileNotFoundError(os.path.join(self.data_dir, name))
+        return path
+
+    def _shared(self, path):
+        """Map `path`, or its shared Arrow copy for the file's current version (written if missing)."""
+        if path.endswith(".arrow"):
+            return _map_arrow(path)
+        import pyarrow as pa
+        st = os.stat(path)
+        shared_dir = os.path.join(self.data_dir, SHARED_DIR)
+        prefix = f"{os.path.basename(path)}."
+        shared = os.path.join(shared_dir, f"{prefix}{st.st_mtime_ns}-{st.st_size}.arrow")
+        if not os.path.exists(shared):
+            table = _ARROW_READERS[os.path.splitext(path)[1]](path)
+            os.makedirs(shared_dir, exist_ok=True)
+            tmp = f"{shared}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with pa.OSFile(tmp, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+            os.replace(tmp, shared)
+            # Older versions: workers still mapping them keep the pages until they let go
+            for old in os.listdir(shared_dir):
+                if old.startswith(prefix) and old.endswith(".arrow") and old != os.path.basename(shared):
+                    try:
+                        os.remove(os.path.join(shared_dir, old))
+                    except FileNotFoundError:
+                        pass
+        return _map_arrow(shared)
+
+    def _get(self, key, path, loader, sizer):
+        st = os.stat(path)
+        signature = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        value = loader(path)
+        nbytes = sizer(value)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            if nbytes <= self.max_bytes:
+                self._entries[key] = (signature, value, nbytes)
+                self._bytes += nbytes
+                while self._bytes > self.max_bytes:
+                    _, (_, _, evicted) = self._entries.popitem(last=False)
+                    self._bytes -= evicted
+        return value
@@ -0,0 +1,73 @@
+import gzip
+
+from flask import Response
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+FORMATS = ("records", "columnar", "arrow")
+# Responses smaller than this are sent uncompressed
+MIN_COMPRESS_BYTES = 1024
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+
+def requested_metrics(args):
+    """Metrics from repeated and/or comma-separated `metric` parameters, in order, without duplicates."""
+    metrics = []
+    for value in args.getlist('metric'):
+        metrics.extend(m.strip() for m in value.split(',') if m.strip())
+    return list(dict.fromkeys(metrics))
+
+
+def requested_format(request):
+    """`format` parameter, else Arrow if the Accept header prefers it, else None (legacy layout)."""
+    fmt = request.args.get('format')
+    if fmt:
+        if fmt not in FORMATS:
+            raise ValueError(f"Invalid format. Available formats: {list(FORMATS)}")
+        return fmt
+    if request.accept_mimetypes.best_match(['application/json', ARROW_STREAM]) == ARROW_STREAM:
+        return "arrow"
+    return None
+
+
+def columnar(table, columns):
+    """{column: values} for `columns` of an Arrow `table`; no per-row repetition of column names."""
+    return {column: table.column(column).to_pylist() for column in columns}
+
+
+def arrow_response(table, metadata=None):
+    """Arrow `table` as an Arrow IPC stream; `metadata` (str -> str) goes into the schema."""
+    import pyarrow as pa
+    if metadata:
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), **metadata})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return Response(sink.getvalue().to_pybytes(), mimetype=ARROW_STREAM)
+
+
+def compress(request, response):
+    """
+    Encode `response` with br or gzip according to Accept-Encoding.
+    br is used only when the brotli package is installed.
+    """
+    response.vary.add('Accept-Encoding')
+    if response.direct_passthrough or response.status_code != 200 or 'Content-Encoding' in response.headers:
+        return response
+    data = response.get_data()
+    if len(data) < MIN_COMPRESS_BYTES:
+        return response
+
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        data, encoding = brotli.compress(data, quality=5), 'br'
+    elif accepted['gzip']:
+        data, encoding = gzip.compress(data, compresslevel=6), 'gzip'
+    else:
+        return response
+    response.set_data(data)
+    response.headers['Content-Encoding'] = encoding
+    return response
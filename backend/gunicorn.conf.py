@@ -0,0 +1,24 @@
+# Gunicorn settings for wsgi:app; command-line flags override them
+import os
+import shutil
+import tempfile
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 8000)}"
+workers = int(os.environ.get("WEB_CONCURRENCY", 4))
+# Chat streams hold a thread for the length of an answer, so each worker serves several requests at once
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", 8))
+# The app module is imported once and forked; its caches, pools and clients are created per
+# worker on first use, and large tables are shared as memory-mapped Arrow files in DATA_DIR/.shared.
+# Optimization jobs run in the worker that accepted them; their state is kept in DATA_DIR/jobs
+# so that any worker can report, deduplicate and cancel them.
+preload_app = True
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 120))
+
+# Workers write metric snapshots here and /api/metrics sums them (metrics.Metrics)
+os.environ.setdefault("METRICS_DIR", os.path.join(tempfile.gettempdir(), f"qpu-metrics-{os.environ.get('PORT', 8000)}"))
+
+
+def on_starting(server):
+    # Snapshots of the previous run would be added to this run's counters
+    shutil.rmtree(os.environ["METRICS_DIR"], ignore_errors=True)
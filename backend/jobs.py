@@ -0,0 +1,257 @@
+import contextlib
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import threading
+import time
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+try:
+    import fcntl
+except ImportError:  # Windows: jobs are shared between the threads of one process only
+    fcntl = None
+
+import optimizer
+
+ACTIVE = ("queued", "running")
+
+
+class QueueFull(Exception):
+    pass
+
+
+class Job:
+    """One optimization request; `id` is derived from its parameters and input data."""
+
+    def __init__(self, job_id, params):
+        self.id = job_id
+        self.params = params
+        self.status = "queued"
+        self.progress = 0.0
+        self.error = None
+        self.submitted = time.time()
+        self.requested = self.submitted  # last submission, orders the job list
+        self.started = None
+        self.finished = None
+        self.owner = os.getpid()  # web worker running it
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "progress": round(self.progress, 4),
+            "error": self.error,
+            "strategy": self.params["strategy"],
+            "parameters": self.params["parameters"],
+            "submitted": self.submitted,
+            "started": self.started,
+            "finished": self.finished,
+        }
+
+    def record(self):
+        return {**self.to_dict(), "params": self.params, "requested": self.requested, "owner": self.owner}
+
+    @classmethod
+    def from_record(cls, doc):
+        job = cls(doc["job_id"], doc["params"])
+        for key in ("status", "progress", "error", "submitted", "requested", "started", "finished", "owner"):
+            setattr(job, key, doc[key])
+        return job
+
+
+class JobManager:
+    """
+    Runs optimization jobs in a bounded pool of worker processes.
+
+    - Job state lives in `<jobs_dir>/<job_id>.job`, so every web worker sharing
+      `jobs_dir` sees, deduplicates and cancels the same jobs; the worker that
+      accepted a job runs it and records how it ended.
+    - Requests with the same parameters (and unchanged input data) share one job.
+    - At most `max_pending` jobs are queued or running across all web workers;
+      more raise QueueFull.
+    - The `history` most recent finished jobs are remembered.
+    - Workers report progress and notice cancellation through files in `jobs_dir`,
+      and publish finished results atomically to `results_path`.
+    """
+
+    def __init__(self, jobs_dir, results_path, workers=1, max_pending=8, history=100):
+        self.jobs_dir = jobs_dir
+        self.results_path = results_path
+        self.workers = workers
+        self.max_pending = max_pending
+        self.history = history
+        self._futures = {}  # job id -> Future, for the jobs this process runs
+        self._pool = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def job_id(params):
+        payload = json.dumps([params, optimizer.input_versions()], sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+    def submit(self, params):
+        """Job for `params` and whether it was newly created."""
+        job_id = self.job_id(params)
+        with self._locked():
+            job = self._load(job_id)
+            if job is not None and job.status in ACTIVE:
+                return job, False
+            if job is not None and job.status == "completed" and os.path.exists(self._path(job_id, "json")):
+                # Same inputs, same answer: republish it as the latest results
+                with open(self._path(job_id, "json")) as f:
+                    optimizer.write_json_atomic(self.results_path, json.load(f))
+                job.requested = time.time()
+                self._save(job)
+                return job, False
+            if sum(j.status in ACTIVE for j in self._records()) >= self.max_pending:
+                raise QueueFull(f"{self.max_pending} optimization jobs are already pending")
+
+            for ext in ("cancel", "progress", "json"):
+                if os.path.exists(self._path(job_id, ext)):
+                    os.remove(self._path(job_id, ext))
+            job = Job(job_id, params)
+            # Registered before the record is written, so it never looks orphaned
+            future = self._futures[job_id] = self._executor().submit(
+                optimizer.run_job, job_id, params, self.jobs_dir, self.results_path)
+            self._save(job)
+            finished = [j for j in self._records() if j.status not in ACTIVE]
+            for old in finished[:max(0, len(finished) - self.history)]:
+                os.remove(self._path(old.id, "job"))
+        future.add_done_callback(lambda future: self._finish(job_id, future))
+        return job, True
+
+    def get(self, job_id):
+        """Job by id with fresh progress, or None."""
+        job = self._load(job_id)
+        if job is not None and job.status in ACTIVE:
+            self._poll(job)
+        return job
+
+    def latest(self):
+        jobs = self._records()
+        return self.get(jobs[-1].id) if jobs else None
+
+    def jobs(self):
+        return [self.get(job.id) for job in self._records()]
+
+    def cancel(self, job_id):
+        """Cancel a queued or running job; False if it is unknown or already finished."""
+        job = self._load(job_id)
+        if job is None or job.status not in ACTIVE:
+            return False
+        future = self._futures.get(job_id)
+        # Not under the lock: a successful cancel() runs _finish right away
+        if future is None or not future.cancel():
+            # Running, or accepted by another web worker: the job checks for this
+            # file when it starts and after every simulated day
+            open(self._path(job_id, "cancel"), 'w').close()
+        return True
+
+    def results_file(self, job_id):
+        if not _valid_id(job_id):
+            return None
+        path = self._path(job_id, "json")
+        return path if os.path.exists(path) else None
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _path(self, job_id, ext):
+        return os.path.join(self.jobs_dir, f"{job_id}.{ext}")
+
+    @contextlib.contextmanager
+    def _locked(self):
+        """Serializes job state changes between threads and, via flock, web worker processes."""
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        with self._lock, open(os.path.join(self.jobs_dir, ".lock"), 'a') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            yield
+
+    def _load(self, job_id):
+        """Job from its record, or None; active jobs whose web worker is gone count as failed."""
+        if not _valid_id(job_id):
+            return None
+        try:
+            with open(self._path(job_id, "job")) as f:
+                job = Job.from_record(json.load(f))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if job.status in ACTIVE and not self._alive(job):
+            job.status, job.error = "failed", "Web worker exited before the job finished"
+        return job
+
+    def _save(self, job):
+        optimizer.write_json_atomic(self._path(job.id, "job"), job.record())
+
+    def _records(self):
+        """Known jobs, oldest request first."""
+        try:
+            names = os.listdir(self.jobs_dir)
+        except FileNotFoundError:
+            return []
+        jobs = [self._load(name[:-len(".job")]) for name in names if name.endswith(".job")]
+        return sorted((job for job in jobs if job is not None), key=lambda job: job.requested)
+
+    def _alive(self, job):
+        if job.owner == os.getpid():
+            return job.id in self._futures
+        if os.name != "posix":
+            return True
+        try:
+            os.kill(job.owner, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    def _executor(self):
+        if self._pool is None:
+            # spawn: the Flask process has threads and open client connections
+            self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                             mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    def _poll(self, job):
+        try:
+            with open(self._path(job.id, "progress")) as f:
+                state = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        job.status = "running"
+        job.progress = state["progress"]
+        job.started = state["started"]
+
+    def _finish(self, job_id, future):
+        with self._locked():
+            job = self._load(job_id)
+            self._futures.pop(job_id, None)
+            if job is None:
+                return
+            self._poll(job)
+            job.finished = time.time()
+            try:
+                future.result()
+                job.status, job.progress = "completed", 1.0
+            except (CancelledError, optimizer.JobCancelled):
+                job.status = "cancelled"
+            except BrokenProcessPool as e:
+                job.status, job.error = "failed", f"Worker process died: {e}"
+                self._pool = None
+            except Exception as e:
+                job.status, job.error = "failed", f"{type(e).__name__}: {e}"
+            self._save(job)
+            for ext in ("cancel", "progress"):
+                if os.path.exists(self._path(job_id, ext)):
+                    os.remove(self._path(job_id, ext))
+
+
+def _valid_id(job_id):
+    return re.fullmatch(r"[0-9a-f]{16}", job_id or "") is not None
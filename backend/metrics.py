@@ -0,0 +1,322 @@
+import bisect
+import glob
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from functools import partial
+
+from flask import g, has_request_context, request
+
+logger = logging.getLogger(__name__)
+
+# Histogram upper bounds in seconds (Prometheus convention, +Inf implied)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def add(self, counts, total, count):
+        self.counts = [a + b for a, b in zip(self.counts, counts)]
+        self.sum += total
+        self.count += count
+
+
+def _labels(**labels):
+    inner = ",".join('{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"'))
+                     for k, v in labels.items())
+    return "{" + inner + "}"
+
+
+class Metrics:
+    """
+    Request counts, per-endpoint and per-phase latency histograms and cache hit ratios.
+
+    - `init_app` times every request; the endpoint label is the URL rule, so
+      path parameters do not create new series.
+    - `phase("render")` times a block inside a request (no-op outside one).
+    - `register_cache` exports the `hits`/`misses` counters of a cache object.
+    - `render` returns everything in the Prometheus text exposition format.
+    - Everything is counted per process. With `shared_dir` (one directory per
+      server run, shared by its gunicorn workers) each process writes a snapshot
+      to `<shared_dir>/<pid>.json` at most every `flush_interval` seconds and
+      `render` sums the snapshots of all workers, including exited ones, so
+      counters never go backwards. Without it the numbers are those of the
+      worker answering the scrape.
+    """
+
+    def __init__(self, prefix="qpu", buckets=DEFAULT_BUCKETS, profiler=None, shared_dir=None, flush_interval=1.0):
+        self.prefix = prefix
+        self.buckets = buckets
+        self.profiler = profiler
+        self.shared_dir = shared_dir
+        self.flush_interval = flush_interval
+        self._dirty = False
+        self._flusher = None
+        self._requests = Counter()  # (endpoint, method, status) -> count
+        self._durations = {}  # endpoint -> Histogram
+        self._phases = {}  # (endpoint, phase) -> Histogram
+        self._caches = {}  # name -> object with hits / misses
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        app.before_request(self._start)
+        app.after_request(self._respond)
+        # Requests that fail before a response exists are recorded at teardown
+        app.teardown_request(self._teardown)
+        return self
+
+    def register_cache(self, name, cache):
+        self._caches[name] = cache
+
+    @contextmanager
+    def phase(self, name):
+        if not has_request_context():
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._observe(self._phases, (_endpoint(), name), time.perf_counter() - start)
+
+    def _observe(self, table, key, value):
+        with self._lock:
+            hist = table.get(key)
+            if hist is None:
+                hist = table[key] = Histogram(self.buckets)
+            hist.observe(value)
+
+    def _start(self):
+        g.metrics_start = time.perf_counter()
+        if self.profiler is not None:
+            self.profiler.begin(_endpoint())
+
+    def _respond(self, response):
+        start = g.pop('metrics_start', None)
+        if start is not None:
+            # Closing happens after the body is sent, so streamed responses are timed to the last byte
+            response.call_on_close(partial(self._finish, start, _endpoint(), request.method, response.status_code))
+        return response
+
+    def _teardown(self, exc=None):
+        start = g.pop('metrics_start', None)
+        if start is not None:
+            self._finish(start, _endpoint(), request.method, 500)
+
+    def _finish(self, start, endpoint, method, status):
+        elapsed = time.perf_counter() - start
+        self._observe(self._durations, endpoint, elapsed)
+        with self._lock:
+            self._requests[(endpoint, method, status)] += 1
+            self._dirty = True
+            if self.shared_dir is not None and self._flusher is None:
+                # Started by the first request, i.e. after gunicorn has forked the worker
+                self._flusher = threading.Thread(target=self._flush_loop, name="metrics-flusher", daemon=True)
+                self._flusher.start()
+        if self.profiler is not None:
+            self.profiler.end(elapsed)
+
+    def snapshot(self):
+        """This process's counters as plain JSON-able data."""
+        with self._lock:
+            return {
+                "requests": [[*key, n] for key, n in self._requests.items()],
+                "durations": [[endpoint, h.counts, h.sum, h.count] for endpoint, h in self._durations.items()],
+                "phases": [[endpoint, phase, h.counts, h.sum, h.count]
+                           for (endpoint, phase), h in self._phases.items()],
+                "caches": {name: [c.hits, c.misses] for name, c in self._caches.items()},
+                "slow_requests": self.profiler.slow_requests if self.profiler is not None else 0,
+            }
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self._flush()
+            except OSError as e:
+                logger.warning(f"Could not write metrics snapshot: {e}")
+
+    def _flush(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            self._dirty = False
+        os.makedirs(self.shared_dir, exist_ok=True)
+        path = os.path.join(self.shared_dir, f"{os.getpid()}.json")
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp, path)
+
+    def _snapshots(self):
+        if self.shared_dir is None:
+            return [self.snapshot()]
+        self._flush()  # this worker's numbers are current, the others' at most flush_interval old
+        snapshots = []
+        for path in glob.glob(os.path.join(self.shared_dir, "*.json")):
+            try:
+                with open(path) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue  # a worker is replacing it
+        return snapshots or [self.snapshot()]
+
+    def render(self):
+        p = self.prefix
+        requests, durations, phases, caches, slow_requests = Counter(), {}, {}, {}, 0
+        for snap in self._snapshots():
+            for endpoint, method, status, n in snap["requests"]:
+                requests[(endpoint, method, status)] += n
+            for endpoint, *hist in snap["durations"]:
+                durations.setdefault(endpoint, Histogram(self.buckets)).add(*hist)
+            for endpoint, phase, *hist in snap["phases"]:
+                phases.setdefault((endpoint, phase), Histogram(self.buckets)).add(*hist)
+            for name, (hits, misses) in snap["caches"].items():
+                before = caches.get(name, (0, 0))
+                caches[name] = (before[0] + hits, before[1] + misses)
+            slow_requests += snap["slow_requests"]
+
+        lines = [f"# HELP {p}_requests_total HTTP requests by endpoint, method and status.",
+                 f"# TYPE {p}_requests_total counter"]
+        for (endpoint, method, status), n in sorted(requests.items()):
+            lines.append(f"{p}_requests_total{_labels(endpoint=endpoint, method=method, status=status)} {n}")
+
+        lines += [f"# HELP {p}_request_duration_seconds Request latency by endpoint.",
+                  f"# TYPE {p}_request_duration_seconds histogram"]
+        for endpoint, hist in sorted(durations.items()):
+            lines += self._histogram(f"{p}_request_duration_seconds", hist, endpoint=endpoint)
+
+        lines += [f"# HELP {p}_phase_duration_seconds Latency of request phases (load, filter, render, encode, ...).",
+                  f"# TYPE {p}_phase_duration_seconds histogram"]
+        for (endpoint, phase), hist in sorted(phases.items()):
+            lines += self._histogram(f"{p}_phase_duration_seconds", hist, endpoint=endpoint, phase=phase)
+
+        lines += [f"# HELP {p}_cache_hits_total Cache hits.", f"# TYPE {p}_cache_hits_total counter"]
+        lines += [f"{p}_cache_hits_total{_labels(cache=name)} {hits}" for name, (hits, _) in caches.items()]
+        lines += [f"# HELP {p}_cache_misses_total Cache misses.", f"# TYPE {p}_cache_misses_total counter"]
+        lines += [f"{p}_cache_misses_total{_labels(cache=name)} {misses}" for name, (_, misses) in caches.items()]
+        lines += [f"# HELP {p}_cache_hit_ratio Hits / (hits + misses) since start.",
+                  f"# TYPE {p}_cache_hit_ratio gauge"]
+        for name, (hits, misses) in caches.items():
+            total = hits + misses
+            lines.append(f"{p}_cache_hit_ratio{_labels(cache=name)} {hits / total if total else 0.0}")
+
+        if self.profiler is not None:
+            lines += [f"# HELP {p}_slow_requests_total Requests slower than the profiling threshold.",
+                      f"# TYPE {p}_slow_requests_total counter",
+                      f"{p}_slow_requests_total {slow_requests}"]
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _histogram(name, hist, **labels):
+        lines, cumulative = [], 0
+        for bound, n in zip(hist.buckets, hist.counts):
+            cumulative += n
+            lines.append(f"{name}_bucket{_labels(**labels, le=bound)} {cumulative}")
+        lines.append(f"{name}_bucket{_labels(**labels, le='+Inf')} {hist.count}")
+        lines.append(f"{name}_sum{_labels(**labels)} {hist.sum}")
+        lines.append(f"{name}_count{_labels(**labels)} {hist.count}")
+        return lines
+
+
+def _endpoint():
+    rule = request.url_rule
+    return rule.rule if rule is not None else "unmatched"
+
+
+class SlowRequestProfiler:
+    """
+    Sampling profiler for requests slower than `threshold` seconds.
+
+    A background thread samples the stack of every request that has been
+    running for at least `threshold` every `interval` seconds, so fast requests
+    cost only a dict insert. When a slow request ends, its samples are kept as
+    collapsed stacks (flame-graph format, root first) in `profiles` (the last
+    `keep`), logged, and passed to `on_slow` if given.
+    """
+
+    def __init__(self, threshold, interval=0.005, keep=20, on_slow=None):
+        self.threshold = threshold
+        self.interval = interval
+        self.on_slow = on_slow
+        self.profiles = deque(maxlen=keep)
+        self.slow_requests = 0
+        self._active = {}  # thread id -> (start, endpoint, Counter of stacks)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def begin(self, endpoint):
+        with self._lock:
+            self._active[threading.get_ident()] = (time.perf_counter(), endpoint, Counter())
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="slow-request-sampler", daemon=True)
+                self._thread.start()
+
+    def end(self, elapsed):
+        with self._lock:
+            state = self._active.pop(threading.get_ident(), None)
+        if state is None or elapsed < self.threshold:
+            return
+        _, endpoint, stacks = state
+        profile = {
+            "endpoint": endpoint,
+            "duration": elapsed,
+            "finished": time.time(),
+            "samples": sum(stacks.values()),
+            "stacks": [f"{stack} {n}" for stack, n in stacks.most_common(50)],
+        }
+        with self._lock:
+            self.slow_requests += 1
+            self.profiles.append(profile)
+        top = stacks.most_common(1)
+        logger.warning(f"Slow request {endpoint} took {elapsed:.3f}s; "
+                       f"hottest frame: {top[0][0].rsplit(';', 1)[-1] if top else 'no samples'}")
+        if self.on_slow is not None:
+            self.on_slow(profile)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            now = time.perf_counter()
+            with self._lock:
+                slow = [(tid, stacks) for tid, (start, _, stacks) in self._active.items()
+                        if now - start >= self.threshold]
+            if not slow:
+                continue
+            frames = sys._current_frames()
+            for tid, stacks in slow:
+                frame = frames.get(tid)
+                if frame is not None:
+                    stacks[_collapse(frame)] += 1
+
+    @classmethod
+    def from_env(cls):
+        """Profiler enabled by PROFILE_SLOW_MS (threshold in ms), else None."""
+        threshold_ms = os.environ.get("PROFILE_SLOW_MS")
+        if not threshold_ms:
+            return None
+        return cls(float(threshold_ms) / 1000, interval=float(os.environ.get("PROFILE_INTERVAL_MS", 5)) / 1000)
+
+
+def _collapse(frame):
+    parts = []
+    while frame is not None:
+        code = frame.f_code
+        parts.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+        frame = frame.f_back
+    return ";".join(reversed(parts))
@@ -0,0 +1,189 @@
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Simulation inputs; the engine itself lives with the notebooks
+NOTEBOOKS_DIR = os.environ.get("NOTEBOOKS_DIR", os.path.join(ROOT_DIR, "notebooks"))
+ENGINE_DATA_DIR = os.environ.get("ENGINE_DATA_DIR", os.path.join(ROOT_DIR, "data"))
+PRICE_SHEET = os.environ.get("PRICE_SHEET", os.path.join(ROOT_DIR, "provider_configs", "qpu_demo.yml"))
+POLICY_WEIGHTS = os.environ.get("POLICY_WEIGHTS", os.path.join(NOTEBOOKS_DIR, "models", "qpu_dqn.npz"))
+
+BASELINE = "B"
+STRATEGY_ALIASES = {"cost_efficiency": "D"}
+DEFAULTS = {
+    "atom_threshold": 900.0,
+    "photon_threshold": 176.0,
+    "roll_days": 7,
+    "decay": 0.8,
+    "days": 180,
+    "workload_threshold": 0.0,
+    "max_blocks": 100,
+}
+# Files whose contents determine the outcome of a run
+INPUT_FILES = ("blocks.parquet", "workloads_daily.parquet")
+
+# Progress files are rewritten at most this often
+PROGRESS_INTERVAL = 0.5
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def normalize(request_data):
+    """
+    Canonical job parameters for a POST /api/optimize body.
+    - `strategy` is an engine strategy (A, B, S, D, DQN) or an alias of one.
+    - `parameters` override DEFAULTS; unknown keys are rejected.
+    Raises ValueError with a message suitable for a 400 response.
+    """
+    if not isinstance(request_data, dict):
+        raise ValueError("Request body must be a JSON object")
+    strategy = str(request_data.get('strategy', 'D'))
+    strategy = STRATEGY_ALIASES.get(strategy, strategy)
+    if strategy not in ("A", "B", "S", "D", "DQN"):
+        raise ValueError(f"Unknown strategy {strategy!r}; choose from A, B, S, D, DQN "
+                         f"or {', '.join(STRATEGY_ALIASES)}")
+
+    overrides = request_data.get('parameters') or {}
+    if not isinstance(overrides, dict):
+        raise ValueError("parameters must map parameter names to values")
+    unknown = set(overrides) - set(DEFAULTS)
+    if unknown:
+        raise ValueError(f"Unknown parameters {sorted(unknown)}; supported: {sorted(DEFAULTS)}")
+    params = dict(DEFAULTS)
+    for name, value in overrides.items():
+        try:
+            params[name] = type(DEFAULTS[name])(value)
+        except (TypeError, ValueError, OverflowError):
+            raise ValueError(f"Parameter {name!r} must be a number")
+    if not 1 <= params['days'] <= 366:
+        raise ValueError("days must be between 1 and 366")
+    if params['roll_days'] < 1 or not 0 < params['decay'] < 1 or params['max_blocks'] < 0:
+        raise ValueError("roll_days must be >= 1, decay in (0, 1) and max_blocks >= 0")
+    return {"strategy": strategy, "parameters": params}
+
+
+def input_versions():
+    """mtime/size of every simulation input, so changed data means a new job."""
+    paths = [os.path.join(ENGINE_DATA_DIR, name) for name in INPUT_FILES] + [PRICE_SHEET, POLICY_WEIGHTS]
+    versions = {}
+    for path in paths:
+        if os.path.exists(path):
+            st = os.stat(path)
+            versions[os.path.basename(path)] = f"{st.st_mtime_ns}:{st.st_size}"
+    return versions
+
+
+def write_json_atomic(path, doc):
+    """Write `doc` to a temporary file next to `path` and rename it into place."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(doc, f)
+    os.replace(tmp, path)
+
+
+def optimize(job, progress=None):
+    """
+    Simulate the baseline and the requested strategy and summarize the difference.
+    Returns the document served by /api/optimization/results.
+    """
+    if NOTEBOOKS_DIR not in sys.path:
+        sys.path.insert(0, NOTEBOOKS_DIR)
+    import engine
+    import pyarrow.parquet as pq
+    from cost_model import CostModel, TAGS
+
+    strategy, p = job['strategy'], job['parameters']
+    strategies = tuple(dict.fromkeys((BASELINE, strategy)))
+    policy = None
+    if strategy == engine.POLICY:
+        from policy_export import NumpyQPolicy
+        policy = NumpyQPolicy.load(POLICY_WEIGHTS)
+
+    cm = CostModel(PRICE_SHEET)
+    wl = engine.load_workloads(ENGINE_DATA_DIR, p['days'])
+    stats = engine.run_strategies(wl, strategies, (p['atom_threshold'], p['photon_threshold']),
+                                  p['roll_days'], p['decay'], policy, progress)
+    daily = engine.price(stats, cm)
+    current = float(daily[f"cost_{BASELINE}"].mean())
+    expected = float(daily[f"cost_{strategy}"].mean())
+
+    # Only the blocks leased within the horizon (a prefix in lease order) were simulated
+    n = stats.tags.shape[1]
+    wl = engine.Workloads(wl.sizes[:n], wl.lease_day[:n], wl.jobs[:n], wl.file_order[:n])
+
+    # Blocks whose final tag differs from the baseline, valued at their recent load
+    # (the baseline is already the cheapest tag for each block's lifetime average)
+    before, after = stats.tags[0], stats.tags[strategies.index(strategy)]
+    window = min(p['roll_days'], wl.n_days)
+    active_days = np.minimum(wl.n_days - wl.lease_day.astype(np.int64), window)
+    recent = wl.jobs[:, wl.n_days - window:].sum(axis=1, dtype=np.int64)
+    avg = np.divide(recent, active_days, out=np.zeros(wl.n_blocks), where=active_days > 0)
+    daily_cost = lambda tags: cm.lease_rate[tags] * 24 + avg * cm.exec_trigger_rate[tags]
+    saving = daily_cost(before) - daily_cost(after)
+    rows = np.flatnonzero((before != after) & (saving > 0) & (avg >= p['workload_threshold']))
+    rows = rows[np.argsort(-saving[rows], kind="stable")]
+    top = rows[:p['max_blocks']]
+    block_ids = pq.read_table(os.path.join(ENGINE_DATA_DIR, "blocks.parquet"), columns=["block_id"])["block_id"]
+    block_ids = block_ids.take(wl.file_order[top]).to_pylist()
+
+    distribution = lambda tags: {t: int(n) for t, n in zip(TAGS, np.bincount(tags, minlength=len(TAGS)))}
+    return {
+        "strategy": strategy,
+        "baseline": BASELINE,
+        "parameters": p,
+        "total_blocks_analyzed": int(wl.n_blocks),
+        "transfers_recommended": int(len(rows)),
+        "current_avg_daily_cost": current,
+        "expected_avg_daily_cost": expected,
+        "expected_monthly_savings": (current - expected) * 30,
+        "percentage_improvement": (current - expected) / current * 100 if current else 0.0,
+        "current_distribution": distribution(before),
+        "optimized_distribution": distribution(after),
+        "recommended_transfers": [
+            {
+                "block_id": block_id,
+                "current_category": TAGS[before[r]],
+                "recommended_category": TAGS[after[r]],
+                "size": int(wl.sizes[r]),
+                "avg_daily_workloads": float(avg[r]),
+                "expected_savings_30d": float(saving[r] * 30),
+                "days_to_break_even": float(cm.transfer_rate[after[r]] / saving[r]),
+            }
+            for block_id, r in zip(block_ids, top)
+        ],
+    }
+
+
+def run_job(job_id, job, jobs_dir, results_path):
+    """
+    Worker-process entry point of one optimization job.
+    - Reports progress through `<jobs_dir>/<job_id>.progress`.
+    - Stops with JobCancelled once `<jobs_dir>/<job_id>.cancel` exists.
+    - Writes `<jobs_dir>/<job_id>.json`, then publishes it as `results_path`.
+    """
+    progress_path = os.path.join(jobs_dir, f"{job_id}.progress")
+    cancel_path = os.path.join(jobs_dir, f"{job_id}.cancel")
+    last = 0.0
+
+    def report(done, total):
+        nonlocal last
+        if os.path.exists(cancel_path):
+            raise JobCancelled(job_id)
+        now = time.monotonic()
+        if now - last >= PROGRESS_INTERVAL or done == total:
+            write_json_atomic(progress_path, {"progress": done / total, "started": started})
+            last = now
+
+    started = time.time()
+    report(0, 1)
+    results = optimize(job, report)
+    results["job_id"] = job_id
+    write_json_atomic(os.path.join(jobs_dir, f"{job_id}.json"), results)
+    write_json_atomic(results_path, results)
+    return results_path
@@ -0,0 +1,149 @@
+import copy
+import os
+import sys
+import threading
+
+import numpy as np
+import yaml
+
+from optimizer import NOTEBOOKS_DIR, PRICE_SHEET
+
+# Written by `python engine.py --stats` (engine.save_stats)
+STATS_FILE = "strategy_stats.npz"
+PER_TAG_FEES = ("lease_fee", "exec_fee", "transfer_fee")
+FEES = PER_TAG_FEES + ("trigger_fee", "acq_cost")
+
+
+def merge_sheet(base, changes):
+    """`base` with `changes` applied; per-tag fees are replaced tag by tag."""
+    if not isinstance(changes or {}, dict):
+        raise ValueError("price_sheet must map fees to values")
+    sheet = copy.deepcopy(base)
+    for fee, value in (changes or {}).items():
+        if fee not in FEES:
+            raise ValueError(f"Unknown fee {fee!r}; choose from {list(FEES)}")
+        if fee in PER_TAG_FEES:
+            if not isinstance(value, dict):
+                raise ValueError(f"{fee} must map tags to fees")
+            sheet[fee] = {**sheet[fee], **value}
+        else:
+            sheet[fee] = value
+    return sheet
+
+
+def scale_sheet(sheet, factors):
+    """`sheet` with fees multiplied by `factors`, e.g. {"lease_fee": {"Atom": 0.8}} for Atom lease -20 %."""
+    if not isinstance(factors or {}, dict):
+        raise ValueError("scale must map fees to factors")
+    sheet = copy.deepcopy(sheet)
+    for fee, factor in (factors or {}).items():
+        if fee not in FEES:
+            raise ValueError(f"Unknown fee {fee!r}; choose from {list(FEES)}")
+        if fee in PER_TAG_FEES:
+            if not isinstance(factor, dict):
+                raise ValueError(f"{fee} factors must map tags to numbers")
+            for tag, f in factor.items():
+                if tag not in sheet[fee]:
+                    raise ValueError(f"Unknown tag {tag!r} in {fee}")
+                sheet[fee][tag] = _scaled(sheet[fee][tag], f)
+        else:
+            sheet[fee] = _scaled(sheet[fee], factor)
+    return sheet
+
+
+def _scaled(spec, factor):
+    """Fee `spec` (number or time-of-use schedule) times `factor`; weekday factors are kept."""
+    if isinstance(factor, bool) or not isinstance(factor, (int, float)):
+        raise ValueError(f"Scale factors must be numbers, got {factor!r}")
+    if not isinstance(spec, dict):
+        return float(spec) * factor
+    out = dict(spec, base=float(spec["base"]) * factor)
+    if spec.get("from_day"):
+        out["from_day"] = {day: float(fee) * factor for day, fee in spec["from_day"].items()}
+    return out
+
+
+class WhatIfPricer:
+    """
+    Reprices the saved per-strategy aggregates under modified price sheets.
+
+    - For fixed tags a strategy's cost is linear in the fees: active blocks,
+      jobs and retags per tag and day times lease, exec + trigger and transfer,
+      plus blocks leased times acquisition. `engine.save_stats` keeps those
+      aggregates, so a sheet is priced by one small tensor contraction
+      (`cost_model.PriceTensor`) instead of a rerun of the simulation.
+    - The file and the base sheet are reloaded when they change; totals under
+      the base sheet are computed once per version and reported next to every answer.
+    - Time-of-use schedules are priced per day, exactly as by the engine.
+    """
+
+    def __init__(self, stats_path, base_sheet=PRICE_SHEET):
+        self.stats_path = stats_path
+        self.base_sheet = base_sheet
+        self._loaded = None  # (signature, strategies, arrays, base sheet, base totals)
+        self._lock = threading.Lock()
+
+    def exists(self):
+        return os.path.exists(self.stats_path)
+
+    def price(self, changes=None, factors=None):
+        """Total cost of every strategy under the base sheet with `changes` and `factors` applied."""
+        CostModel = _cost_model()
+        strategies, arrays, base, base_totals = self._load()
+        try:
+            sheet = scale_sheet(merge_sheet(base, changes), factors)
+        except KeyError as e:
+            raise ValueError(f"Invalid price sheet: missing {e}")
+        except (TypeError, AttributeError) as e:
+            raise ValueError(f"Invalid price sheet: {e}")
+        try:
+            totals = self._totals(CostModel(sheet, "what-if"), arrays)
+        except KeyError as e:
+            raise ValueError(f"Invalid price sheet: missing {e}")
+        except (TypeError, AttributeError) as e:
+            raise ValueError(f"Invalid price sheet: {e}")
+        n_days = len(arrays[3])
+        result = {}
+        for s, total, before in zip(strategies, totals, base_totals):
+            result[s] = {
+                "total_cost": total,
+                "base_total_cost": before,
+                "difference": total - before,
+                "percentage_change": (total - before) / before * 100 if before else 0.0,
+                "avg_daily_cost": total / n_days,
+            }
+        return {
+            "n_days": n_days,
+            "price_sheet": sheet,
+            "strategies": result,
+            "cheapest": min(result, key=lambda s: result[s]["total_cost"]),
+        }
+
+    def _load(self):
+        signature = [(st.st_mtime_ns, st.st_size) for st in map(os.stat, (self.stats_path, self.base_sheet))]
+        with self._lock:
+            if self._loaded is not None and self._loaded[0] == signature:
+                return self._loaded[1:]
+        CostModel = _cost_model()
+        with np.load(self.stats_path) as f:
+            strategies = tuple(f["strategies"].tolist())
+            arrays = (f["active"], f["jobs"], f["retags"], f["acquired"])
+        with open(self.base_sheet) as f:
+            base = yaml.safe_load(f)
+        loaded = (signature, strategies, arrays, base, self._totals(CostModel(base), arrays))
+        with self._lock:
+            self._loaded = loaded
+        return loaded[1:]
+
+    @staticmethod
+    def _totals(cm, arrays):
+        active, jobs, retags, acquired = arrays
+        return [float(t) for t in cm.prices(len(acquired)).cost(active, jobs, retags, acquired)[0].sum(axis=1)]
+
+
+def _cost_model():
+    # The price sheet logic lives with the notebooks (numpy + yaml only)
+    if NOTEBOOKS_DIR not in sys.path:
+        sys.path.insert(0, NOTEBOOKS_DIR)
+    from cost_model import CostModel
+    return CostModel
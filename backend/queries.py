@@ -0,0 +1,195 @@
+import argparse
+import os
+import threading
+import uuid
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pv
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+BLOCKS = "qpu_blocks"
+ROLLUP = "qpu_blocks_rollup.parquet"
+# Rows per row group of converted block tables; sorted by date, so each
+# group covers a narrow date range and date filters skip most of them
+ROW_GROUP_SIZE = 64 * 1024
+KEYS = ["lease_date", "category"]
+METRIC = "workloads_executed"
+# ISO date strings compare correctly and match the CSV/pandas representation
+CSV_OPTIONS = pv.ConvertOptions(column_types={"lease_date": pa.string()})
+
+
+def _filter(start_date=None, end_date=None, category=None):
+    """Dataset expression for the optional date range and category (None or "all" = any)."""
+    terms = []
+    if start_date:
+        terms.append(ds.field("lease_date") >= start_date)
+    if end_date:
+        terms.append(ds.field("lease_date") <= end_date)
+    if category and category.lower() != "all":
+        terms.append(ds.field("category") == category)
+    expr = None
+    for term in terms:
+        expr = term if expr is None else expr & term
+    return expr
+
+
+def _aggregate(table):
+    """Per-(lease_date, category) block count, workload count and workload sum of `table`."""
+    table = table.filter(pc.and_(pc.is_valid(table["lease_date"]), pc.is_valid(table["category"])))
+    out = table.group_by(KEYS).aggregate([([], "count_all"), (METRIC, "count"), (METRIC, "sum")])
+    return out.select(KEYS + ["count_all", f"{METRIC}_count", f"{METRIC}_sum"]).rename_columns(
+        KEYS + ["n_blocks", "n_reported", "workloads_sum"])
+
+
+def _combine(parts):
+    """Merge partial rollups by summing their counters."""
+    table = pa.concat_tables(parts)
+    out = table.group_by(KEYS).aggregate([("n_blocks", "sum"), ("n_reported", "sum"), ("workloads_sum", "sum")])
+    out = out.rename_columns(KEYS + ["n_blocks", "n_reported", "workloads_sum"])
+    return out.sort_by([(key, "ascending") for key in KEYS])
+
+
+class BlockQueries:
+    """
+    Query layer over the QPU block table in `data_dir`.
+
+    - The table is `qpu_blocks.parquet` (a file or a directory of part files) and
+      falls back to `qpu_blocks.csv`; date and category filters are pushed down
+      to Parquet row groups through pyarrow.dataset.
+    - `qpu_blocks_rollup.parquet` holds per-(lease_date, category) counters. It is
+      rebuilt when the block table changes and updated in place by `append`,
+      so utilization queries read kilobytes instead of the block table.
+    """
+
+    def __init__(self, data_dir):
+        self.data_dir = data_dir
+        self._rollup = None  # (source version, table)
+        self._lock = threading.Lock()
+
+    def source(self):
+        """Path of the block table, preferring Parquet; None if missing."""
+        for name in (f"{BLOCKS}.parquet", f"{BLOCKS}.csv"):
+            path = os.path.join(self.data_dir, name)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def version(self):
+        """Changes whenever a file of the block table is written, added or removed."""
+        path = self.source()
+        if path is None:
+            return None
+        files = [path] if os.path.isfile(path) else sorted(
+            os.path.join(root, f) for root, _, names in os.walk(path) for f in names if not f.startswith("."))
+        stats = [os.stat(f) for f in files]
+        return f"{os.path.basename(path)}:{len(stats)}:" \
+               f"{max((s.st_mtime_ns for s in stats), default=0)}:{sum(s.st_size for s in stats)}"
+
+    def dataset(self):
+        path = self.source()
+        if path is None:
+            raise FileNotFoundError(os.path.join(self.data_dir, f"{BLOCKS}.csv"))
+        if path.endswith(".csv"):
+            return ds.dataset(path, format=ds.CsvFileFormat(convert_options=CSV_OPTIONS))
+        return ds.dataset(path, format="parquet")
+
+    def blocks(self, start_date=None, end_date=None, category=None, columns=None):
+        """Blocks leased in [start_date, end_date] of `category`, reading only matching row groups."""
+        return self.dataset().to_table(columns=columns, filter=_filter(start_date, end_date, category))
+
+    def rollup(self):
+        """The per-(lease_date, category) counters, rebuilt if the block table changed."""
+        version = self.version()
+        with self._lock:
+            if self._rollup is not None and self._rollup[0] == version:
+                return self._rollup[1]
+            path = os.path.join(self.data_dir, ROLLUP)
+            table = None
+            if os.path.exists(path):
+                table = pq.read_table(path)
+                if (table.schema.metadata or {}).get(b"source_version", b"").decode() != version:
+                    table = None
+            if table is None:
+                table = self._build()
+                self._write_rollup(table, version)
+            self._rollup = (version, table)
+            return table
+
+    def utilization(self, start_date=None, end_date=None, category=None):
+        """Average workloads per block by lease date and category (pandas frame, sorted)."""
+        table = self.rollup()
+        expr = _filter(start_date, end_date, category)
+        if expr is not None:
+            table = ds.dataset(table).to_table(filter=expr)
+        table = table.filter(pc.greater(table["n_reported"], 0))
+        mean = pc.divide(pc.cast(table["workloads_sum"], pa.float64()), pc.cast(table["n_reported"], pa.float64()))
+        return pa.table({"lease_date": table["lease_date"], "category": table["category"],
+                         METRIC: mean}).to_pandas()
+
+    def append(self, new_blocks):
+        """
+        Add a batch of blocks as a new part file and fold it into the rollup.
+        Requires the directory layout (`qpu_blocks.parquet/`); see `convert`.
+        """
+        path = self.source()
+        if path is None or not os.path.isdir(path):
+            raise ValueError(f"append needs {BLOCKS}.parquet as a directory of part files; run convert first")
+        rollup = self.rollup()
+        new_blocks = new_blocks.sort_by("lease_date")
+        part = os.path.join(path, f"part-{uuid.uuid4().hex}.parquet")
+        _write_atomic(new_blocks, part)
+        with self._lock:
+            table = _combine([rollup, _aggregate(new_blocks)])
+            version = self.version()
+            self._write_rollup(table, version)
+            self._rollup = (version, table)
+        return part
+
+    def clear(self):
+        with self._lock:
+            self._rollup = None
+
+    def _build(self):
+        scanner = self.dataset().scanner(columns=KEYS + [METRIC])
+        parts = [_aggregate(pa.Table.from_batches([batch])) for batch in scanner.to_batches() if batch.num_rows]
+        if not parts:
+            return _combine([_aggregate(scanner.to_table())])
+        return _combine(parts)
+
+    def _write_rollup(self, table, version):
+        metadata = dict(table.schema.metadata or {})
+        metadata[b"source_version"] = str(version).encode()
+        _write_atomic(table.replace_schema_metadata(metadata), os.path.join(self.data_dir, ROLLUP))
+
+
+def _write_atomic(table, path, **kwargs):
+    # Hidden temporary name: dataset discovery skips files starting with "."
+    tmp = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.{os.getpid()}.tmp")
+    pq.write_table(table, tmp, **kwargs)
+    os.replace(tmp, path)
+
+
+def convert(data_dir, row_group_size=ROW_GROUP_SIZE):
+    """
+    Write qpu_blocks.csv as qpu_blocks.parquet/part-0.parquet, sorted by lease date
+    so row-group statistics let date filters skip most of the file.
+    """
+    table = pv.read_csv(os.path.join(data_dir, f"{BLOCKS}.csv"), convert_options=CSV_OPTIONS)
+    table = table.sort_by([(key, "ascending") for key in KEYS])
+    out = os.path.join(data_dir, f"{BLOCKS}.parquet")
+    os.makedirs(out, exist_ok=True)
+    _write_atomic(table, os.path.join(out, "part-0.parquet"), row_group_size=row_group_size)
+    return out
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Maintain the Parquet block table and its utilization rollup")
+    parser.add_argument("command", choices=["convert", "rollup"])
+    parser.add_argument("--data", default="data")
+    args = parser.parse_args()
+    if args.command == "convert":
+        print("wrote", convert(args.data))
+    queries = BlockQueries(args.data)
+    print("rollup rows:", queries.rollup().num_rows)
@@ -0,0 +1,72 @@
+import hashlib
+import io
+import json
+import threading
+from collections import OrderedDict
+
+
+def subplots(**kwargs):
+    """Matplotlib figure and axes; matplotlib is imported by the first chart, not at startup."""
+    import matplotlib
+    matplotlib.use('Agg')  # Non-interactive, thread-safe backend; no GUI needed
+    import matplotlib.pyplot as plt
+    return plt.subplots(**kwargs)
+
+
+def figure_png(fig):
+    """Render a Matplotlib figure to PNG bytes and close it."""
+    import matplotlib.pyplot as plt
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png')
+    plt.close(fig)  # Make sure to close the figure
+    return buf.getvalue()
+
+
+class RenderCache:
+    """
+    Content-addressed cache of rendered chart PNGs.
+
+    The key hashes the endpoint, its query parameters and the versions of the
+    data files it reads, so it doubles as a strong ETag: a client holding it
+    can be answered with 304 without rendering or even loading the data.
+    Entries are evicted least recently used once `max_bytes` is exceeded.
+    """
+
+    def __init__(self, max_bytes=64 * 2**20):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> png bytes
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(endpoint, params, data_versions):
+        """Stable hash of endpoint + sorted (multi-valued) params + data versions."""
+        payload = json.dumps([endpoint, sorted(params), list(data_versions)], default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+
+    def get_or_render(self, key, render):
+        """PNG bytes for `key`, calling `render()` only on a miss."""
+        with self._lock:
+            png = self._entries.get(key)
+            if png is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return png
+            self.misses += 1
+
+        png = render()
+        with self._lock:
+            if key not in self._entries and len(png) <= self.max_bytes:
+                self._entries[key] = png
+                self._bytes += len(png)
+                while self._bytes > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._bytes -= len(evicted)
+        return png
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
@@ -0,0 +1,94 @@
+"""Timing harness, environment capture and cached synthetic datasets shared by the suites."""
+import os, pathlib, platform, statistics, subprocess, sys, time
+from dataclasses import dataclass, field, asdict
+
+ROOT      = pathlib.Path(__file__).resolve().parents[1]
+NOTEBOOKS = ROOT/"notebooks"
+BACKEND   = ROOT/"backend"
+CONFIG    = ROOT/"provider_configs"/"qpu_demo.yml"
+POLICY    = NOTEBOOKS/"models"/"qpu_dqn.npz"
+CACHE_DIR = pathlib.Path(os.environ.get("BENCH_DATA", ROOT/"benchmarks"/".data"))
+
+for p in (NOTEBOOKS, BACKEND):
+    if str(p) not in sys.path:
+        sys.path.insert(0, str(p))
+
+
+@dataclass(frozen=True)
+class Scale:
+    """A synthetic dataset size; `scale` multiplies notebook 01's block and workload counts."""
+    name : str
+    days : int
+    scale: float
+    seed : int = 42
+
+
+SCALES = {s.name: s for s in (
+    Scale("tiny",   30, 0.02),
+    Scale("small", 180, 0.02),
+    Scale("medium", 180, 0.1),
+    Scale("full",  180, 1.0),      # the notebooks' dataset: ~1M blocks, needs ~1 GB for the job matrix
+)}
+
+
+@dataclass
+class Result:
+    suite  : str
+    name   : str
+    scale  : str
+    times  : list[float]
+    params : dict = field(default_factory=dict)
+
+    def to_dict(self) -> dict:
+        t = sorted(self.times)
+        out = asdict(self)
+        out.update(n=len(t), min=t[0], median=statistics.median(t), mean=statistics.fmean(t),
+                   stdev=statistics.stdev(t) if len(t) > 1 else 0.0)
+        return out
+
+
+def measure(fn, repeat: int = 5, warmup: int = 1, min_time: float = 0.0) -> list[float]:
+    """Wall-clock seconds of `repeat` calls of `fn` after `warmup` untimed ones.
+
+    Calls faster than `min_time` are looped and averaged so timer resolution
+    does not dominate microsecond-scale cases.
+    """
+    for _ in range(warmup):
+        fn()
+    loops = 1
+    if min_time:
+        t0 = time.perf_counter(); fn(); dt = time.perf_counter() - t0
+        loops = max(1, int(min_time/max(dt, 1e-9)))
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        times.append((time.perf_counter() - t0)/loops)
+    return times
+
+
+def environment() -> dict:
+    import numpy, pandas, pyarrow
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty  = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+                                     capture_output=True, text=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        commit, dirty = None, None
+    return {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "commit": commit, "dirty": dirty,
+            "python": platform.python_version(), "platform": platform.platform(),
+            "cpu_count": os.cpu_count(), "numpy": numpy.__version__,
+            "pandas": pandas.__version__, "pyarrow": pyarrow.__version__}
+
+
+def dataset(scale: Scale) -> pathlib.Path:
+    """blocks.parquet + workloads_daily.parquet for `scale`, generated once and reused."""
+    from generator import GeneratorConfig, generate
+    out = CACHE_DIR/f"{scale.name}-d{scale.days}-x{scale.scale:g}-s{scale.seed}"
+    if not (out/"workloads_daily.parquet").exists():
+        tmp = out.with_name(out.name + ".tmp")
+        generate(tmp, GeneratorConfig(days=scale.days, scale=scale.scale, seed=scale.seed))
+        tmp.rename(out)
+    return out
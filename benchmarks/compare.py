@@ -0,0 +1,41 @@
+"""Compare two benchmark JSON files case by case (median times).
+
+    python benchmarks/compare.py base.json new.json --threshold 1.10
+
+Exits with status 1 when any case is slower than `threshold` × its baseline.
+"""
+import argparse, json, sys
+
+
+def load(path: str) -> dict:
+    with open(path) as f:
+        return {(r["suite"], r["name"], r["scale"]): r for r in json.load(f)["results"]}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Compare two benchmark result files")
+    ap.add_argument("base")
+    ap.add_argument("new")
+    ap.add_argument("--threshold", type=float, default=1.10, help="slowdown ratio flagged as a regression")
+    args = ap.parse_args(argv)
+
+    base, new = load(args.base), load(args.new)
+    regressions = 0
+    print(f"{'case':<48} {'base ms':>11} {'new ms':>11} {'ratio':>7}")
+    for key in sorted(base.keys() & new.keys()):
+        b, n = base[key]["median"], new[key]["median"]
+        ratio = n/b if b else float("inf")
+        flag  = ""
+        if ratio > args.threshold:
+            flag, regressions = "  ← slower", regressions + 1
+        elif ratio < 1/args.threshold:
+            flag = "  faster"
+        print(f"{'/'.join(key):<48} {b*1e3:11.3f} {n*1e3:11.3f} {ratio:7.2f}{flag}")
+    for key in sorted(base.keys() ^ new.keys()):
+        print(f"{'/'.join(key):<48} only in {'base' if key in base else 'new'}")
+    print(f"{regressions} regression(s) above {args.threshold:.2f}×")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""Reproducible benchmarks for the cost model, strategies, load paths and API.
+
+Synthetic datasets come from ``notebooks/generator.py`` (fixed seeds) and are
+cached under ``benchmarks/.data``. Results are written as JSON together with
+the commit and library versions, so two runs can be compared with
+``compare.py``.
+
+    python benchmarks/run.py                                  # tiny + small, all suites
+    python benchmarks/run.py --scales small medium --suites strategies load
+    python benchmarks/run.py --out benchmarks/results/base.json
+    python benchmarks/compare.py base.json new.json
+"""
+import argparse, json, pathlib, sys, time
+from common import ROOT, SCALES, environment
+from suites import SUITES
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Run the QPU benchmark suites and write JSON results")
+    ap.add_argument("--scales", nargs="+", default=["tiny", "small"], choices=list(SCALES))
+    ap.add_argument("--suites", nargs="+", default=list(SUITES), choices=list(SUITES))
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--out",    help="default: benchmarks/results/<timestamp>.json")
+    args = ap.parse_args(argv)
+
+    out = pathlib.Path(args.out or ROOT/"benchmarks"/"results"/f"{time.strftime('%Y%m%d-%H%M%S')}.json")
+    report = {"environment": environment(), "scales": {s: vars(SCALES[s]) for s in args.scales},
+              "results": []}
+    for scale in args.scales:
+        for suite in args.suites:
+            t0 = time.time()
+            results = SUITES[suite](SCALES[scale], args.repeat)
+            report["results"] += [r.to_dict() for r in results]
+            print(f"── {suite} @ {scale} ({time.time() - t0:.1f}s)", file=sys.stderr)
+            for r in results:
+                d = r.to_dict()
+                print(f"   {r.name:<28} median {d['median']*1e3:10.3f} ms   min {d['min']*1e3:10.3f} ms",
+                      file=sys.stderr)
+
+    out.parent.mkdir(exist_ok=True, parents=True)
+    out.write_text(json.dumps(report, indent=1))
+    print("✔ results →", out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""Benchmark suites. Each takes a `Scale` and a repeat count and returns a list of `Result`."""
+import json, os, pathlib, shutil, tempfile
+import numpy as np, pandas as pd
+from common import CONFIG, POLICY, Result, Scale, dataset, measure
+
+
+# ---------- cost model ----------
+def cost_model(scale: Scale, repeat: int) -> list[Result]:
+    """Per-call and batch fee helpers plus pricing of precomputed daily aggregates."""
+    import engine
+    from cost_model import CostModel, PriceTensor, TAGS
+    cm  = CostModel(CONFIG)
+    wl  = engine.load_workloads(dataset(scale), scale.days)
+    rng = np.random.default_rng(0)
+    codes = rng.integers(0, len(TAGS), wl.n_blocks).astype(np.int8)
+    jobs  = wl.total_jobs()
+    names = [TAGS[c] for c in codes[:10_000]]
+    stats = engine.run_strategies(wl)
+    quotes = PriceTensor.compile([CostModel(cm.sheet, f"quote_{k}") for k in range(12)], scale.days)
+
+    def scalar_loop():
+        return sum(cm.lease(t) + cm.exec(t, 100) + cm.trigger(100) for t in names)
+
+    cases = {
+        "scalar_lease_exec_10k": scalar_loop,
+        "lease_batch":           lambda: cm.lease_batch(codes, total=True),
+        "exec_trigger_batch":    lambda: cm.exec_trigger_batch(codes, jobs, total=True),
+        "transfer_batch":        lambda: cm.transfer_batch(codes, total=True),
+        "tag_codes_10k":         lambda: cm.tag_codes(names),
+        "price_daily_stats":     lambda: engine.price(stats, cm),
+        "price_12_providers":    lambda: quotes.price(stats),
+    }
+    return [Result("cost_model", name, scale.name, measure(fn, repeat, min_time=0.05),
+                   {"n_blocks": wl.n_blocks})
+            for name, fn in cases.items()]
+
+
+# ---------- strategies ----------
+def strategies(scale: Scale, repeat: int) -> list[Result]:
+    """One engine pass per strategy, all four together, the DQN scorer, the offline-optimal DP and the forecaster fit."""
+    import engine, forecast, optimal
+    from cost_model import CostModel
+    from policy_export import NumpyQPolicy
+    wl   = engine.load_workloads(dataset(scale), scale.days)
+    runs = {f"strategy_{s}": {"strategies": (s,)} for s in engine.STRATEGIES}
+    runs["strategies_ABSD"] = {}
+    runs["strategies_ABSD_2_shards"] = {"shards": 2}
+    if POLICY.exists():
+        runs["strategy_DQN"] = {"strategies": (engine.POLICY,), "policy": NumpyQPolicy.load(POLICY)}
+    out = [Result("strategies", name, scale.name, measure(lambda: engine.run_strategies(wl, **kw),
+                                                           repeat, warmup=0),
+                  {"n_blocks": wl.n_blocks, "n_days": wl.n_days})
+           for name, kw in runs.items()]
+
+    cm = CostModel(CONFIG)
+    out.append(Result("strategies", "optimal_dp", scale.name,
+                      measure(lambda: optimal.solve(wl, cm), repeat, warmup=0),
+                      {"n_blocks": wl.n_blocks, "n_days": wl.n_days}))
+    out.append(Result("strategies", "forecast_fit", scale.name,
+                      measure(lambda: forecast.Forecaster().fit(wl), repeat, warmup=0),
+                      {"n_blocks": wl.n_blocks, "n_days": wl.n_days}))
+
+    if POLICY.exists():
+        policy = NumpyQPolicy.load(POLICY)
+        obs = np.random.default_rng(0).random((wl.n_blocks, 4), dtype=np.float32)
+        out.append(Result("strategies", "dqn_predict", scale.name,
+                          measure(lambda: policy.predict(obs), repeat), {"batch": len(obs)}))
+    return out
+
+
+# ---------- load paths ----------
+def load(scale: Scale, repeat: int) -> list[Result]:
+    """Parquet → dense matrix, sparse store build/open, memory-mapped reloads and day streaming."""
+    import engine, pyarrow.dataset as ds, pyarrow.parquet as pq
+    from workload_store import WorkloadStore, write_store
+    data = dataset(scale)
+    tmp  = pathlib.Path(tempfile.mkdtemp(prefix="qpu-bench-"))
+    try:
+        wl = engine.load_workloads(data, scale.days)
+        engine.save_workloads(wl, tmp/"dense")
+        write_store(tmp/"store", data, scale.days)
+        mid = scale.days//2
+
+        def open_dense_day():
+            w = engine.open_workloads(tmp/"dense")
+            return w.day(mid)
+
+        def open_store_day():
+            return WorkloadStore.open(tmp/"store").day(mid)
+
+        def filter_each_day():                          # the notebooks' former day loop
+            wl_ds = ds.dataset(data/"workloads_daily.parquet")
+            for d in range(scale.days):
+                wl_ds.filter(ds.field("day") == d).to_table()
+
+        def iter_days():
+            for _ in engine.DayReader(data).iter_days(scale.days):
+                pass
+
+        cases = {
+            "read_workloads_parquet": lambda: pq.read_table(data/"workloads_daily.parquet"),
+            "load_workloads":         lambda: engine.load_workloads(data, scale.days),
+            "write_store":            lambda: write_store(tmp/"store2", data, scale.days),
+            "open_dense_memmap_day":  open_dense_day,
+            "open_store_day":         open_store_day,
+            "filter_each_day":        filter_each_day,
+            "iter_days":              iter_days,
+        }
+        return [Result("load", name, scale.name, measure(fn, repeat, min_time=0.05 if "open" in name else 0),
+                       {"n_blocks": wl.n_blocks, "n_days": wl.n_days})
+                for name, fn in cases.items()]
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+# ---------- API ----------
+def _backend_data(out: pathlib.Path, scale: Scale):
+    """Synthetic files in the layout backend/api.py reads, sized from `scale`."""
+    rng   = np.random.default_rng(scale.seed)
+    days  = pd.date_range("2025-01-01", periods=scale.days).strftime("%Y-%m-%d")
+    n     = max(1_000, int(5_500*scale.scale*scale.days))
+    pd.DataFrame({
+        "date": days, "total_cost": rng.random(scale.days)*1e6,
+        "new_blocks_leased": rng.integers(1_000, 10_000, scale.days),
+        "workloads_executed": rng.integers(1_000_000, 50_000_000, scale.days),
+        "blocks_by_category": [str({"Atom": int(a), "Photon": 200, "Spin": 300})
+                               for a in rng.integers(0, 100, scale.days)],
+    }).to_csv(out/"daily_stats.csv", index=False)
+    pd.DataFrame({
+        "block_id": [f"B{i}" for i in range(n)], "lease_date": rng.choice(days, n),
+        "category": rng.choice(["Atom", "Photon", "Spin"], n),
+        "workloads_executed": rng.integers(0, 5_000, n),
+    }).to_csv(out/"qpu_blocks.csv", index=False)
+    future = pd.DataFrame({"date": pd.date_range("2025-07-01", periods=365).strftime("%Y-%m-%d")})
+    for m in ("total_cost", "total_workloads", "active_blocks"):
+        v = rng.random(365)*1e6
+        future[m], future[f"{m}_lower_ci"], future[f"{m}_upper_ci"] = v, v*0.9, v*1.1
+    future.to_csv(out/"future_predictions.csv", index=False)
+    future.assign(optimization_strategy="D", estimated_savings=rng.random(365)*1e5) \
+          .to_csv(out/"optimized_predictions.csv", index=False)
+    (out/"optimization_summary.json").write_text(json.dumps(
+        {"average_savings_percentage": 23.5, "recommendation": "Retag idle blocks to Spin"}))
+    (out/"optimization_results.json").write_text(json.dumps({"strategy": "D"}))
+    shape = (4, scale.days, 3)                                 # strategies × days × tags
+    np.savez(out/"strategy_stats.npz", strategies=np.array(["A", "B", "S", "D"]),
+             acquired=rng.integers(100, 1_000, scale.days), active=rng.integers(0, 10**5, shape),
+             jobs=rng.integers(0, 10**7, shape), retags=rng.integers(0, 100, shape))
+
+
+API_CASES = {
+    "health":               ("GET", "/api/health"),
+    "summary":              ("GET", "/api/summary"),
+    "chart_daily_costs":    ("GET", "/api/chart/daily-costs?start_date=2025-02-01"),
+    "chart_block_util":     ("GET", "/api/chart/block-utilization?block_type=Atom"),
+    "chart_predictions":    ("GET", "/api/chart/predictions?days=60"),
+    "predictions_records":  ("GET", "/api/predictions?days=365"),
+    "predictions_columnar": ("GET", "/api/predictions?days=365&format=columnar"),
+    "predictions_arrow":    ("GET", "/api/predictions?days=365&format=arrow"),
+    "predictions_metric":   ("GET", "/api/predictions?days=365&metric=total_cost"),
+    "optimized_predictions": ("GET", "/api/optimized_predictions?days=365"),
+    "optimization_status":  ("GET", "/api/optimization/status"),
+    "optimization_results": ("GET", "/api/optimization/results"),
+    "chat_local":           ("POST", "/api/chat"),
+    "pricing_whatif":       ("POST", "/api/pricing/whatif", {"scale": {"lease_fee": {"Atom": 0.8}}}),
+}
+
+
+def api(scale: Scale, repeat: int) -> list[Result]:
+    """Every endpoint through the Flask test client, warm (cached) and, for charts, cold."""
+    tmp = pathlib.Path(tempfile.mkdtemp(prefix="qpu-bench-api-"))
+    cwd = os.getcwd()
+    os.environ["ASSISTANT_BACKEND"] = "local"                # never call the OpenAI service
+    try:
+        (tmp/"data").mkdir()
+        _backend_data(tmp/"data", scale)
+        os.chdir(tmp)                                  # api.DATA_DIR is relative
+        import api as backend
+        app = backend.create_app()
+        svc = backend.services(app)
+        svc.assistant.first_token_delay = svc.assistant.token_delay = 0
+        clear = (svc.render_cache.clear, svc.cache.clear, svc.block_queries.clear)
+        for fn in clear:
+            fn()
+        client = app.test_client()
+
+        def call(method, url, body=None):
+            def fn():
+                if method == "POST":
+                    r = client.post(url, json=body or {"message": "benchmark"})
+                else:
+                    r = client.get(url)
+                if r.status_code != 200:
+                    raise RuntimeError(f"{method} {url} → {r.status_code}: {r.get_data()[:200]!r}")
+            return fn
+
+        out = []
+        for name, (method, url, *body) in API_CASES.items():
+            out.append(Result("api", name, scale.name, measure(call(method, url, *body), repeat, min_time=0.05),
+                              {"url": url}))
+            if name.startswith("chart_"):
+                def cold(fn=call(method, url)):
+                    for c in clear:
+                        c()
+                    fn()
+                out.append(Result("api", f"{name}_cold", scale.name, measure(cold, repeat), {"url": url}))
+        return out
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+SUITES = {"cost_model": cost_model, "strategies": strategies, "load": load, "api": api}
@@ -279,7 +279,7 @@ function Optimization() {
         parameters
       });
       setStatus(response.data);
-      checkStatus();
+      checkStatus(response.data.job_id);
     } catch (err) {
       console.error("Optimization error:", err);
       setStatus({ message: "Error starting optimization", status: "error" });
@@ -287,15 +287,17 @@ function Optimization() {
     }
   };
 
-  const checkStatus = async () => {
+  const checkStatus = async (jobId) => {
     try {
-      const response = await axios.get(`${API_BASE_URL}/api/optimization/status`);
+      const response = await axios.get(`${API_BASE_URL}/api/optimization/status`, {
+        params: jobId ? { job_id: jobId } : {}
+      });
       setStatus(response.data);
       
       if (response.data.status === "completed") {
-        fetchResults();
-      } else if (response.data.status === "processing") {
-        setTimeout(checkStatus, 2000); // Poll every 2 seconds
+        fetchResults(jobId);
+      } else if (["queued", "running", "processing"].includes(response.data.status)) {
+        setTimeout(() => checkStatus(jobId), 2000); // Poll every 2 seconds
       } else {
         setLoading(false);
       }
@@ -306,9 +308,11 @@ function Optimization() {
     }
   };
 
-  const fetchResults = async () => {
+  const fetchResults = async (jobId) => {
     try {
-      const response = await axios.get(`${API_BASE_URL}/api/optimization/results`);
+      const response = await axios.get(`${API_BASE_URL}/api/optimization/results`, {
+        params: jobId ? { job_id: jobId } : {}
+      });
       setResults(response.data);
       setLoading(false);
     } catch (err) {
@@ -381,7 +385,10 @@ function Optimization() {
                 </div>
                 <div className="ml-3">
                   <h3 className="text-sm font-medium">
-                    {status.status === 'processing' ? 'Optimization in progress...' : status.message}
+                    {status.status === 'running' ? `Optimization in progress... ${Math.round(status.progress * 100)}%`
+                      : status.status === 'queued' ? 'Optimization queued...'
+                      : status.status === 'failed' ? `Optimization failed: ${status.error}`
+                      : status.message || `Optimization ${status.status}`}
                   </h3>
                 </div>
               </div>
@@ -533,21 +540,38 @@ function ChatAssistant() {
     setLoading(true);
 
     try {
-      // Updated to match the API endpoint's expected format
-      const response = await axios.post(`${API_BASE_URL}/api/chat`, { 
-        message: query,
-        thread_id: threadId
+      // Stream the answer (server-sent events) into a placeholder message
+      const response = await fetch(`${API_BASE_URL}/api/chat/stream`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ message: query, thread_id: threadId })
       });
-      
-      // Add assistant response
-      setMessages(prev => [...prev, {
-        role: 'assistant',
-        content: response.data.response
-      }]);
+      if (!response.ok) throw new Error(`HTTP ${response.status}`);
 
-      // Store the thread_id for continued conversation
-      if (response.data.thread_id) {
-        setThreadId(response.data.thread_id);
+      setMessages(prev => [...prev, { role: 'assistant', content: '' }]);
+      setLoading(false);
+      const appendText = (text) => setMessages(prev => {
+        const last = prev[prev.length - 1];
+        return [...prev.slice(0, -1), { ...last, content: last.content + text }];
+      });
+
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      for (;;) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const events = buffer.split('\n\n');
+        buffer = events.pop();
+        for (const raw of events) {
+          const event = raw.match(/^event: (.*)$/m)?.[1];
+          const data = JSON.parse(raw.match(/^data: (.*)$/m)?.[1] || '{}');
+          // Store the thread_id for continued conversation
+          if (event === 'thread') setThreadId(data.thread_id);
+          else if (event === 'delta') appendText(data.text);
+          else if (event === 'error') throw new Error(data.error);
+        }
       }
     } catch (err) {
       console.error("Chat error:", err);
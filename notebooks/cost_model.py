@@ -1,18 +1,93 @@
+"""Price sheets: fee helpers for one sheet and a [provider × day × tag] fee tensor for many.
 
+A sheet is a YAML mapping with ``lease_fee`` (per hour), ``exec_fee`` and
+``transfer_fee`` per tag plus ``trigger_fee`` and ``acq_cost``. Any fee may
+be a number or a time-of-use schedule over simulation days::
+
+    lease_fee:
+      Atom: {base: 3.0, from_day: {90: 2.6}, weekday: [1, 1, 1, 1, 1, 0.8, 0.8]}
+
+``from_day`` switches the price from that day on and ``weekday`` multiplies
+it by a factor for day % 7. A file may also hold several sheets under
+``providers:``; top-level fees are shared defaults for every provider.
+"""
 import yaml, pathlib
+import numpy as np
+from dataclasses import dataclass
 from typing import Dict
 
+# integer tag codes used by the batch helpers (and by the RL env: 0 Atom, 1 Photon, 2 Spin)
+TAGS    = ("Atom", "Photon", "Spin")
+TAG_IDX = {t: i for i, t in enumerate(TAGS)}
+SCHEDULE_KEYS = {"base", "from_day", "weekday"}
+
+
+def _base(spec) -> float:
+    return float(spec["base"] if isinstance(spec, dict) else spec)
+
+
+def _schedule(spec, days: np.ndarray) -> np.ndarray:
+    """Price of fee `spec` (number or schedule mapping) on each of `days`."""
+    if not isinstance(spec, dict):
+        return np.full(len(days), float(spec))
+    unknown = set(spec) - SCHEDULE_KEYS
+    if unknown or "base" not in spec:
+        raise ValueError(f"Fee schedule needs 'base' and only {sorted(SCHEDULE_KEYS)}; got {sorted(spec)}")
+    out = np.full(len(days), float(spec["base"]))
+    for start, fee in sorted((int(d), float(v)) for d, v in (spec.get("from_day") or {}).items()):
+        out[days >= start] = fee
+    if "weekday" in spec:
+        factors = np.asarray(spec["weekday"], dtype=np.float64)
+        if factors.shape != (7,):
+            raise ValueError(f"'weekday' needs 7 factors, got {len(factors)}")
+        out *= factors[days % 7]
+    return out
+
+
 class CostModel:
-    """Loads price sheet and exposes fee helpers."""
+    """Loads price sheet and exposes fee helpers.
 
-    def __init__(self, yaml_path: str | pathlib.Path):
-        with open(yaml_path, "r") as f:
-            cfg = yaml.safe_load(f)
-        self.lease_fee   : Dict[str, float] = cfg["lease_fee"]
-        self.exec_fee    : Dict[str, float] = cfg["exec_fee"]
-        self.trigger_fee : float            = cfg["trigger_fee"]
-        self.acq_cost    : float            = cfg["acq_cost"]
-        self.transfer_fee: Dict[str, float] = cfg["transfer_fee"]
+    The scalar and batch helpers use base prices; `prices` applies the
+    time-of-use schedules.
+    """
+
+    def __init__(self, yaml_path: str | pathlib.Path | dict, name: str | None = None):
+        if isinstance(yaml_path, dict):
+            cfg, default_name = yaml_path, "sheet"
+        else:
+            with open(yaml_path, "r") as f:
+                cfg = yaml.safe_load(f)
+            default_name = pathlib.Path(yaml_path).stem
+        self.name  = name or default_name
+        self.sheet = cfg
+        self.lease_fee   : Dict[str, float] = {t: _base(v) for t, v in cfg["lease_fee"].items()}
+        self.exec_fee    : Dict[str, float] = {t: _base(v) for t, v in cfg["exec_fee"].items()}
+        self.trigger_fee : float            = _base(cfg["trigger_fee"])
+        self.acq_cost    : float            = _base(cfg["acq_cost"])
+        self.transfer_fee: Dict[str, float] = {t: _base(v) for t, v in cfg["transfer_fee"].items()}
+        self._compile()
+
+    def _compile(self):
+        """Fee table indexed by tag code: rows lease/exec/transfer, one column per tag."""
+        self.fee_table = np.array([[self.lease_fee[t]    for t in TAGS],
+                                   [self.exec_fee[t]     for t in TAGS],
+                                   [self.transfer_fee[t] for t in TAGS]], dtype=np.float64)
+        self.lease_rate, self.exec_rate, self.transfer_rate = self.fee_table
+        self.exec_trigger_rate = self.exec_rate + self.trigger_fee
+        specs = [self.sheet["trigger_fee"], self.sheet["acq_cost"]] + [
+            self.sheet[fee][t] for fee in ("lease_fee", "exec_fee", "transfer_fee") for t in TAGS]
+        self.time_of_use = any(isinstance(spec, dict) for spec in specs)
+
+    def prices(self, days) -> "PriceTensor":
+        """One-provider `PriceTensor` of this sheet on `days` (an int n → days 0..n-1)."""
+        days = np.arange(days) if np.isscalar(days) else np.asarray(days, dtype=np.int64)
+        per_tag = lambda fee: np.stack([_schedule(self.sheet[fee][t], days) for t in TAGS], axis=1)
+        trigger = _schedule(self.sheet["trigger_fee"], days)
+        return PriceTensor((self.name,),
+                           lease        = (per_tag("lease_fee")*24)[None],
+                           exec_trigger = (per_tag("exec_fee") + trigger[:, None])[None],
+                           transfer     = per_tag("transfer_fee")[None],
+                           acq          = _schedule(self.sheet["acq_cost"], days)[None])
 
     # ---------- granular fee look-ups ----------
     def lease(self, block_type: str, hours: int = 24, n_blocks: int = 1) -> float:
@@ -29,3 +104,107 @@ class CostModel:
 
     def transfer(self, new_type: str, n_blocks: int) -> float:
         return self.transfer_fee[new_type] * n_blocks
+
+    # ---------- batch fee look-ups (tag codes, see TAGS) ----------
+    @staticmethod
+    def tag_codes(tags) -> np.ndarray:
+        """Map an iterable of tag names to int8 tag codes."""
+        return np.array([TAG_IDX[t] for t in tags], dtype=np.int8)
+
+    @staticmethod
+    def tag_counts(codes: np.ndarray, weights: np.ndarray | None = None) -> np.ndarray:
+        """Per-tag totals of `weights` (or of rows when None), length len(TAGS)."""
+        return np.bincount(codes, weights=weights, minlength=len(TAGS))
+
+    def lease_batch(self, codes: np.ndarray, hours: int = 24, total: bool = False):
+        """Lease fee of one block per row; summed when `total`."""
+        if total:
+            return float(self.tag_counts(codes) @ self.lease_rate) * hours
+        return self.lease_rate[codes] * hours
+
+    def exec_batch(self, codes: np.ndarray, n_jobs: np.ndarray, total: bool = False):
+        """Execution fee per row; summed when `total`."""
+        if total:
+            return float(self.tag_counts(codes, n_jobs) @ self.exec_rate)
+        return self.exec_rate[codes] * n_jobs
+
+    def trigger_batch(self, n_jobs: np.ndarray, total: bool = False):
+        """Trigger fee per row; summed when `total`."""
+        if total:
+            return float(np.sum(n_jobs, dtype=np.float64)) * self.trigger_fee
+        return np.asarray(n_jobs, dtype=np.float64) * self.trigger_fee
+
+    def exec_trigger_batch(self, codes: np.ndarray, n_jobs: np.ndarray, total: bool = False):
+        """Execution + trigger fee per row (one gather); summed when `total`."""
+        if total:
+            return float(self.tag_counts(codes, n_jobs) @ self.exec_trigger_rate)
+        return self.exec_trigger_rate[codes] * n_jobs
+
+    def transfer_batch(self, new_codes: np.ndarray, total: bool = False):
+        """Transfer fee for retagging one block per row to `new_codes`; summed when `total`."""
+        if total:
+            return float(self.tag_counts(new_codes) @ self.transfer_rate)
+        return self.transfer_rate[new_codes]
+
+
+# ---------- many providers ----------
+def load_sheets(*paths: str | pathlib.Path) -> list[CostModel]:
+    """Every price sheet in `paths`: a flat file is one sheet named after the file,
+    a ``providers:`` file gives one sheet per provider (top-level fees as defaults)."""
+    models = []
+    for path in paths:
+        with open(path, "r") as f:
+            cfg = yaml.safe_load(f)
+        if "providers" not in cfg:
+            models.append(CostModel(cfg, pathlib.Path(path).stem))
+            continue
+        shared = {k: v for k, v in cfg.items() if k != "providers"}
+        models += [CostModel({**shared, **sheet}, name) for name, sheet in cfg["providers"].items()]
+    names = [m.name for m in models]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Duplicate provider names in {names}")
+    return models
+
+
+@dataclass
+class PriceTensor:
+    """Fees of several providers by day and tag, axes [provider × day × tag].
+
+    `price` turns the integer per-day aggregates of one simulation into the
+    daily cost of every strategy under every provider in one contraction.
+    """
+    providers   : tuple[str, ...]
+    lease       : np.ndarray     # (P, D, T) per active block-day (hourly fee × 24)
+    exec_trigger: np.ndarray     # (P, D, T) per job, trigger fee included
+    transfer    : np.ndarray     # (P, D, T) per block retagged to the tag
+    acq         : np.ndarray     # (P, D)    per block leased
+
+    @classmethod
+    def compile(cls, models: list[CostModel], n_days: int) -> "PriceTensor":
+        parts = [m.prices(n_days) for m in models]
+        return cls(tuple(m.name for m in models),
+                   *(np.concatenate([getattr(p, f) for p in parts])
+                     for f in ("lease", "exec_trigger", "transfer", "acq")))
+
+    @classmethod
+    def load(cls, paths, n_days: int) -> "PriceTensor":
+        return cls.compile(load_sheets(*paths), n_days)
+
+    @property
+    def n_days(self) -> int:
+        return self.acq.shape[1]
+
+    def cost(self, active: np.ndarray, jobs: np.ndarray, retags: np.ndarray,
+             acquired: np.ndarray) -> np.ndarray:
+        """(P, S, D) cost of per-tag aggregates `active`/`jobs`/`retags` (S, D, T) and `acquired` (D,)."""
+        D = len(acquired)
+        if D > self.n_days:
+            raise ValueError(f"Prices cover {self.n_days} days, aggregates have {D}")
+        return (np.einsum("sdt,pdt->psd", active, self.lease[:, :D])
+                + np.einsum("sdt,pdt->psd", jobs, self.exec_trigger[:, :D])
+                + np.einsum("sdt,pdt->psd", retags, self.transfer[:, :D])
+                + (self.acq[:, :D]*acquired)[:, None])
+
+    def price(self, stats) -> np.ndarray:
+        """(P, S, D) daily cost of an ``engine.DailyStats`` under every provider."""
+        return self.cost(stats.active, stats.jobs, stats.retags, stats.acquired)
@@ -0,0 +1,678 @@
+"""Columnar simulation engine for the baseline strategies of notebooks 04/05.
+
+A  equal thirds (round-robin tags in block-file order, never retagged)
+B  one-shot cheapest tag from lifetime-average jobs
+S  B tags, retagged daily on an EWMA of jobs
+D  B tags, retagged daily on a rolling mean of the last ROLL_DAYS observations
+DQN  B tags, retagged daily on every active block by a trained Q-policy
+     (opt-in: pass ``policy``, e.g. ``policy_export.NumpyQPolicy``)
+
+Blocks and workloads are loaded once into a size×day job matrix and every
+strategy keeps its tags as an int8 array (codes from ``cost_model.TAGS``).
+The daily loop only records integer per-tag aggregates (active blocks, jobs,
+retags); fees are applied afterwards by ``price``, or by ``price_providers``
+for a whole [provider × day × tag] fee tensor in one contraction. Because
+blocks only interact through those sums, ``run_strategies(shards=k)`` runs k
+row ranges in a process pool and adds their aggregates up.
+"""
+import argparse, json, os, pathlib, shutil, tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+import numpy as np, pandas as pd, pyarrow as pa, pyarrow.compute as pc, pyarrow.dataset as ds, pyarrow.parquet as pq
+from cost_model import CostModel, PriceTensor, TAGS, load_sheets
+
+DAYS       = 180                 # six-month horizon
+THRESHOLDS = (900, 176)          # break-even avg jobs/day for Atom, Photon
+ROLL_DAYS  = 7                   # window of strategy D
+DECAY      = 0.8                 # EWMA factor of strategy S
+STRATEGIES = ("A", "B", "S", "D")
+POLICY     = "DQN"               # strategy driven by the `policy` argument
+N_TAGS     = len(TAGS)
+WORKLOADS      = "workloads_daily.parquet"   # one file, row groups in day order
+WORKLOADS_HIVE = "workloads_daily"           # or day=NNN/ partition directories
+
+
+# ---------- data ----------
+@dataclass
+class Workloads:
+    """Blocks sorted by lease day plus their dense size×day job matrix."""
+    sizes     : np.ndarray       # (N,)   qpu_units
+    lease_day : np.ndarray       # (N,)   day each block is leased
+    jobs      : np.ndarray       # (N, D) workloads per size per day
+    file_order: np.ndarray       # (N,)   position of each block in blocks.parquet
+
+    @property
+    def n_blocks(self) -> int:
+        return len(self.sizes)
+
+    @property
+    def n_days(self) -> int:
+        return self.jobs.shape[1]
+
+    def day(self, d: int) -> tuple[np.ndarray, np.ndarray]:
+        """Rows with workloads on day `d` and their job counts."""
+        col  = self.jobs[:, d]
+        rows = np.flatnonzero(col)
+        return rows, col[rows]
+
+    def dense_rows(self, rows: np.ndarray) -> np.ndarray:
+        """(len(rows), n_days) job histories of `rows`."""
+        return np.asarray(self.jobs[rows], dtype=np.int64)
+
+    def total_jobs(self) -> np.ndarray:
+        return self.jobs.sum(axis=1, dtype=np.int64)
+
+
+def load_blocks(data_dir: str | pathlib.Path) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Block sizes and lease days sorted by lease day, plus each block's blocks.parquet position."""
+    blk = ds.dataset(pathlib.Path(data_dir)/"blocks.parquet").to_table(columns=["qpu_units", "lease_day"])
+    lease_f = blk["lease_day"].to_numpy()
+    order   = np.argsort(lease_f, kind="stable")            # active blocks become a prefix
+    return blk["qpu_units"].to_numpy()[order], lease_f[order], order
+
+
+class DayReader:
+    """One day of workloads at a time from workloads_daily.parquet or a day=NNN/ directory.
+
+    For the single file, the min/max of ``day`` in every row group's footer
+    statistics form a day → row-group index, so `read` touches only the row
+    groups of that day instead of filtering the whole file. `iter_days`
+    streams days in order in one sequential pass, holding about one row
+    group at a time; the generator writes one or more row groups per day.
+    """
+
+    def __init__(self, data_dir: str | pathlib.Path):
+        data_dir = pathlib.Path(data_dir)
+        self.hive = not (data_dir/WORKLOADS).exists() and (data_dir/WORKLOADS_HIVE).is_dir()
+        if self.hive:
+            self.path  = data_dir/WORKLOADS_HIVE
+            self.parts = {int(p.name.split("=", 1)[1]): p for p in self.path.glob("day=*")}
+            return
+        self.path = data_dir/WORKLOADS
+        self.file = pq.ParquetFile(self.path)
+        meta = self.file.metadata
+        col  = meta.schema.names.index("day")
+        stats = [meta.row_group(i).column(col).statistics for i in range(meta.num_row_groups)]
+        if all(st is not None and st.has_min_max for st in stats):
+            self.lo = np.array([st.min for st in stats], dtype=np.int64)
+            self.hi = np.array([st.max for st in stats], dtype=np.int64)
+        else:                                              # no index: fall back to filtering
+            self.lo = self.hi = None
+
+    def read(self, d: int) -> tuple[np.ndarray, np.ndarray]:
+        """qpu_units and n_workloads of day `d` (empty if none)."""
+        if self.hive:
+            part = self.parts.get(d)
+            if part is None:
+                return _day_arrays(None)
+            return _day_arrays(pq.read_table(part, columns=["qpu_units", "n_workloads"]))
+        if self.lo is None:
+            return _day_arrays(ds.dataset(self.path).to_table(
+                columns=["qpu_units", "n_workloads"], filter=ds.field("day") == d))
+        groups = np.flatnonzero((self.lo <= d) & (self.hi >= d))
+        if not len(groups):
+            return _day_arrays(None)
+        tbl = self.file.read_row_groups(groups.tolist(), columns=["day", "qpu_units", "n_workloads"])
+        if (self.lo[groups] != self.hi[groups]).any():
+            tbl = tbl.filter(pc.equal(tbl["day"], d))
+        return _day_arrays(tbl)
+
+    def iter_days(self, n_days: int = DAYS):
+        """Yield (day, qpu_units, n_workloads) for every day in 0..n_days-1, in order."""
+        if self.hive or self.lo is None or (self.hi[:-1] > self.lo[1:]).any():
+            for d in range(n_days):
+                yield (d, *self.read(d))
+            return
+
+        pending, d = {}, 0                                 # day → pieces read so far
+        for i in range(len(self.lo)):
+            while d < min(self.lo[i], n_days):             # no later group holds day d
+                yield (d, *_concat(pending.pop(d, [])))
+                d += 1
+            if self.lo[i] >= n_days:
+                break
+            tbl  = self.file.read_row_group(i, columns=["day", "qpu_units", "n_workloads"])
+            day  = tbl["day"].to_numpy()
+            keys = np.unique(day)
+            for k in keys[keys < n_days]:
+                rows = np.flatnonzero(day == k) if len(keys) > 1 else slice(None)
+                pending.setdefault(int(k), []).append(
+                    (tbl["qpu_units"].to_numpy()[rows], tbl["n_workloads"].to_numpy()[rows]))
+        while d < n_days:
+            yield (d, *_concat(pending.pop(d, [])))
+            d += 1
+
+
+def _day_arrays(tbl: pa.Table | None) -> tuple[np.ndarray, np.ndarray]:
+    if tbl is None or not tbl.num_rows:
+        return np.zeros(0, np.int32), np.zeros(0, np.int64)
+    return tbl["qpu_units"].to_numpy(), tbl["n_workloads"].to_numpy()
+
+
+def _concat(pieces: list) -> tuple[np.ndarray, np.ndarray]:
+    if not pieces:
+        return _day_arrays(None)
+    return np.concatenate([p[0] for p in pieces]), np.concatenate([p[1] for p in pieces])
+
+
+def load_workloads(data_dir: str | pathlib.Path, n_days: int = DAYS) -> Workloads:
+    """Read blocks.parquet and the workloads (one pass, day by day) into a `Workloads`."""
+    data_dir = pathlib.Path(data_dir)
+    sizes, lease_day, order = load_blocks(data_dir)
+    by_size = np.argsort(sizes)
+
+    jobs = np.zeros((len(sizes), n_days), dtype=np.int32, order="F")   # day columns contiguous
+    for d, qpu_units, n in DayReader(data_dir).iter_days(n_days):
+        jobs[rows_for_sizes(sizes, qpu_units, by_size), d] = n
+    return Workloads(sizes, lease_day, jobs, order)
+
+
+def rows_for_sizes(sizes: np.ndarray, query: np.ndarray, by_size: np.ndarray | None = None) -> np.ndarray:
+    """Row index of every qpu size in `query`; raises if a size has no block."""
+    by_size = np.argsort(sizes) if by_size is None else by_size
+    pos  = np.searchsorted(sizes, query, sorter=by_size).clip(max=len(sizes) - 1)
+    rows = by_size[pos]
+    if not np.array_equal(sizes[rows], query):
+        missing = query[sizes[rows] != query]
+        raise ValueError(f"{len(missing)} workload size(s) without a leased block, e.g. {missing[:5]}")
+    return rows
+
+
+def save_workloads(wl: Workloads, path: str | pathlib.Path) -> pathlib.Path:
+    """Write `wl` as plain .npy arrays so other processes can memory-map it."""
+    path = pathlib.Path(path)
+    path.mkdir(exist_ok=True, parents=True)
+    for name in ("sizes", "lease_day", "jobs", "file_order"):
+        np.save(path/f"{name}.npy", getattr(wl, name))
+    return path
+
+
+def open_workloads(path: str | pathlib.Path) -> Workloads:
+    """Read-only memory-mapped view of a directory written by `save_workloads`."""
+    path = pathlib.Path(path)
+    return Workloads(*(np.load(path/f"{name}.npy", mmap_mode="r")
+                       for name in ("sizes", "lease_day", "jobs", "file_order")))
+
+
+# ---------- tags ----------
+def cheapest(avg: np.ndarray, thresholds: tuple[float, float] = THRESHOLDS) -> np.ndarray:
+    """Vectorized break-even rule: Atom ≥ thresholds[0] > Photon ≥ thresholds[1] > Spin."""
+    atom, photon = thresholds
+    return np.where(avg >= atom, 0, np.where(avg >= photon, 1, 2)).astype(np.int8)
+
+
+def tags_equal_thirds(wl: Workloads) -> np.ndarray:
+    """Baseline A: Atom/Photon/Spin round-robin in blocks.parquet order."""
+    return (wl.file_order % N_TAGS).astype(np.int8)
+
+
+def tags_one_shot(wl: Workloads, thresholds: tuple[float, float] = THRESHOLDS) -> np.ndarray:
+    """Baseline B: cheapest tag for each block's lifetime-average jobs."""
+    active_days = wl.n_days - wl.lease_day.astype(np.int64)
+    avg = np.divide(wl.total_jobs(), active_days,
+                    out=np.zeros(wl.n_blocks), where=active_days > 0)
+    return cheapest(avg, thresholds)
+
+
+# ---------- simulation ----------
+@dataclass
+class DailyStats:
+    """Integer per-day aggregates of one simulation; costs are linear in these."""
+    strategies: tuple[str, ...]
+    acquired  : np.ndarray       # (D,)       blocks leased that day
+    active    : np.ndarray       # (S, D, T)  active blocks per tag
+    jobs      : np.ndarray       # (S, D, T)  workloads run per tag
+    retags    : np.ndarray       # (S, D, T)  blocks retagged *to* each tag
+    tags      : np.ndarray | None = None   # (S, N) tags after the last day
+
+
+class _Rolling:
+    """Ring buffer of the last `window` observations per row (deque semantics)."""
+
+    def __init__(self, n: int, window: int):
+        self.window = window
+        self.buf = np.zeros((n, window), dtype=np.int32)
+        self.sum = np.zeros(n, dtype=np.int64)
+        self.cnt = np.zeros(n, dtype=np.int16)
+        self.ptr = np.zeros(n, dtype=np.int16)
+
+    def push(self, rows: np.ndarray, vals: np.ndarray) -> np.ndarray:
+        """Append `vals` to `rows` and return their window means."""
+        p   = self.ptr[rows]
+        old = np.where(self.cnt[rows] >= self.window, self.buf[rows, p], 0)
+        self.sum[rows] += vals - old
+        self.buf[rows, p] = vals
+        self.ptr[rows] = (p + 1) % self.window
+        self.cnt[rows] = np.minimum(self.cnt[rows] + 1, self.window)
+        return self.sum[rows] / self.cnt[rows]
+
+
+@dataclass
+class DayResult:
+    """What one ingested day did: per-tag aggregates, retag decisions and costs."""
+    day     : int
+    acquired: int
+    active  : np.ndarray                      # (S, T)
+    jobs    : np.ndarray                      # (S, T)
+    retags  : np.ndarray                      # (S, T)
+    decisions: dict[str, tuple[np.ndarray, np.ndarray]]   # strategy → (rows, new tags)
+    costs   : np.ndarray | None = None        # (S,) when the state has a price sheet
+
+
+class StrategyState:
+    """Day-at-a-time state of several strategies; one `step` costs O(that day).
+
+    Holds each strategy's tags, the EWMA (S), the rolling-window ring buffer (D),
+    the policy's avg7 (DQN), per-tag active counts and cumulative costs. Rows
+    are blocks in lease order and grow with `add_blocks`; `save`/`load`
+    checkpoint everything except the policy and the price sheet.
+    """
+
+    def __init__(self, strategies: tuple[str, ...] = STRATEGIES,
+                 thresholds: tuple[float, float] = THRESHOLDS,
+                 roll_days : int   = ROLL_DAYS,
+                 decay     : float = DECAY,
+                 policy    = None,
+                 cm        : CostModel | None = None,
+                 n_days    : int   = DAYS):
+        unknown = set(strategies) - set(STRATEGIES) - {POLICY}
+        if unknown:
+            raise ValueError(f"Unknown strategies {sorted(unknown)}; choose from {STRATEGIES + (POLICY,)}")
+        if (POLICY in strategies) != (policy is not None):
+            raise ValueError(f"Strategy {POLICY!r} and the `policy` argument go together")
+        self.strategies = tuple(strategies)
+        self.thresholds, self.roll_days, self.decay = tuple(thresholds), roll_days, decay
+        self.policy, self.cm, self.n_days = policy, cm, n_days
+
+        S = len(self.strategies)
+        self.day      = 0                                    # next day to ingest
+        self.n_blocks = 0
+        self.day_lo   = 0                                    # first row leased on `day`
+        self.sizes    = np.zeros(0, dtype=np.int64)
+        self.tags     = np.zeros((S, 0), dtype=np.int8)
+        self.ewma     = np.zeros(0) if "S" in self.strategies else None
+        self.rolling  = _Rolling(0, roll_days) if "D" in self.strategies else None
+        self.avg7     = np.zeros(0) if policy is not None else None
+        self.counts   = np.zeros((S, N_TAGS), dtype=np.int64)
+        self.cum_cost = np.zeros(S)
+        self._by_size = np.zeros(0, dtype=np.int64)          # rows ordered by size
+
+    # ---------- capacity ----------
+    def _grow(self, need: int):
+        cap = self.tags.shape[1]
+        if need <= cap:
+            return
+        cap = max(need, 2*cap, 1024)
+
+        def grown(a: np.ndarray, axis: int = 0) -> np.ndarray:
+            shape = list(a.shape)
+            shape[axis] = cap - a.shape[axis]
+            return np.concatenate([a, np.zeros(shape, a.dtype)], axis=axis)
+
+        self.sizes, self.tags = grown(self.sizes), grown(self.tags, axis=1)
+        if self.ewma is not None:
+            self.ewma = grown(self.ewma)
+        if self.avg7 is not None:
+            self.avg7 = grown(self.avg7)
+        if self.rolling is not None:
+            r = self.rolling
+            r.buf, r.sum, r.cnt, r.ptr = grown(r.buf), grown(r.sum), grown(r.cnt), grown(r.ptr)
+
+    # ---------- ingest ----------
+    def add_blocks(self, sizes: np.ndarray, tags_A: np.ndarray | None = None,
+                   tags_B: np.ndarray | None = None) -> np.ndarray:
+        """Append blocks leased on the current day and return their rows.
+
+        A defaults to continuing the round-robin; B (and the B-seeded S/D/DQN)
+        defaults to the tag of a block with no known workloads yet.
+        """
+        sizes = np.asarray(sizes, dtype=np.int64)
+        lo, k = self.n_blocks, len(sizes)
+        rows  = np.arange(lo, lo + k)
+        if tags_A is None:
+            tags_A = (rows % N_TAGS).astype(np.int8)
+        if tags_B is None:
+            tags_B = np.full(k, cheapest(np.zeros(1), self.thresholds)[0], dtype=np.int8)
+
+        self._grow(lo + k)
+        self.sizes[lo:lo + k] = sizes
+        for i, s in enumerate(self.strategies):
+            self.tags[i, lo:lo + k] = tags_A if s == "A" else tags_B
+            self.counts[i] += np.bincount(self.tags[i, lo:lo + k], minlength=N_TAGS)
+        self.n_blocks += k
+
+        pos = np.searchsorted(self.sizes[self._by_size], sizes[np.argsort(sizes)])
+        self._by_size = np.insert(self._by_size, pos, rows[np.argsort(sizes)])
+        return rows
+
+    def rows_for_sizes(self, sizes: np.ndarray) -> np.ndarray:
+        return rows_for_sizes(self.sizes[:self.n_blocks], np.asarray(sizes), self._by_size)
+
+    def ingest(self, sizes: np.ndarray, n_workloads: np.ndarray,
+               new_sizes: np.ndarray | None = None) -> DayResult:
+        """Production entry point: lease `new_sizes`, then run one day of workloads by qpu size."""
+        if new_sizes is not None and len(new_sizes):
+            self.add_blocks(new_sizes)
+        return self.step(self.rows_for_sizes(sizes), np.asarray(n_workloads))
+
+    def step(self, rows: np.ndarray, n: np.ndarray) -> DayResult:
+        """Advance one day given the rows with workloads and their job counts."""
+        d, N, lo = self.day, self.n_blocks, self.day_lo
+        if rows.size and rows.max() >= N:
+            raise ValueError(f"Day {d} has workloads for blocks that are not leased yet")
+
+        new = {}                                           # strategy → (rows, new tags)
+        if self.ewma is not None:
+            self.ewma[rows] = self.decay*self.ewma[rows] + (1 - self.decay)*n
+            new["S"] = rows, cheapest(self.ewma[rows], self.thresholds)
+        if self.rolling is not None:
+            new["D"] = rows, cheapest(self.rolling.push(rows, n), self.thresholds)
+        if self.policy is not None:
+            q = self.strategies.index(POLICY)
+            today = np.zeros(N)
+            today[rows] = n
+            self.avg7[:lo] = (self.avg7[:lo]*6 + today[:lo])/7
+            self.avg7[lo:N] = today[lo:]                   # episode starts on the lease day
+            obs = np.stack([np.full(N, self.n_days - 1 - d), self.avg7[:N]/1e6,
+                            self.tags[q, :N], today/1e6], axis=1).astype(np.float32)
+            new[POLICY] = np.arange(N), np.asarray(self.policy.predict(obs, deterministic=True)[0],
+                                                   dtype=np.int8)
+
+        S = len(self.strategies)
+        jobs, retags = np.zeros((S, N_TAGS), np.int64), np.zeros((S, N_TAGS), np.int64)
+        decisions = {}
+        for i, s in enumerate(self.strategies):
+            if s in new:
+                rws, nt = new[s]
+                old     = self.tags[i, rws]
+                changed = nt != old
+                r, t    = rws[changed], nt[changed]
+                retags[i] = np.bincount(t, minlength=N_TAGS)
+                self.counts[i] += retags[i] - np.bincount(old[changed], minlength=N_TAGS)
+                self.tags[i, r] = t
+                decisions[s] = r, t
+            jobs[i] = np.bincount(self.tags[i, rows], weights=n, minlength=N_TAGS)
+
+        res = DayResult(d, N - lo, self.counts.copy(), jobs, retags, decisions)
+        if self.cm is not None:
+            res.costs = self.cm.prices([d]).cost(res.active[:, None], jobs[:, None], retags[:, None],
+                                                 np.array([res.acquired]))[0, :, 0]
+            self.cum_cost += res.costs
+        self.day, self.day_lo = d + 1, N
+        return res
+
+    # ---------- checkpoint ----------
+    def save(self, path: str | pathlib.Path) -> pathlib.Path:
+        """Compressed .npz checkpoint, written atomically."""
+        path = pathlib.Path(path)
+        N = self.n_blocks
+        meta = {"strategies": self.strategies, "thresholds": self.thresholds,
+                "roll_days": self.roll_days, "decay": self.decay, "n_days": self.n_days,
+                "day": self.day, "day_lo": self.day_lo}
+        arrays = {"sizes": self.sizes[:N], "tags": self.tags[:, :N], "counts": self.counts,
+                  "cum_cost": self.cum_cost, "by_size": self._by_size}
+        if self.ewma is not None:
+            arrays["ewma"] = self.ewma[:N]
+        if self.avg7 is not None:
+            arrays["avg7"] = self.avg7[:N]
+        if self.rolling is not None:
+            r = self.rolling
+            arrays.update(roll_buf=r.buf[:N], roll_sum=r.sum[:N], roll_cnt=r.cnt[:N], roll_ptr=r.ptr[:N])
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            np.savez_compressed(f, meta=np.array(json.dumps(meta)), **arrays)
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path: str | pathlib.Path, policy=None, cm: CostModel | None = None) -> "StrategyState":
+        with np.load(path) as f:
+            meta = json.loads(str(f["meta"]))
+            st = cls(tuple(meta["strategies"]), tuple(meta["thresholds"]), meta["roll_days"],
+                     meta["decay"], policy, cm, meta["n_days"])
+            N = len(f["sizes"])
+            st._grow(N)
+            st.n_blocks, st.day, st.day_lo = N, meta["day"], meta["day_lo"]
+            st.sizes[:N], st.tags[:, :N] = f["sizes"], f["tags"]
+            st.counts, st.cum_cost, st._by_size = f["counts"], f["cum_cost"], f["by_size"]
+            if st.ewma is not None:
+                st.ewma[:N] = f["ewma"]
+            if st.avg7 is not None:
+                st.avg7[:N] = f["avg7"]
+            if st.rolling is not None:
+                r = st.rolling
+                r.buf[:N], r.sum[:N], r.cnt[:N], r.ptr[:N] = (
+                    f["roll_buf"], f["roll_sum"], f["roll_cnt"], f["roll_ptr"])
+        return st
+
+
+def run_strategies(wl: Workloads,
+                   strategies: tuple[str, ...] = STRATEGIES,
+                   thresholds: tuple[float, float] = THRESHOLDS,
+                   roll_days : int   = ROLL_DAYS,
+                   decay     : float = DECAY,
+                   policy    = None,
+                   progress  = None,
+                   shards    : int   = 1) -> DailyStats:
+    """Evaluate `strategies` in one pass over the days.
+
+    `policy` (anything with the stable-baselines3 ``predict``) drives strategy
+    "DQN" with the observation of ``vec_env.QPUVecEnv``; it is scored on all
+    active blocks of a day in one batch. `progress(days_done, n_days)` is
+    called after every day; an exception raised from it aborts the run.
+
+    `shards` > 1 runs that many lease-order row ranges of about equal active
+    block-days in worker processes (see `run_sharded`); the result is identical.
+    """
+    if shards > 1:
+        return run_sharded(wl, shards, progress=progress, strategies=strategies, thresholds=thresholds,
+                           roll_days=roll_days, decay=decay, policy=policy)
+    st = StrategyState(strategies, thresholds, roll_days, decay, policy, n_days=wl.n_days)
+    S, D = len(st.strategies), wl.n_days
+    tags_A, tags_B = tags_equal_thirds(wl), tags_one_shot(wl, thresholds)
+
+    n_active = np.searchsorted(wl.lease_day, np.arange(D), side="right")
+    acquired = np.diff(n_active, prepend=0)
+    active   = np.zeros((S, D, N_TAGS), dtype=np.int64)
+    jobs     = np.zeros((S, D, N_TAGS), dtype=np.int64)
+    retags   = np.zeros((S, D, N_TAGS), dtype=np.int64)
+
+    for d in range(D):
+        lo, hi = n_active[d] - acquired[d], n_active[d]
+        st.add_blocks(wl.sizes[lo:hi], tags_A[lo:hi], tags_B[lo:hi])
+        res = st.step(*wl.day(d))
+        active[:, d], jobs[:, d], retags[:, d] = res.active, res.jobs, res.retags
+        if progress is not None:
+            progress(d + 1, D)
+    return DailyStats(st.strategies, acquired, active, jobs, retags, st.tags[:, :st.n_blocks].copy())
+
+
+# ---------- sharded runs ----------
+def shard_bounds(lease_day: np.ndarray, n_days: int, shards: int) -> np.ndarray:
+    """Row boundaries (shards + 1) of lease-order ranges with about equal active block-days."""
+    work = np.cumsum(n_days - np.asarray(lease_day, dtype=np.int64))
+    inner = np.searchsorted(work, work[-1]*np.arange(1, shards)/shards) if len(work) else np.zeros(shards - 1, int)
+    return np.concatenate([[0], inner, [len(lease_day)]]).astype(np.int64)
+
+
+class _RowRange:
+    """Rows lo..hi of a `workload_store.WorkloadStore`, renumbered from 0."""
+
+    def __init__(self, wl, lo: int, hi: int):
+        self.wl, self.lo, self.hi = wl, lo, hi
+        self.sizes, self.lease_day, self.file_order = (np.asarray(a[lo:hi])
+                                                       for a in (wl.sizes, wl.lease_day, wl.file_order))
+        self.n_blocks, self.n_days = hi - lo, wl.n_days
+
+    def day(self, d: int) -> tuple[np.ndarray, np.ndarray]:
+        rows, n = self.wl.day(d)                           # rows ascending
+        a, b = np.searchsorted(rows, [self.lo, self.hi])
+        return rows[a:b] - self.lo, n[a:b]
+
+    def total_jobs(self) -> np.ndarray:
+        return np.asarray(self.wl.total_jobs()[self.lo:self.hi])
+
+
+def _run_shard(source: tuple[str, str], lo: int, hi: int, params: dict) -> DailyStats:
+    kind, path = source
+    if kind == "store":
+        from workload_store import WorkloadStore
+        wl = _RowRange(WorkloadStore.open(path), lo, hi)
+    else:
+        w  = open_workloads(path)
+        wl = Workloads(w.sizes[lo:hi], w.lease_day[lo:hi], w.jobs[lo:hi], w.file_order[lo:hi])
+    return run_strategies(wl, **params)
+
+
+def _mapped_dir(wl) -> pathlib.Path | None:
+    """Directory `wl` is memory-mapped from (save_workloads layout), if it is."""
+    if not isinstance(getattr(wl, "jobs", None), np.memmap):
+        return None
+    path = pathlib.Path(wl.jobs.filename).parent
+    if not all((path/f"{name}.npy").exists() for name in ("sizes", "lease_day", "file_order")):
+        return None
+    return path if open_workloads(path).jobs.shape == wl.jobs.shape else None
+
+
+def scratch_dir(prefix: str) -> str:
+    """Temporary directory for memory-mapped worker inputs, in RAM (/dev/shm) when available."""
+    shm = "/dev/shm"
+    return tempfile.mkdtemp(prefix=prefix, dir=shm if os.path.isdir(shm) else None)
+
+
+def run_sharded(wl, shards: int, workers: int | None = None, progress=None, **params) -> DailyStats:
+    """`run_strategies(wl, **params)` over `shards` row ranges in a process pool.
+
+    Workers memory-map the job matrix: a `workload_store.WorkloadStore` or a
+    `Workloads` from `open_workloads` in place, any other `Workloads` from a
+    copy written once under /dev/shm. Strategy A's round-robin follows
+    blocks.parquet order and B's tag each block's own history, so every
+    shard starts from the same tags as the full run; summing the per-day
+    aggregates reproduces it exactly. `progress(done, n_days)` is called as
+    shards finish (done = n_days × finished share of the block-days).
+    """
+    D = wl.n_days
+    bounds = shard_bounds(wl.lease_day, D, shards)
+    ranges = [(lo, hi) for lo, hi in zip(bounds[:-1], bounds[1:]) if hi > lo]
+    scratch = None
+    if hasattr(wl, "csc_indptr"):
+        source = ("store", str(wl.path))
+    else:
+        path = _mapped_dir(wl)
+        if path is None:
+            scratch = path = save_workloads(wl, scratch_dir("qpu-shards-"))
+        source = ("dense", str(path))
+    work = np.concatenate([[0], np.cumsum(D - np.asarray(wl.lease_day, dtype=np.int64))])
+    try:
+        with ProcessPoolExecutor(max_workers=workers or len(ranges)) as pool:
+            futures = {pool.submit(_run_shard, source, int(lo), int(hi), params): i
+                       for i, (lo, hi) in enumerate(ranges)}
+            parts, done = [None]*len(ranges), 0
+            try:
+                for f in as_completed(futures):
+                    i = futures[f]
+                    parts[i] = f.result()
+                    lo, hi = ranges[i]
+                    done += work[hi] - work[lo]
+                    if progress is not None:
+                        progress(int(D*done/max(work[-1], 1)), D)
+            except BaseException:
+                for f in futures:
+                    f.cancel()
+                raise
+    finally:
+        if scratch is not None:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+    if not parts:
+        return run_strategies(wl, **params)
+    first = parts[0]
+    tags = None if first.tags is None else np.concatenate([p.tags for p in parts], axis=1)
+    return DailyStats(first.strategies, sum(p.acquired for p in parts), sum(p.active for p in parts),
+                      sum(p.jobs for p in parts), sum(p.retags for p in parts), tags)
+
+
+def price(stats: DailyStats, cm: CostModel) -> pd.DataFrame:
+    """Daily metrics (``day``, ``cost_<strategy>``) for `stats` under price sheet `cm`."""
+    D    = len(stats.acquired)
+    cost = cm.prices(D).price(stats)[0]
+    out  = {"day": np.arange(D)}
+    out.update({f"cost_{s}": cost[i] for i, s in enumerate(stats.strategies)})
+    return pd.DataFrame(out)
+
+
+def price_providers(stats: DailyStats, prices: PriceTensor) -> pd.DataFrame:
+    """`price` for every provider of `prices` at once: ``provider``, ``day``, ``cost_<strategy>``."""
+    cost = prices.price(stats)                                   # (P, S, D)
+    P, S, D = cost.shape
+    out = {"provider": np.repeat(prices.providers, D), "day": np.tile(np.arange(D), P)}
+    out.update({f"cost_{s}": cost[:, i].ravel() for i, s in enumerate(stats.strategies)})
+    return pd.DataFrame(out)
+
+
+def save_stats(stats: DailyStats, path: str | pathlib.Path) -> pathlib.Path:
+    """Write the per-day aggregates of `stats` (not its tags) as .npz, atomically.
+
+    Arrays ``strategies``, ``acquired``, ``active``, ``jobs``, ``retags``; with
+    them any price sheet reprices every strategy without a rerun.
+    """
+    path = pathlib.Path(path)
+    path.parent.mkdir(exist_ok=True, parents=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        np.savez(f, strategies=np.array(stats.strategies), acquired=stats.acquired,
+                 active=stats.active, jobs=stats.jobs, retags=stats.retags)
+    os.replace(tmp, path)
+    return path
+
+
+def load_stats(path: str | pathlib.Path) -> DailyStats:
+    with np.load(path) as f:
+        return DailyStats(tuple(f["strategies"].tolist()), f["acquired"], f["active"], f["jobs"], f["retags"])
+
+
+def simulate(wl: Workloads, cm: CostModel, **params) -> pd.DataFrame:
+    """Run the strategies on `wl` and price them; `params` go to `run_strategies`."""
+    return price(run_strategies(wl, **params), cm)
+
+
+# ---------- CLI ----------
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Simulate strategies A/B/S/D and write daily_metrics.parquet")
+    ap.add_argument("--data",   default="../data")
+    ap.add_argument("--config", nargs="+", default=["../provider_configs/qpu_demo.yml"],
+                    help="price sheets; more than one provider adds a `provider` column")
+    ap.add_argument("--out",    default="../results/daily_metrics.parquet")
+    ap.add_argument("--days",   type=int, default=DAYS)
+    ap.add_argument("--store",  help="read a workload_store directory instead of --data")
+    ap.add_argument("--policy", help="exported DQN weights (.npz) to add strategy DQN")
+    ap.add_argument("--shards", type=int, default=1, help="split the blocks across this many processes")
+    ap.add_argument("--stats",  default="../results/strategy_stats.npz",
+                    help="per-strategy daily aggregates for repricing (backend /api/pricing/whatif)")
+    args = ap.parse_args(argv)
+
+    if args.store:
+        from workload_store import WorkloadStore
+        wl = WorkloadStore.open(args.store)
+    else:
+        wl = load_workloads(args.data, args.days)
+    params = {"shards": args.shards}
+    if args.policy:
+        from policy_export import NumpyQPolicy
+        params.update(strategies=STRATEGIES + (POLICY,), policy=NumpyQPolicy.load(args.policy))
+    sheets = load_sheets(*args.config)
+    stats  = run_strategies(wl, **params)
+    if len(sheets) == 1:
+        metrics = price(stats, sheets[0])
+    else:
+        metrics = price_providers(stats, PriceTensor.compile(sheets, wl.n_days))
+    out = pathlib.Path(args.out)
+    out.parent.mkdir(exist_ok=True, parents=True)
+    metrics.to_parquet(out, compression="snappy")
+    print("✔ saved daily metrics →", out)
+    if args.stats:
+        print("✔ saved strategy aggregates →", save_stats(stats, args.stats))
+
+
+if __name__ == "__main__":
+    main()
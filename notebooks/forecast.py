@@ -0,0 +1,260 @@
+"""Batched workload forecaster → future_predictions.csv / optimized_predictions.csv.
+
+Every block (one qpu size) has a smoothed workload level: an EWMA of its
+daily jobs divided by a weekly seasonal factor shared by all sizes, which is
+itself smoothed on the ratio of the day's total to the summed levels. New
+blocks per day get an EWMA mean and variance, and the level of a block on its
+lease day is smoothed the same way, so leases not yet seen are forecast too.
+`update` folds one day into all sizes with a few array operations, so a
+nightly run loads the saved state and adds only the days that landed since.
+
+Intervals come from the one-step error of the summed forecast (EWMA
+variance, widened with the horizon as for simple exponential smoothing) and
+the variance of daily leases. The forecast is priced twice: with the current
+tags (strategy B's rule on the average jobs seen so far) and with the tags
+that minimise each block's forecast cost over the horizon, transfer fees
+included; the second file also carries the savings the API reports.
+
+    python forecast.py --data ../data --config ../provider_configs/qpu_demo.yml \\
+                       --state ../results/forecast_state.npz --out ../backend/data
+"""
+import argparse, json, os, pathlib
+import numpy as np, pandas as pd
+import engine
+from cost_model import CostModel, PriceTensor, TAGS
+
+ALPHA   = 0.3          # level smoothing per size
+GAMMA   = 0.1          # weekly seasonal smoothing
+BETA    = 0.1          # error / lease variance smoothing
+PERIOD  = 7
+HORIZON = 90           # forecast days written (the API serves up to 365)
+Z       = 1.96         # 95 % intervals
+STRATEGY = "forecast"  # optimization_strategy recorded in optimized_predictions.csv
+METRICS  = ("new_blocks_leased", "active_blocks", "workloads_executed", "total_cost")
+
+
+class Forecaster:
+    """Workload level of every block in lease order (rows as in ``engine.Workloads``)."""
+
+    def __init__(self, alpha: float = ALPHA, gamma: float = GAMMA, beta: float = BETA,
+                 period: int = PERIOD):
+        self.alpha, self.gamma, self.beta, self.period = alpha, gamma, beta, period
+        self.day       = 0                       # next day to fold in
+        self.level     = np.zeros(0)             # (N,) deseasonalized jobs per day
+        self.total     = np.zeros(0, np.int64)   # (N,) jobs seen so far, for the current tags
+        self.lease_day = np.zeros(0, np.int32)   # (N,)
+        self.season    = np.ones(period)         # weekly factors, mean 1
+        self.err_var   = 0.0                     # one-step variance of the summed jobs
+        self.new_mean  = 0.0                     # leases per day
+        self.new_var   = 0.0
+        self.new_level = 0.0                     # level of a block on its lease day
+
+    @property
+    def n_blocks(self) -> int:
+        return len(self.level)
+
+    # ---------- fitting ----------
+    def update(self, rows: np.ndarray, n: np.ndarray, n_new: int) -> None:
+        """Fold in day `self.day`: jobs `n` of blocks `rows`, `n_new` of them leased today."""
+        a, b = self.alpha, self.beta
+        N0 = self.n_blocks
+        N  = N0 + n_new
+        p  = self.day % self.period
+        s  = self.season[p]
+        x  = np.zeros(N)
+        x[rows] = n
+        self.total = np.concatenate([self.total, np.zeros(n_new, np.int64)])
+        self.lease_day = np.concatenate([self.lease_day, np.full(n_new, self.day, np.int32)])
+        self.total[rows] += n
+
+        base = self.level.sum()
+        if self.day:
+            err = x.sum() - s*(base + self.new_mean*self.new_level)
+            self.err_var = err*err if self.day == 1 else b*err*err + (1 - b)*self.err_var
+            dev = n_new - self.new_mean
+            self.new_var  = dev*dev if self.day == 1 else b*dev*dev + (1 - b)*self.new_var
+            self.new_mean = a*n_new + (1 - a)*self.new_mean
+        else:
+            self.new_mean = n_new
+        if n_new:
+            fresh = x[N0:].mean()/s
+            self.new_level = fresh if not N0 else a*fresh + (1 - a)*self.new_level
+
+        if base > 0:                              # seasonal factor of today's weekday
+            self.season[p] = self.gamma*(x[:N0].sum()/base) + (1 - self.gamma)*s
+            self.season *= self.period/self.season.sum()
+        self.level *= 1 - a
+        self.level += (a/s)*x[:N0]
+        self.level = np.concatenate([self.level, x[N0:]/s])
+        self.day += 1
+
+    def fit(self, wl: engine.Workloads) -> "Forecaster":
+        """Fold in every remaining day of `wl` (all of them for a fresh forecaster)."""
+        n_active = np.searchsorted(wl.lease_day, np.arange(wl.n_days), side="right")
+        for d in range(self.day, wl.n_days):
+            self.update(*wl.day(d), n_active[d] - self.n_blocks)
+        return self
+
+    # ---------- forecast ----------
+    def current_tags(self, thresholds: tuple[float, float] = engine.THRESHOLDS) -> np.ndarray:
+        """Strategy B's rule on the average daily jobs of every block so far."""
+        age = self.day - self.lease_day
+        return engine.cheapest(np.divide(self.total, age, out=np.zeros(self.n_blocks), where=age > 0),
+                               thresholds)
+
+    def best_tags(self, prices: PriceTensor, tags: np.ndarray | None = None) -> np.ndarray:
+        """Tag of least forecast cost over the horizon of `prices`, paying transfer away from `tags`."""
+        lease, per_job = self._horizon_fees(prices)
+        cost = lease + np.multiply.outer(self.level, per_job)
+        if tags is not None:
+            cost += prices.transfer[0, 0]*(np.arange(engine.N_TAGS) != tags[:, None])
+        return cost.argmin(axis=1).astype(np.int8)
+
+    def best_new_tag(self, prices: PriceTensor) -> int:
+        lease, per_job = self._horizon_fees(prices)
+        return int((lease + self.new_level*per_job).argmin())
+
+    def predict(self, prices: PriceTensor, tags: np.ndarray, new_tag: int,
+                retags: np.ndarray | None = None, z: float = Z) -> pd.DataFrame:
+        """Daily metrics and intervals for the days of `prices` with blocks on `tags`.
+
+        `retags` (T,) counts blocks moved to each tag on the first forecast day.
+        """
+        H  = prices.n_days
+        h  = np.arange(1, H + 1)
+        s  = self.season[(self.day + h - 1) % self.period]
+        T  = engine.N_TAGS
+        onehot = np.eye(T)[new_tag]
+        active = np.bincount(tags, minlength=T) + np.outer(h*self.new_mean, onehot)
+        jobs   = s[:, None]*(np.bincount(tags, weights=self.level, minlength=T)
+                             + np.outer(h*self.new_mean*self.new_level, onehot))
+        moved  = np.zeros((H, T))
+        if retags is not None:
+            moved[0] = retags
+        cost = prices.cost(active[None], jobs[None], moved[None], np.full(H, self.new_mean))[0, 0]
+
+        sd_new  = np.sqrt(self.new_var)
+        sd_act  = sd_new*np.sqrt(h)
+        sd_jobs = np.sqrt(self.err_var*(1 + (h - 1)*self.alpha**2))
+        total_jobs = jobs.sum(axis=1)
+        per_job = np.divide((jobs*prices.exec_trigger[0]).sum(axis=1), total_jobs,
+                            out=np.zeros(H), where=total_jobs > 0)
+        sd_cost = np.sqrt((per_job*sd_jobs)**2 + (prices.lease[0, :, new_tag]*sd_act)**2
+                          + (prices.acq[0]*sd_new)**2)
+
+        out = {}
+        for name, mean, sd in zip(METRICS, (np.full(H, self.new_mean), active.sum(axis=1), total_jobs, cost),
+                                  (np.full(H, sd_new), sd_act, sd_jobs, sd_cost)):
+            out[name] = mean
+            out[f"{name}_lower_ci"] = np.maximum(mean - z*sd, 0)
+            out[f"{name}_upper_ci"] = mean + z*sd
+        share = 100*active/active.sum(axis=1, keepdims=True)
+        for t, tag in enumerate(TAGS):
+            out[f"{tag}_percentage"] = share[:, t]
+        return pd.DataFrame(out)
+
+    def _horizon_fees(self, prices: PriceTensor) -> tuple[np.ndarray, np.ndarray]:
+        """(T,) lease and (T,) fee per unit of level, summed over the forecast days."""
+        s = self.season[(self.day + np.arange(prices.n_days)) % self.period]
+        return prices.lease[0].sum(axis=0), s @ prices.exec_trigger[0]
+
+    # ---------- checkpoint ----------
+    def save(self, path: str | pathlib.Path) -> pathlib.Path:
+        """Compressed .npz checkpoint, written atomically."""
+        path = pathlib.Path(path)
+        meta = {k: getattr(self, k) for k in ("alpha", "gamma", "beta", "period", "day",
+                                              "err_var", "new_mean", "new_var", "new_level")}
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            np.savez_compressed(f, meta=np.array(json.dumps(meta)), level=self.level,
+                                total=self.total, lease_day=self.lease_day, season=self.season)
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path: str | pathlib.Path) -> "Forecaster":
+        with np.load(path) as f:
+            meta = json.loads(str(f["meta"]))
+            fc = cls(meta.pop("alpha"), meta.pop("gamma"), meta.pop("beta"), meta.pop("period"))
+            fc.__dict__.update(meta)
+            fc.level, fc.total, fc.lease_day, fc.season = f["level"], f["total"], f["lease_day"], f["season"]
+        return fc
+
+
+# ---------- outputs ----------
+def forecast_tables(fc: Forecaster, cm: CostModel, horizon: int = HORIZON,
+                    start_date: str = "2025-01-01") -> tuple[pd.DataFrame, pd.DataFrame]:
+    """future_predictions and optimized_predictions frames for the `horizon` days after `fc.day`.
+
+    `start_date` is the calendar date of simulation day 0.
+    """
+    prices = cm.prices(fc.day + np.arange(horizon))
+    tags   = fc.current_tags()
+    best   = fc.best_tags(prices, tags)
+    moved  = np.bincount(best[best != tags], minlength=engine.N_TAGS)
+    base = fc.predict(prices, tags, int(engine.cheapest(np.array([fc.new_level]))[0]))
+    opt  = fc.predict(prices, best, fc.best_new_tag(prices), retags=moved)
+
+    dates = (pd.Timestamp(start_date) + pd.to_timedelta(fc.day + np.arange(horizon), unit="D")).strftime("%Y-%m-%d")
+    base.insert(0, "date", dates)
+    opt.insert(0, "date", dates)
+    opt = opt.rename(columns={f"{t}_percentage": f"optimized_{t}" for t in TAGS})
+    opt["cost_savings"] = base["total_cost"] - opt["total_cost"]
+    opt["savings_percentage"] = 100*opt["cost_savings"]/base["total_cost"]
+    opt["estimated_savings"] = opt["cost_savings"]
+    opt["optimization_strategy"] = STRATEGY
+    return base, opt
+
+
+def _write_csv(df: pd.DataFrame, path: pathlib.Path) -> None:
+    # the backend reloads on mtime, so never expose a half-written file
+    tmp = path.with_name(f".{path.name}.tmp")
+    df.to_csv(tmp, index=False, float_format="%.4f")
+    os.replace(tmp, path)
+
+
+def fold_days(fc: Forecaster, data_dir: str | pathlib.Path, n_days: int) -> Forecaster:
+    """Fold days fc.day..n_days-1 of `data_dir` into `fc`, streaming one day at a time."""
+    sizes, lease_day, _ = engine.load_blocks(data_dir)
+    if fc.n_blocks and not np.array_equal(fc.lease_day, lease_day[:fc.n_blocks]):
+        raise ValueError("Forecast state does not match blocks.parquet; refit without --state")
+    by_size  = np.argsort(sizes)
+    n_active = np.searchsorted(lease_day, np.arange(n_days), side="right")
+    reader   = engine.DayReader(data_dir)
+    days = reader.iter_days(n_days) if fc.day == 0 else ((d, *reader.read(d)) for d in range(fc.day, n_days))
+    for d, qpu_units, n in days:
+        fc.update(engine.rows_for_sizes(sizes, qpu_units, by_size), n, n_active[d] - fc.n_blocks)
+    return fc
+
+
+# ---------- CLI ----------
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Forecast daily workloads and costs for the backend API")
+    ap.add_argument("--data",       default="../data")
+    ap.add_argument("--config",     default="../provider_configs/qpu_demo.yml")
+    ap.add_argument("--days",       type=int, default=engine.DAYS, help="days of history available")
+    ap.add_argument("--horizon",    type=int, default=HORIZON)
+    ap.add_argument("--start-date", default="2025-01-01", help="calendar date of day 0")
+    ap.add_argument("--state",      help="forecaster checkpoint; only days after it are folded in")
+    ap.add_argument("--out",        default="../backend/data")
+    args = ap.parse_args(argv)
+
+    fc = Forecaster.load(args.state) if args.state and os.path.exists(args.state) else Forecaster()
+    start = fc.day
+    fold_days(fc, args.data, args.days)
+    if args.state:
+        fc.save(args.state)
+    print(f"✔ folded days {start}..{fc.day - 1} into {fc.n_blocks:,} block levels" if fc.day > start
+          else f"✔ state already at day {fc.day}")
+
+    base, opt = forecast_tables(fc, CostModel(args.config), args.horizon, args.start_date)
+    out = pathlib.Path(args.out)
+    out.mkdir(exist_ok=True, parents=True)
+    _write_csv(base, out/"future_predictions.csv")
+    _write_csv(opt, out/"optimized_predictions.csv")
+    print(f"✔ {args.horizon} forecast days → {out}/future_predictions.csv, optimized_predictions.csv "
+          f"(savings {opt['savings_percentage'].mean():.1f} %)")
+
+
+if __name__ == "__main__":
+    main()
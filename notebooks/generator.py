@@ -0,0 +1,250 @@
+"""Scalable, seedable generator for blocks.parquet and workloads_daily.parquet.
+
+Same data model as notebook 01: every day leases a random number of blocks
+with QPU sizes never used before, then spreads a random number of workloads
+uniformly over every size leased so far. Differences that make year-long and
+10× datasets cheap:
+
+* used sizes are tracked in a bit array over [1, qpu_max] and an append-only
+  size array, not a Python set converted to a list each day;
+* a day's per-size counts come from one multinomial draw over the used sizes
+  (O(sizes)), instead of materializing up to 50M samples for ``np.unique``;
+* every day has its own child seed, so days are generated in parallel chunks
+  and the output is identical for any number of workers.
+
+Workloads go to workloads_daily.parquet with one or more row groups per day
+(so the footer statistics index days, see ``engine.DayReader``) or, with
+``--layout hive``, to workloads_daily/day=NNN/part-0.parquet.
+
+    python generator.py --out ../data --days 365 --scale 10 --workers 8
+"""
+import argparse, os, pathlib, shutil, tempfile, time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+import numpy as np, pyarrow as pa, pyarrow.compute as pc, pyarrow.parquet as pq
+
+BLOCKS_SCHEMA = pa.schema([
+    ("block_id",      pa.string()),
+    ("qpu_units",     pa.int32()),
+    ("type_initial",  pa.string()),
+    ("lease_day",     pa.int16()),
+    ("acq_cost",      pa.float32())
+])
+
+WL_SCHEMA = pa.schema([
+    ("day",          pa.int16()),
+    ("qpu_units",    pa.int32()),
+    ("n_workloads",  pa.int64())
+])
+
+# workload table layouts: one file indexed by row group, or hive day=NNN/ partitions
+LAYOUTS = {"file": "workloads_daily.parquet", "hive": "workloads_daily"}
+
+
+@dataclass
+class GeneratorConfig:
+    days      : int   = 180                    # six-month horizon
+    blocks_min: int   = 1_000
+    blocks_max: int   = 10_000
+    wl_min    : int   = 1_000_000
+    wl_max    : int   = 50_000_000
+    qpu_max   : int   = 100_000_000            # ← max QPU units
+    scale     : float = 1.0                    # multiplies block and workload counts
+    acq_cost  : float = 0.20
+    seed      : int   = 42
+
+    def scaled(self, lo: int, hi: int) -> tuple[int, int]:
+        return int(lo*self.scale), int(hi*self.scale)
+
+
+class SizePool:
+    """Unique QPU sizes in [1, high], tracked in a bit array."""
+
+    def __init__(self, high: int):
+        self.high = high
+        self.bits = np.zeros(high//8 + 1, dtype=np.uint8)
+
+    def _taken(self, x: np.ndarray) -> np.ndarray:
+        return ((self.bits[x >> 3] >> (x & 7).astype(np.uint8)) & 1).astype(bool)
+
+    def take(self, n: int, rng: np.random.Generator) -> np.ndarray:
+        """`n` sizes not returned before, in draw order."""
+        out, have = [], 0
+        while have < n:
+            trial = rng.integers(1, self.high + 1, size=n - have)
+            _, first = np.unique(trial, return_index=True)      # drop in-batch repeats
+            trial = trial[np.sort(first)]
+            trial = trial[~self._taken(trial)]
+            np.bitwise_or.at(self.bits, trial >> 3, (1 << (trial & 7)).astype(np.uint8))
+            out.append(trial)
+            have += len(trial)
+        return np.concatenate(out) if out else np.zeros(0, dtype=np.int64)
+
+
+def plan_blocks(cfg: GeneratorConfig) -> tuple[np.ndarray, np.ndarray]:
+    """Sizes of all blocks in lease order and the number leased per day."""
+    rng = np.random.default_rng(np.random.SeedSequence(cfg.seed).spawn(1)[0])
+    lo, hi   = cfg.scaled(cfg.blocks_min, cfg.blocks_max)
+    if hi < 1:
+        raise ValueError(f"scale {cfg.scale} leases no blocks (at most {cfg.blocks_max} × scale per day)")
+    n_blocks = rng.integers(lo, hi + 1, size=cfg.days)
+    if n_blocks.sum() > cfg.qpu_max:
+        raise ValueError(f"{n_blocks.sum():,} blocks do not fit in {cfg.qpu_max:,} unique sizes")
+    sizes = SizePool(cfg.qpu_max).take(int(n_blocks.sum()), rng).astype(np.int32)
+    return sizes, n_blocks
+
+
+# ---------- workloads (worker side) ----------
+_sizes: np.ndarray | None = None
+
+
+def _attach(path: str):
+    global _sizes
+    _sizes = np.load(path, mmap_mode="r")
+
+
+def _day_seeds(cfg: GeneratorConfig) -> list[np.random.SeedSequence]:
+    return np.random.SeedSequence(cfg.seed).spawn(cfg.days + 1)[1:]
+
+
+def _workloads(cfg: GeneratorConfig, days: range, n_used: np.ndarray) -> list[tuple[np.ndarray, np.ndarray]]:
+    """(sorted sizes, counts) of each day in `days`; `n_used[d]` sizes are leased by day d."""
+    seeds = _day_seeds(cfg)
+    lo, hi = cfg.scaled(cfg.wl_min, cfg.wl_max)
+    out = []
+    for d in days:
+        rng  = np.random.default_rng(seeds[d])
+        used = np.asarray(_sizes[:n_used[d]])
+        if not len(used):                                        # nothing leased yet: no workloads
+            out.append((used, np.zeros(0, dtype=np.int64)))
+            continue
+        n_wl = rng.integers(lo, hi + 1)
+        counts = rng.multinomial(n_wl, np.full(len(used), 1/len(used)))
+        nz    = np.flatnonzero(counts)
+        order = np.argsort(used[nz])
+        out.append((used[nz][order], counts[nz][order]))
+    return out
+
+
+def _ordered(pool: ProcessPoolExecutor, fn, tasks: list, window: int):
+    """pool.map that keeps at most `window` chunks in flight (bounded memory)."""
+    pending, it = deque(), iter(tasks)
+    for t in it:
+        pending.append(pool.submit(fn, *t))
+        if len(pending) >= window:
+            break
+    while pending:
+        yield pending.popleft().result()
+        for t in it:
+            pending.append(pool.submit(fn, *t))
+            break
+
+
+# ---------- driver ----------
+class _HiveWriter:
+    """ParquetWriter stand-in writing each day's table to day=NNN/part-0.parquet."""
+
+    def __init__(self, path: pathlib.Path):
+        self.path = path
+
+    def write_table(self, tbl: pa.Table):
+        if not tbl.num_rows:
+            return
+        part = self.path/f"day={tbl['day'][0].as_py():03}"
+        part.mkdir(parents=True, exist_ok=True)
+        pq.write_table(tbl.drop_columns(["day"]), part/"part-0.parquet",     # the day is in the path
+                       compression="snappy")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def _remove(path: pathlib.Path):
+    if path.is_dir():
+        shutil.rmtree(path)
+    elif path.exists():
+        path.unlink()
+
+
+def generate(out_dir: str | pathlib.Path, cfg: GeneratorConfig = GeneratorConfig(),
+             workers: int | None = None, chunk_days: int = 8,
+             layout: str = "file") -> tuple[pathlib.Path, pathlib.Path]:
+    """Write blocks.parquet and the workload table (`layout`, see LAYOUTS) for `cfg` into `out_dir`.
+
+    A workload table of the other layout in `out_dir` is removed so readers
+    never see two different datasets.
+    """
+    if layout not in LAYOUTS:
+        raise ValueError(f"Unknown layout {layout!r}; choose from {sorted(LAYOUTS)}")
+    out_dir = pathlib.Path(out_dir)
+    out_dir.mkdir(exist_ok=True, parents=True)
+    sizes, n_blocks = plan_blocks(cfg)
+    n_used = np.cumsum(n_blocks)
+    starts = n_used - n_blocks
+
+    blocks_path = out_dir/"blocks.parquet"
+    wl_path     = out_dir/LAYOUTS[layout]
+    for path in LAYOUTS.values():
+        _remove(out_dir/path)
+    with pq.ParquetWriter(blocks_path, BLOCKS_SCHEMA, compression="snappy") as w:
+        for day in range(cfg.days):
+            n   = int(n_blocks[day])
+            ids = pc.utf8_lpad(pa.array(np.arange(n)).cast(pa.string()), width=5, padding="0")
+            w.write_table(pa.Table.from_arrays([
+                pc.binary_join_element_wise(f"B-{day:03}-", ids, ""),
+                pa.array(sizes[starts[day]:n_used[day]]),
+                pa.nulls(n, pa.string()),
+                pa.array(np.full(n, day, dtype=np.int16)),
+                pa.array(np.full(n, cfg.acq_cost, dtype=np.float32)),
+            ], schema=BLOCKS_SCHEMA))
+
+    scratch = tempfile.mkdtemp(prefix="qpu-gen-", dir="/dev/shm" if os.path.isdir("/dev/shm") else None)
+    try:
+        np.save(pathlib.Path(scratch)/"sizes.npy", sizes)
+        chunks = [(cfg, range(d, min(d + chunk_days, cfg.days)), n_used)
+                  for d in range(0, cfg.days, chunk_days)]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach,
+                                 initargs=(str(pathlib.Path(scratch)/"sizes.npy"),)) as pool, \
+             (pq.ParquetWriter(wl_path, WL_SCHEMA, compression="snappy") if layout == "file"
+              else _HiveWriter(wl_path)) as w:
+            window = 2*(workers or os.cpu_count() or 1)
+            for (_, days, _), res in zip(chunks, _ordered(pool, _workloads, chunks, window)):
+                for day, (wl_sizes, freqs) in zip(days, res):
+                    if not len(wl_sizes):                        # keep every row group's day statistics
+                        continue
+                    w.write_table(pa.Table.from_arrays([
+                        pa.array(np.full(len(wl_sizes), day, dtype=np.int16)),
+                        pa.array(wl_sizes.astype(np.int32)),
+                        pa.array(freqs.astype(np.int64)),
+                    ], schema=WL_SCHEMA))
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+    return blocks_path, wl_path
+
+
+def main(argv=None):
+    d = GeneratorConfig()
+    ap = argparse.ArgumentParser(description="Generate synthetic QPU leases and daily workloads")
+    ap.add_argument("--out",     default="../data")
+    ap.add_argument("--days",    type=int,   default=d.days)
+    ap.add_argument("--scale",   type=float, default=d.scale)
+    ap.add_argument("--seed",    type=int,   default=d.seed)
+    ap.add_argument("--qpu-max", type=int,   default=d.qpu_max)
+    ap.add_argument("--workers", type=int,   default=None)
+    ap.add_argument("--layout",  choices=sorted(LAYOUTS), default="file")
+    args = ap.parse_args(argv)
+
+    cfg = GeneratorConfig(days=args.days, scale=args.scale, seed=args.seed, qpu_max=args.qpu_max)
+    t0 = time.time()
+    for path in generate(args.out, cfg, args.workers, layout=args.layout):
+        size = sum(p.stat().st_size for p in path.rglob("*")) if path.is_dir() else path.stat().st_size
+        print(path, "→", round(size/1e6, 2), "MB")
+    print(f"completed in {time.time()-t0:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Exact offline-optimal retagging (Viterbi over the size×day job matrix).
+
+Given every block's full workload history, the cheapest tag schedule is a
+shortest path through 3 states per day: day d on tag t costs
+``24·lease[t] + (exec[t] + trigger)·jobs[d]``, switching to t costs
+``transfer[t]``, and the tag on the lease day is free (as for strategy B);
+fees are taken per day, so time-of-use sheets are solved exactly too. The
+path of each block is independent, so one DP pass updates the value of all
+active blocks per day with array operations. Because the transfer fee
+depends only on the target tag,
+
+    V_d[t] = min(V_{d-1}[t], min_u V_{d-1}[u] + transfer[t]) + day_cost[t]
+
+and one byte per (block, day) is enough to recover the path: bits 0-1 hold
+argmin_u V_{d-1}[u], bit 2+t is set when tag t was entered by a switch.
+
+The result is the cost every heuristic (A/B/S/D/DQN) is bounded by under the
+same price sheet; its aggregates are a ``DailyStats`` priced by ``engine.price``.
+
+    python optimal.py --data ../data --config ../provider_configs/qpu_demo.yml
+"""
+import argparse, json, pathlib
+from dataclasses import dataclass
+import numpy as np
+import engine
+from cost_model import CostModel
+
+STRATEGY = "OPT"
+_SWITCH_BITS = 1 << (2 + np.arange(engine.N_TAGS))        # bit of "entered tag t by a switch"
+
+
+@dataclass
+class OptimalPlan:
+    """Optimal schedule of every block in lease order (rows as in ``engine.Workloads``)."""
+    stats: engine.DailyStats     # strategy "OPT"; per-day aggregates priced by engine.price
+    cost : np.ndarray            # (N,)   optimal cost per block, acquisition included
+    tags : np.ndarray | None     # (N, D) int8 tag per block and day, -1 before the lease day
+
+    @property
+    def total(self) -> float:
+        return float(self.cost.sum())
+
+
+def solve(wl: engine.Workloads, cm: CostModel, keep_tags: bool = False) -> OptimalPlan:
+    """Cheapest tag schedule of every block of `wl` under price sheet `cm`.
+
+    Memory is one uint8 back-pointer per (block, day) plus the (N, D) tag
+    matrix when `keep_tags`; the per-day aggregates are always returned.
+    """
+    N, D   = wl.n_blocks, wl.n_days
+    prices = cm.prices(D)                                           # time-of-use fees by day
+    n_active = np.searchsorted(wl.lease_day, np.arange(D), side="right")
+    acquired = np.diff(n_active, prepend=0)
+
+    # ---------- forward: values and back-pointers ----------
+    value = np.zeros((N, engine.N_TAGS))
+    back  = np.zeros((N, D), dtype=np.uint8, order="F")            # day columns contiguous
+    for d in range(D):
+        lo, hi = n_active[d] - acquired[d], n_active[d]
+        if lo:
+            prev   = value[:lo]
+            best   = prev.argmin(axis=1)
+            switch = prev[np.arange(lo), best][:, None] + prices.transfer[0, d]
+            moved  = switch < prev                                  # ties keep the tag
+            np.copyto(prev, switch, where=moved)
+            back[:lo, d] = best | (moved @ _SWITCH_BITS)
+        value[lo:hi] = 0
+        value[:hi] += prices.lease[0, d]
+        rows, n = wl.day(d)
+        value[rows] += np.multiply.outer(n, prices.exec_trigger[0, d])
+
+    # ---------- backward: tags and per-tag aggregates ----------
+    active = np.zeros((1, D, engine.N_TAGS), dtype=np.int64)
+    jobs   = np.zeros_like(active)
+    retags = np.zeros_like(active)
+    tags   = np.full((N, D), -1, dtype=np.int8, order="F") if keep_tags else None
+    tag    = value.argmin(axis=1).astype(np.int8)
+    for d in range(D - 1, -1, -1):
+        hi = n_active[d]
+        active[0, d] = np.bincount(tag[:hi], minlength=engine.N_TAGS)
+        rows, n = wl.day(d)
+        jobs[0, d] = np.bincount(tag[rows], weights=n, minlength=engine.N_TAGS)
+        if keep_tags:
+            tags[:hi, d] = tag[:hi]
+        lo = hi - acquired[d]                                       # rows that existed on day d-1
+        if lo:
+            b     = back[:lo, d]
+            cur   = tag[:lo]
+            moved = (b >> (2 + cur)) & 1 == 1
+            retags[0, d] = np.bincount(cur[moved], minlength=engine.N_TAGS)
+            tag[:lo] = np.where(moved, b & 3, cur)
+
+    stats = engine.DailyStats((STRATEGY,), acquired, active, jobs, retags)
+    return OptimalPlan(stats, value.min(axis=1) + prices.acq[0, wl.lease_day], tags)
+
+
+# ---------- CLI ----------
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Solve the offline-optimal tag schedule and write its total cost")
+    ap.add_argument("--data",   default="../data")
+    ap.add_argument("--config", default="../provider_configs/qpu_demo.yml")
+    ap.add_argument("--days",   type=int, default=engine.DAYS)
+    ap.add_argument("--store",  help="read a workload_store directory instead of --data")
+    ap.add_argument("--out",    default="../results/optimal_total.json")
+    ap.add_argument("--tags",   help="also save the (block, day) tag schedule as .npy")
+    args = ap.parse_args(argv)
+
+    if args.store:
+        from workload_store import WorkloadStore
+        wl = WorkloadStore.open(args.store)
+    else:
+        wl = engine.load_workloads(args.data, args.days)
+    plan = solve(wl, CostModel(args.config), keep_tags=bool(args.tags))
+
+    out = pathlib.Path(args.out)
+    out.parent.mkdir(exist_ok=True, parents=True)
+    out.write_text(json.dumps({"optimal_total": round(plan.total, 2),
+                               "retags": int(plan.stats.retags.sum()),
+                               "n_blocks": wl.n_blocks, "n_days": wl.n_days}))
+    print(f"✔ optimal total ${plan.total:,.2f} → {out}")
+    if args.tags:
+        np.save(args.tags, plan.tags)
+        print("✔ saved tag schedule →", args.tags)
+
+
+if __name__ == "__main__":
+    main()
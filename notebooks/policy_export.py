@@ -0,0 +1,87 @@
+"""Export the trained DQN to plain NumPy weights and run it without torch.
+
+``export_dqn`` is the only part that needs stable-baselines3/torch; it is run
+once after training. ``NumpyQPolicy`` then loads the .npz and scores a whole
+batch of observations with a few matrix multiplies. Its ``predict`` matches
+the stable-baselines3 signature, so it can be passed as the ``policy`` of
+``engine.run_strategies`` (strategy "DQN") wherever the SB3 model was used.
+
+    python policy_export.py models/qpu_dqn.zip models/qpu_dqn.npz
+"""
+import argparse, pathlib
+import numpy as np
+
+_ACTIVATIONS = {
+    "ReLU": lambda x: np.maximum(x, 0, out=x),
+    "Tanh": lambda x: np.tanh(x, out=x),
+}
+
+
+def export_dqn(model_path: str | pathlib.Path, out_path: str | pathlib.Path) -> pathlib.Path:
+    """Write the Q-network of a saved SB3 DQN as an .npz of layer weights."""
+    import torch.nn as nn
+    from stable_baselines3 import DQN
+
+    q_net = DQN.load(model_path, env=None, device="cpu").policy.q_net.q_net
+    arrays, acts = {}, []
+    for layer in q_net:
+        if isinstance(layer, nn.Linear):
+            i = len(acts)
+            arrays[f"W{i}"] = np.ascontiguousarray(layer.weight.detach().numpy().T, dtype=np.float32)
+            arrays[f"b{i}"] = layer.bias.detach().numpy().astype(np.float32)
+            acts.append("")
+        elif type(layer).__name__ in _ACTIVATIONS and acts:
+            acts[-1] = type(layer).__name__
+        else:
+            raise ValueError(f"Unsupported Q-network layer {layer!r}")
+    out_path = pathlib.Path(out_path)
+    out_path.parent.mkdir(exist_ok=True, parents=True)
+    np.savez(out_path, activations=np.array(acts), **arrays)
+    return out_path
+
+
+class NumpyQPolicy:
+    """Torch-free greedy policy over an exported Q-network (MLP)."""
+
+    def __init__(self, weights: list[np.ndarray], biases: list[np.ndarray],
+                 activations: list[str], batch_size: int = 262_144):
+        self.weights, self.biases, self.activations = weights, biases, activations
+        self.batch_size = batch_size
+
+    @classmethod
+    def load(cls, path: str | pathlib.Path, **kwargs) -> "NumpyQPolicy":
+        with np.load(path) as f:
+            acts = [str(a) for a in f["activations"]]
+            return cls([f[f"W{i}"] for i in range(len(acts))],
+                       [f[f"b{i}"] for i in range(len(acts))], acts, **kwargs)
+
+    def q_values(self, obs: np.ndarray) -> np.ndarray:
+        x = np.asarray(obs, dtype=np.float32)
+        for W, b, act in zip(self.weights, self.biases, self.activations):
+            x = x @ W
+            x += b
+            if act:
+                _ACTIVATIONS[act](x)
+        return x
+
+    def predict(self, obs: np.ndarray, state=None, episode_start=None, deterministic: bool = True):
+        """Greedy actions for a (n, 4) batch, scored in chunks of `batch_size` rows."""
+        obs = np.asarray(obs, dtype=np.float32)
+        single = obs.ndim == 1
+        obs = obs.reshape(-1, obs.shape[-1])
+        out = np.empty(len(obs), dtype=np.int64)
+        for lo in range(0, len(obs), self.batch_size):
+            out[lo:lo + self.batch_size] = self.q_values(obs[lo:lo + self.batch_size]).argmax(axis=1)
+        return (out[0] if single else out), state
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Export a stable-baselines3 DQN to NumPy weights")
+    ap.add_argument("model", nargs="?", default="models/qpu_dqn.zip")
+    ap.add_argument("out",   nargs="?", default="models/qpu_dqn.npz")
+    args = ap.parse_args(argv)
+    print("✔ exported →", export_dqn(args.model, args.out))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Parameter sweep over break-even thresholds, rolling window, EWMA decay and price sheets.
+
+Each strategy is simulated in a process pool once per distinct value of the
+parameters it depends on: A on none, B on the thresholds, S also on decay and
+D also on roll_days. The tag trajectories do not depend on prices, so each run
+is then priced against every sheet at once through one ``PriceTensor``. The
+job matrix is written once as .npy files (under /dev/shm when available) and
+memory-mapped read-only by the workers instead of being pickled into each of
+them.
+
+    python sweep.py --atom 700 900 1100 --photon 150 176 250 \\
+                    --roll 5 7 14 --decay 0.7 0.8 0.9 \\
+                    --configs ../provider_configs/*.yml
+"""
+import argparse, itertools, pathlib, shutil
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+import pandas as pd
+import engine
+from cost_model import PriceTensor
+
+
+@dataclass(frozen=True)
+class SweepPoint:
+    atom_threshold  : float
+    photon_threshold: float
+    roll_days       : int
+    decay           : float
+
+
+# Parameters each strategy's tags depend on; any other strategy depends on all of them
+DEPENDS = {"A": (),
+           "B": ("atom_threshold", "photon_threshold"),
+           "S": ("atom_threshold", "photon_threshold", "decay"),
+           "D": ("atom_threshold", "photon_threshold", "roll_days")}
+
+
+def grid(atom=(engine.THRESHOLDS[0],), photon=(engine.THRESHOLDS[1],),
+         roll_days=(engine.ROLL_DAYS,), decay=(engine.DECAY,)) -> list[SweepPoint]:
+    """Cartesian product of the parameter lists, skipping atom ≤ photon thresholds."""
+    return [SweepPoint(a, p, r, k)
+            for a, p, r, k in itertools.product(atom, photon, roll_days, decay) if a > p]
+
+
+# ---------- worker side ----------
+_wl: engine.Workloads | None = None
+
+
+def _attach(path: str):
+    global _wl
+    _wl = engine.open_workloads(path)
+
+
+def _evaluate(point: SweepPoint, strategies: tuple[str, ...], prices: PriceTensor):
+    """Total cost (provider, strategy) of `strategies` at `point`."""
+    stats = engine.run_strategies(_wl, strategies,
+                                  thresholds=(point.atom_threshold, point.photon_threshold),
+                                  roll_days=point.roll_days, decay=point.decay)
+    return prices.price(stats).sum(axis=2)
+
+
+# ---------- driver ----------
+def _runs(points: list[SweepPoint], strategies: tuple[str, ...]):
+    """Point → run keys simulated there, and (point index, strategy) → run key; one run per key."""
+    todo, keys = {}, {}
+    seen = set()
+    for j, p in enumerate(points):
+        for s in strategies:
+            key = (s,) + tuple(getattr(p, f) for f in DEPENDS.get(s, tuple(p.__dict__)))
+            keys[j, s] = key
+            if key not in seen:
+                seen.add(key)
+                todo.setdefault(p, []).append(key)
+    return todo, keys
+
+
+def run_sweep(wl: engine.Workloads, points: list[SweepPoint], sheets: list[str | pathlib.Path],
+              strategies: tuple[str, ...] = engine.STRATEGIES,
+              workers: int | None = None) -> pd.DataFrame:
+    """Evaluate every point × sheet × strategy; rows ranked by total cost (1 = cheapest)."""
+    if not points:
+        raise ValueError("No parameter points to evaluate (grid() drops atom ≤ photon thresholds)")
+    prices  = PriceTensor.load(sheets, wl.n_days)
+    todo, keys = _runs(points, strategies)
+    scratch = engine.scratch_dir("qpu-sweep-")
+    try:
+        engine.save_workloads(wl, scratch)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach,
+                                 initargs=(scratch,)) as pool:
+            futures = {p: pool.submit(_evaluate, p, tuple(k[0] for k in run), prices)
+                       for p, run in todo.items()}
+            totals = {}
+            for p, run in todo.items():
+                cost = futures[p].result()
+                totals.update({key: cost[:, i] for i, key in enumerate(run)})
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    rows = [{**point.__dict__, "price_sheet": provider, "strategy": s,
+             "total_cost": float(totals[keys[j, s]][k])}
+            for j, point in enumerate(points) for k, provider in enumerate(prices.providers) for s in strategies]
+    res = pd.DataFrame(rows).sort_values("total_cost", ignore_index=True)
+    res["rank"] = res["total_cost"].rank(method="min").astype(int)
+    return res
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Rank strategy parameters by total cost")
+    ap.add_argument("--data",    default="../data")
+    ap.add_argument("--days",    type=int,   default=engine.DAYS)
+    ap.add_argument("--atom",    type=float, nargs="+", default=[engine.THRESHOLDS[0]])
+    ap.add_argument("--photon",  type=float, nargs="+", default=[engine.THRESHOLDS[1]])
+    ap.add_argument("--roll",    type=int,   nargs="+", default=[engine.ROLL_DAYS])
+    ap.add_argument("--decay",   type=float, nargs="+", default=[engine.DECAY])
+    ap.add_argument("--configs", nargs="+",
+                    default=sorted(str(p) for p in pathlib.Path("../provider_configs").glob("*.yml")))
+    ap.add_argument("--strategies", nargs="+", default=list(engine.STRATEGIES))
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--out",     default="../results/sweep.parquet")
+    args = ap.parse_args(argv)
+
+    points = grid(args.atom, args.photon, args.roll, args.decay)
+    res = run_sweep(engine.load_workloads(args.data, args.days), points, args.configs,
+                    tuple(args.strategies), args.workers)
+    out = pathlib.Path(args.out)
+    out.parent.mkdir(exist_ok=True, parents=True)
+    res.to_parquet(out, index=False, compression="snappy")
+    print(f"✔ {len(points)} parameter sets × {res['price_sheet'].nunique()} price sheets → {out}")
+    print(res.head(10).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Batched QPU environment: thousands of block episodes advanced per `step()`.
+
+Same episode as ``QPUEnv`` in notebook 06, held as NumPy arrays instead of
+one Python object per block:
+
+    Observation: [days_left, avg7_jobs/1e6, current_tag (0,1,2), jobs_today/1e6]
+    Action:      target tag (0 Atom, 1 Photon, 2 Spin); changing it pays transfer
+    Reward:      –(running episode cost: lease + exec + trigger + transfers)
+
+An episode starts on a random block's lease day with tag Atom and ends after
+the last simulated day. Each sub-env caches its block's job history when it
+resets, so `step()` never touches pandas or the workload source.
+
+Implements stable-baselines3's ``VecEnv`` (auto-reset, ``terminal_observation``
+in infos), e.g. ``DQN("MlpPolicy", QPUVecEnv(load_workloads(DATA), cm, 4096))``;
+wrap it in ``VecMonitor`` for episode statistics.
+"""
+import numpy as np
+from gymnasium import spaces
+from stable_baselines3.common.vec_env import VecEnv
+from cost_model import CostModel
+
+
+class QPUVecEnv(VecEnv):
+    """`num_envs` block episodes over an `engine.Workloads` or `WorkloadStore`."""
+    render_mode = None
+
+    def __init__(self, wl, cm: CostModel, num_envs: int = 1024,
+                 rows: np.ndarray | None = None, seed: int | None = None):
+        super().__init__(num_envs,
+                         spaces.Box(0, np.inf, shape=(4,), dtype=np.float32),
+                         spaces.Discrete(3))
+        self.wl     = wl
+        self.n_days = wl.n_days
+        self.lease_day = np.asarray(wl.lease_day, dtype=np.int64)
+        rows = np.arange(wl.n_blocks) if rows is None else np.asarray(rows)
+        self.rows   = rows[self.lease_day[rows] < self.n_days]     # blocks leased within the horizon
+        if not len(self.rows):
+            raise ValueError(f"No blocks leased within the {self.n_days}-day horizon")
+        self.rng    = np.random.default_rng(seed)
+
+        self.daily_rate    = cm.lease_rate*24                 # lease per day by tag
+        self.exec_rate     = cm.exec_trigger_rate             # exec + trigger per job
+        self.transfer_rate = cm.transfer_rate
+
+        self.jobs  = np.zeros((num_envs, self.n_days), dtype=np.int64)
+        self.row   = np.zeros(num_envs, dtype=np.int64)       # workload row of each episode
+        self.day   = np.zeros(num_envs, dtype=np.int64)
+        self.tag   = np.zeros(num_envs, dtype=np.int64)
+        self.avg7  = np.zeros(num_envs)
+        self.total = np.zeros(num_envs)
+        self.jobs_today = np.zeros(num_envs, dtype=np.int64)
+        self._actions = np.zeros(num_envs, dtype=np.int64)
+
+    # ---------- episode bookkeeping ----------
+    def _reset_envs(self, envs: np.ndarray):
+        rows = self.rng.choice(self.rows, size=len(envs))
+        self.row[envs]   = rows
+        self.jobs[envs]  = self.wl.dense_rows(rows)
+        self.day[envs]   = self.lease_day[rows]
+        self.tag[envs]   = 0                                   # start Atom
+        self.jobs_today[envs] = self.jobs[envs, self.day[envs]]
+        self.avg7[envs]  = self.jobs_today[envs]
+        self.total[envs] = 0.0
+
+    def _obs(self) -> np.ndarray:
+        return np.stack([self.n_days - 1 - self.day,
+                         self.avg7/1e6,
+                         self.tag,
+                         self.jobs_today/1e6], axis=1).astype(np.float32)
+
+    # ---------- VecEnv API ----------
+    def reset(self) -> np.ndarray:
+        seed = self._seeds[0] if self._seeds and self._seeds[0] is not None else None
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+        self._reset_seeds()
+        self._reset_envs(np.arange(self.num_envs))
+        return self._obs()
+
+    def step_async(self, actions: np.ndarray):
+        self._actions = np.asarray(actions, dtype=np.int64).reshape(self.num_envs)
+
+    def step_wait(self):
+        act = self._actions
+        changed = act != self.tag
+        self.total += np.where(changed, self.transfer_rate[act], 0.0)
+        self.tag = act.copy()
+        self.total += self.daily_rate[self.tag] + self.exec_rate[self.tag]*self.jobs_today
+        rewards = (-self.total).astype(np.float32)
+
+        self.day += 1
+        dones = self.day >= self.n_days
+        live  = ~dones
+        self.jobs_today[live] = self.jobs[live, self.day[live]]
+        self.avg7[live] = (self.avg7[live]*6 + self.jobs_today[live])/7
+
+        infos = [{} for _ in range(self.num_envs)]
+        done_idx = np.flatnonzero(dones)
+        for i in done_idx:
+            infos[i] = {"terminal_observation": np.zeros(4, dtype=np.float32),
+                        "TimeLimit.truncated": False}
+        if done_idx.size:
+            self._reset_envs(done_idx)
+        return self._obs(), rewards, dones, infos
+
+    def close(self):
+        pass
+
+    def _indices(self, indices):
+        if indices is None:
+            return range(self.num_envs)
+        return [indices] if isinstance(indices, int) else indices
+
+    def get_attr(self, attr_name, indices=None):
+        value = getattr(self, attr_name)
+        return [value for _ in self._indices(indices)]
+
+    def set_attr(self, attr_name, value, indices=None):
+        # Attributes are shared by all sub-envs, so they can only be set for all of them
+        if {int(i) for i in self._indices(indices)} != set(range(self.num_envs)):
+            raise ValueError(f"QPUVecEnv attributes are shared by all envs; cannot set {attr_name!r} for a subset")
+        setattr(self, attr_name, value)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        result = getattr(self, method_name)(*method_args, **method_kwargs)
+        return [result for _ in self._indices(indices)]
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [False for _ in self._indices(indices)]
@@ -0,0 +1,174 @@
+"""Sparse on-disk size×day workload store (CSC + CSR), memory-mapped on open.
+
+The dense ``jobs_tbl`` pivot of notebooks 06/06b is mostly zeros. This store
+keeps only the non-zero (size, day) counts twice: column-major for per-day
+access (simulation) and row-major for per-size histories (RL, API). It is
+written once from workloads_daily.parquet and every array is opened with
+``np.load(mmap_mode="r")``, so readers only page in what they touch.
+
+Layout of a store directory::
+
+    meta.json                       n_blocks, n_days, nnz
+    sizes / lease_day / file_order  blocks sorted by lease day (as in engine.py)
+    by_size                         argsort of sizes, for size → row look-ups
+    row_totals                      lifetime jobs per row
+    csc_indptr (D+1) csc_rows csc_data    day d → rows, counts (rows ascending)
+    csr_indptr (N+1) csr_days csr_data    row r → days, counts (days ascending)
+
+    python workload_store.py --data ../data --out ../data/workload_store
+"""
+import argparse, json, pathlib
+import numpy as np
+import engine
+
+FORMAT = 1
+_ARRAYS = ("sizes", "lease_day", "file_order", "by_size", "row_totals",
+           "csc_indptr", "csc_rows", "csc_data", "csr_indptr", "csr_days", "csr_data")
+
+
+class WorkloadStore:
+    """Read-only view of a store directory; duck-types `engine.Workloads`."""
+
+    def __init__(self, path: str | pathlib.Path):
+        self.path = pathlib.Path(path)
+        meta = json.loads((self.path/"meta.json").read_text())
+        if meta.get("format") != FORMAT:
+            raise ValueError(f"Unsupported workload store format {meta.get('format')} in {self.path}")
+        self.n_blocks, self.n_days, self.nnz = meta["n_blocks"], meta["n_days"], meta["nnz"]
+        for name in _ARRAYS:
+            setattr(self, name, np.load(self.path/f"{name}.npy", mmap_mode="r"))
+
+    @classmethod
+    def open(cls, path: str | pathlib.Path) -> "WorkloadStore":
+        return cls(path)
+
+    # ---------- per-day (CSC) ----------
+    def day(self, d: int) -> tuple[np.ndarray, np.ndarray]:
+        """Rows with workloads on day `d` and their job counts."""
+        lo, hi = self.csc_indptr[d], self.csc_indptr[d + 1]
+        return np.asarray(self.csc_rows[lo:hi]), np.asarray(self.csc_data[lo:hi])
+
+    def dense_day(self, d: int) -> np.ndarray:
+        out = np.zeros(self.n_blocks, dtype=np.int64)
+        rows, n = self.day(d)
+        out[rows] = n
+        return out
+
+    # ---------- per-size (CSR) ----------
+    def row(self, r: int) -> tuple[np.ndarray, np.ndarray]:
+        """Days with workloads for row `r` and their job counts."""
+        lo, hi = self.csr_indptr[r], self.csr_indptr[r + 1]
+        return np.asarray(self.csr_days[lo:hi]), np.asarray(self.csr_data[lo:hi])
+
+    def dense_row(self, r: int) -> np.ndarray:
+        out = np.zeros(self.n_days, dtype=np.int64)
+        days, n = self.row(r)
+        out[days] = n
+        return out
+
+    def dense_rows(self, rows: np.ndarray) -> np.ndarray:
+        """(len(rows), n_days) job histories of `rows`, gathered in one pass over the CSR."""
+        rows = np.asarray(rows)
+        lo, hi = self.csr_indptr[rows], self.csr_indptr[rows + 1]
+        lens = hi - lo
+        idx  = np.repeat(lo - np.cumsum(lens) + lens, lens) + np.arange(lens.sum())
+        out  = np.zeros((len(rows), self.n_days), dtype=np.int64)
+        out[np.repeat(np.arange(len(rows)), lens), self.csr_days[idx]] = self.csr_data[idx]
+        return out
+
+    def rows_for_sizes(self, sizes) -> np.ndarray:
+        return engine.rows_for_sizes(self.sizes, np.atleast_1d(np.asarray(sizes)), self.by_size)
+
+    def history(self, size: int) -> tuple[np.ndarray, np.ndarray]:
+        """Days and job counts of the block with `size` qpu_units."""
+        return self.row(int(self.rows_for_sizes(size)[0]))
+
+    def total_jobs(self) -> np.ndarray:
+        return self.row_totals
+
+
+# ---------- writer ----------
+def _scan(data_dir: pathlib.Path, sizes: np.ndarray, by_size: np.ndarray, n_days: int):
+    """Yield (rows, days, counts) of each day within the horizon, in one sequential pass."""
+    for d, qpu_units, n in engine.DayReader(data_dir).iter_days(n_days):
+        rows = engine.rows_for_sizes(sizes, qpu_units, by_size)
+        yield rows, np.full(len(rows), d, dtype=np.int64), n
+
+
+def write_store(path: str | pathlib.Path, data_dir: str | pathlib.Path,
+                n_days: int = engine.DAYS) -> WorkloadStore:
+    """Build a store from blocks.parquet + the workload table (either layout) with bounded memory.
+
+    Two day-by-day passes over the workloads: the first counts non-zeros
+    per day and per row, the second scatters into the memory-mapped CSC
+    arrays. Each CSC column is then row-sorted and replayed in day order into
+    the CSR arrays, which leaves every row's days ascending.
+    """
+    path, data_dir = pathlib.Path(path), pathlib.Path(data_dir)
+    path.mkdir(exist_ok=True, parents=True)
+
+    sizes, lease_day, file_order = engine.load_blocks(data_dir)
+    by_size = np.argsort(sizes)
+    N = len(sizes)
+
+    per_day, per_row = np.zeros(n_days, np.int64), np.zeros(N, np.int64)
+    totals = np.zeros(N, np.int64)
+    for rows, days, n in _scan(data_dir, sizes, by_size, n_days):
+        if n.size and n.max() > np.iinfo(np.int32).max:
+            raise ValueError("Daily workload count exceeds int32")
+        per_day += np.bincount(days, minlength=n_days)
+        per_row += np.bincount(rows, minlength=N)
+        totals  += np.bincount(rows, weights=n, minlength=N).astype(np.int64)
+    nnz = int(per_day.sum())
+
+    def out(name, dtype, shape):
+        return np.lib.format.open_memmap(path/f"{name}.npy", mode="w+", dtype=dtype, shape=shape)
+
+    csc_indptr = out("csc_indptr", np.int64, (n_days + 1,))
+    csc_indptr[0], csc_indptr[1:] = 0, np.cumsum(per_day)
+    csc_rows, csc_data = out("csc_rows", np.int32, (nnz,)), out("csc_data", np.int32, (nnz,))
+    cursor = np.array(csc_indptr[:-1])
+    for rows, days, n in _scan(data_dir, sizes, by_size, n_days):
+        order = np.argsort(days, kind="stable")
+        days  = days[order]
+        first = np.searchsorted(days, days, side="left")        # start of each day's run
+        pos   = cursor[days] + (np.arange(len(days)) - first)
+        csc_rows[pos], csc_data[pos] = rows[order], n[order]
+        cursor += np.bincount(days, minlength=n_days)
+
+    csr_indptr = out("csr_indptr", np.int64, (N + 1,))
+    csr_indptr[0], csr_indptr[1:] = 0, np.cumsum(per_row)
+    csr_days, csr_data = out("csr_days", np.int16, (nnz,)), out("csr_data", np.int32, (nnz,))
+    cursor = np.array(csr_indptr[:-1])
+    for d in range(n_days):
+        lo, hi = csc_indptr[d], csc_indptr[d + 1]
+        order  = np.argsort(csc_rows[lo:hi], kind="stable")
+        rows   = np.asarray(csc_rows[lo:hi])[order]
+        n      = np.asarray(csc_data[lo:hi])[order]
+        csc_rows[lo:hi], csc_data[lo:hi] = rows, n
+        csr_days[cursor[rows]], csr_data[cursor[rows]] = d, n  # each row at most once per day
+        cursor[rows] += 1
+
+    for name, arr in (("sizes", sizes), ("lease_day", lease_day), ("file_order", file_order),
+                      ("by_size", by_size), ("row_totals", totals)):
+        np.save(path/f"{name}.npy", arr)
+    for arr in (csc_indptr, csc_rows, csc_data, csr_indptr, csr_days, csr_data):
+        arr.flush()
+    (path/"meta.json").write_text(json.dumps(
+        {"format": FORMAT, "n_blocks": N, "n_days": n_days, "nnz": nnz}))
+    return WorkloadStore(path)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Build a sparse memory-mapped workload store")
+    ap.add_argument("--data", default="../data")
+    ap.add_argument("--out",  default="../data/workload_store")
+    ap.add_argument("--days", type=int, default=engine.DAYS)
+    args = ap.parse_args(argv)
+
+    st = write_store(args.out, args.data, args.days)
+    print(f"✔ {st.nnz:,} non-zeros for {st.n_blocks:,} sizes × {st.n_days} days → {st.path}")
+
+
+if __name__ == "__main__":
+    main()
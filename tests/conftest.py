@@ -0,0 +1,37 @@
+"""Shared fixtures: a tiny generated dataset and the demo price sheet."""
+import pathlib
+import sys
+
+import pytest
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+for path in (ROOT/"notebooks", ROOT/"backend"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+import engine
+import generator
+from cost_model import CostModel
+
+DAYS = 12
+PRICE_SHEET = ROOT/"provider_configs"/"qpu_demo.yml"
+
+
+@pytest.fixture(scope="session")
+def data_dir(tmp_path_factory):
+    """About 100 blocks over DAYS days, busy enough for every tag and for retags."""
+    path = tmp_path_factory.mktemp("data")
+    cfg = generator.GeneratorConfig(days=DAYS, blocks_min=4, blocks_max=12, wl_min=5_000,
+                                    wl_max=60_000, qpu_max=100_000, seed=7)
+    generator.generate(path, cfg, workers=1)
+    return path
+
+
+@pytest.fixture(scope="session")
+def wl(data_dir):
+    return engine.load_workloads(data_dir, DAYS)
+
+
+@pytest.fixture(scope="session")
+def cm():
+    return CostModel(PRICE_SHEET)
@@ -0,0 +1,118 @@
+from collections import defaultdict, deque
+
+import numpy as np
+import pyarrow.parquet as pq
+import pytest
+
+import engine
+from cost_model import TAGS
+from conftest import DAYS
+
+
+def notebook_reference(data_dir, cm, n_days, thresholds=engine.THRESHOLDS,
+                       roll_days=engine.ROLL_DAYS, decay=engine.DECAY):
+    """Daily cost of A/B/S/D the way notebook 05 computes it: one Python dict entry per block."""
+    blocks = pq.read_table(data_dir/"blocks.parquet").to_pandas()
+    wls = pq.read_table(data_dir/"workloads_daily.parquet").to_pandas()
+    wls = wls[wls.day < n_days]
+    cheapest = lambda j: "Atom" if j >= thresholds[0] else ("Photon" if j >= thresholds[1] else "Spin")
+
+    total = wls.groupby("qpu_units").n_workloads.sum()
+    tags = {"A": {sz: TAGS[i % 3] for i, sz in enumerate(blocks.qpu_units)},
+            "B": {sz: cheapest(total.get(sz, 0) / (n_days - day))
+                  for sz, day in zip(blocks.qpu_units, blocks.lease_day)}}
+    tags["S"], tags["D"] = dict(tags["B"]), dict(tags["B"])
+    ewma, window = defaultdict(float), defaultdict(deque)
+
+    costs = {s: [] for s in engine.STRATEGIES}
+    for day in range(n_days):
+        df = wls[wls.day == day]
+        transfers = {"S": 0.0, "D": 0.0}
+        for sz, jobs in zip(df.qpu_units, df.n_workloads):
+            ewma[sz] = decay*ewma[sz] + (1 - decay)*jobs
+            window[sz].append(jobs)
+            if len(window[sz]) > roll_days:
+                window[sz].popleft()
+            for s, avg in (("S", ewma[sz]), ("D", sum(window[sz]) / len(window[sz]))):
+                if cheapest(avg) != tags[s][sz]:
+                    tags[s][sz] = cheapest(avg)
+                    transfers[s] += cm.transfer(tags[s][sz], 1)
+        active = blocks.qpu_units[blocks.lease_day <= day]
+        for s in engine.STRATEGIES:
+            costs[s].append(cm.acquisition(int((blocks.lease_day == day).sum()))
+                            + sum(cm.lease(tags[s][sz]) for sz in active)
+                            + sum(cm.exec(tags[s][sz], n) + cm.trigger(n)
+                                  for sz, n in zip(df.qpu_units, df.n_workloads))
+                            + transfers.get(s, 0.0))
+    return costs
+
+
+def assert_same_stats(a, b):
+    assert a.strategies == b.strategies
+    for name in ("acquired", "active", "jobs", "retags", "tags"):
+        np.testing.assert_array_equal(getattr(a, name), getattr(b, name), err_msg=name)
+
+
+def test_engine_matches_notebook_reference(data_dir, wl, cm):
+    daily = engine.price(engine.run_strategies(wl), cm)
+    reference = notebook_reference(data_dir, cm, DAYS)
+    for s in engine.STRATEGIES:
+        np.testing.assert_allclose(daily[f"cost_{s}"], reference[s], rtol=1e-9, err_msg=s)
+
+
+def test_engine_has_retags(wl):
+    # Guards the fixture: the comparisons below are only meaningful if S and D retag
+    stats = engine.run_strategies(wl)
+    assert stats.retags[engine.STRATEGIES.index("S")].sum() > 0
+    assert stats.retags[engine.STRATEGIES.index("D")].sum() > 0
+
+
+@pytest.mark.parametrize("shards", [2, 3])
+def test_sharded_matches_single_pass(wl, shards):
+    params = dict(thresholds=(800, 150), roll_days=3, decay=0.6)
+    assert_same_stats(engine.run_strategies(wl, shards=shards, **params),
+                      engine.run_strategies(wl, **params))
+
+
+def test_incremental_with_checkpoint_matches_one_pass(wl, cm, tmp_path):
+    expected = engine.run_strategies(wl)
+    tags_A, tags_B = engine.tags_equal_thirds(wl), engine.tags_one_shot(wl)
+    n_active = np.searchsorted(wl.lease_day, np.arange(DAYS), side="right")
+
+    st = engine.StrategyState(cm=cm, n_days=DAYS)
+    active, jobs, retags = [], [], []
+    for d in range(DAYS):
+        if d == DAYS // 2:
+            st = engine.StrategyState.load(st.save(tmp_path/"state.npz"), cm=cm)
+        lo, hi = st.n_blocks, n_active[d]
+        st.add_blocks(wl.sizes[lo:hi], tags_A[lo:hi], tags_B[lo:hi])
+        res = st.step(*wl.day(d))
+        active.append(res.active), jobs.append(res.jobs), retags.append(res.retags)
+
+    np.testing.assert_array_equal(np.stack(active, axis=1), expected.active)
+    np.testing.assert_array_equal(np.stack(jobs, axis=1), expected.jobs)
+    np.testing.assert_array_equal(np.stack(retags, axis=1), expected.retags)
+    np.testing.assert_array_equal(st.tags[:, :st.n_blocks], expected.tags)
+    np.testing.assert_allclose(st.cum_cost, engine.price(expected, cm).drop(columns="day").sum(), rtol=1e-12)
+
+
+def test_ingest_by_size_matches_rows(wl):
+    # The production entry point looks rows up by qpu size
+    by_rows, by_size = engine.StrategyState(n_days=DAYS), engine.StrategyState(n_days=DAYS)
+    n_active = np.searchsorted(wl.lease_day, np.arange(DAYS), side="right")
+    for d in range(DAYS):
+        lo, hi = by_rows.n_blocks, n_active[d]
+        by_rows.add_blocks(wl.sizes[lo:hi])
+        a = by_rows.step(*wl.day(d))
+        rows, n = wl.day(d)
+        b = by_size.ingest(wl.sizes[rows], n, new_sizes=wl.sizes[lo:hi])
+        np.testing.assert_array_equal(a.active, b.active)
+        np.testing.assert_array_equal(a.jobs, b.jobs)
+        np.testing.assert_array_equal(a.retags, b.retags)
+
+
+def test_stats_roundtrip(wl, tmp_path):
+    stats = engine.run_strategies(wl)
+    loaded = engine.load_stats(engine.save_stats(stats, tmp_path/"stats.npz"))
+    assert_same_stats(loaded, engine.DailyStats(stats.strategies, stats.acquired, stats.active,
+                                                stats.jobs, stats.retags))
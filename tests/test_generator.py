@@ -0,0 +1,37 @@
+import numpy as np
+import pyarrow.parquet as pq
+import pytest
+
+import engine
+from generator import LAYOUTS, GeneratorConfig, generate, plan_blocks
+
+SPARSE = GeneratorConfig(days=6, scale=2e-4, seed=1)            # day 0 leases no block
+
+
+@pytest.mark.parametrize("layout", ["file", "hive"])
+def test_days_without_blocks_have_no_workloads(tmp_path, layout):
+    _, per_day = plan_blocks(SPARSE)
+    assert per_day[0] == 0
+    generate(tmp_path, SPARSE, workers=1, layout=layout)
+    wl = engine.load_workloads(tmp_path, SPARSE.days)
+    first = int(wl.lease_day.min())
+    assert first > 0
+    assert not wl.jobs[:, :first].any() and wl.jobs[:, first:].any()
+    if layout == "file":
+        meta = pq.ParquetFile(tmp_path/LAYOUTS["file"]).metadata
+        stats = [meta.row_group(i).column(0).statistics for i in range(meta.num_row_groups)]
+        assert all(s is not None and s.has_min_max for s in stats)
+
+
+def test_output_independent_of_workers(tmp_path):
+    generate(tmp_path/"a", SPARSE, workers=1, chunk_days=1)
+    generate(tmp_path/"b", SPARSE, workers=2, chunk_days=4)
+    a = engine.load_workloads(tmp_path/"a", SPARSE.days)
+    b = engine.load_workloads(tmp_path/"b", SPARSE.days)
+    np.testing.assert_array_equal(a.sizes, b.sizes)
+    np.testing.assert_array_equal(a.jobs, b.jobs)
+
+
+def test_scale_without_blocks_rejected(tmp_path):
+    with pytest.raises(ValueError, match="leases no blocks"):
+        generate(tmp_path, GeneratorConfig(days=3, scale=1e-6))
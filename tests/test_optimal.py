@@ -0,0 +1,65 @@
+import itertools
+
+import numpy as np
+import pytest
+
+import engine
+import optimal
+from conftest import PRICE_SHEET
+from cost_model import CostModel
+
+# Time-of-use sheet, so the DP has to use each day's own fees
+SHEET = {
+    "lease_fee": {"Atom": {"base": 3.0, "from_day": {2: 1.2}}, "Photon": 1.5,
+                  "Spin": {"base": 0.4, "weekday": [1, 1, 1, 1, 1, 3, 3]}},
+    "exec_fee": {"Atom": 0.01, "Photon": 0.05, "Spin": 0.2},
+    "transfer_fee": {"Atom": 5.0, "Photon": 2.0, "Spin": 8.0},
+    "trigger_fee": 0.01,
+    "acq_cost": 0.2,
+}
+
+
+def brute_force(wl, cm):
+    """Cheapest cost of every block by trying every tag schedule."""
+    p = cm.prices(wl.n_days)
+    lease, exec_trigger, transfer, acq = p.lease[0], p.exec_trigger[0], p.transfer[0], p.acq[0]
+    best = []
+    for r in range(wl.n_blocks):
+        days = range(int(wl.lease_day[r]), wl.n_days)
+        costs = []
+        for tags in itertools.product(range(engine.N_TAGS), repeat=len(days)):
+            cost = acq[days[0]]
+            for i, (d, t) in enumerate(zip(days, tags)):
+                cost += lease[d, t] + exec_trigger[d, t]*wl.jobs[r, d]
+                if i and t != tags[i - 1]:
+                    cost += transfer[d, t]
+            costs.append(cost)
+        best.append(min(costs))
+    return np.array(best)
+
+
+@pytest.fixture
+def small():
+    rng = np.random.default_rng(3)
+    lease_day = np.array([0, 0, 0, 1, 2, 4])
+    jobs = rng.integers(0, 2_500, size=(len(lease_day), 6)).astype(np.int32)
+    jobs[np.arange(6)[None, :] < lease_day[:, None]] = 0
+    return engine.Workloads(np.arange(1, 7), lease_day, jobs, np.arange(6))
+
+
+@pytest.mark.parametrize("sheet", [SHEET, None])
+def test_dp_matches_brute_force(small, sheet):
+    cm = CostModel(sheet or PRICE_SHEET)
+    plan = optimal.solve(small, cm, keep_tags=True)
+    np.testing.assert_allclose(plan.cost, brute_force(small, cm), rtol=1e-12)
+    # The aggregates and the tag schedule describe the same plan
+    np.testing.assert_allclose(engine.price(plan.stats, cm)[f"cost_{optimal.STRATEGY}"].sum(), plan.total, rtol=1e-12)
+    assert plan.stats.retags.sum() > 0
+    assert ((plan.tags >= 0) == (np.arange(small.n_days)[None, :] >= small.lease_day[:, None])).all()
+
+
+def test_optimal_bounds_every_strategy(wl, cm):
+    plan = optimal.solve(wl, cm)
+    daily = engine.price(engine.run_strategies(wl), cm)
+    for s in engine.STRATEGIES:
+        assert plan.total <= daily[f"cost_{s}"].sum() + 1e-6
@@ -0,0 +1,46 @@
+import pyarrow.parquet as pq
+import pytest
+
+import optimizer
+from conftest import DAYS
+
+
+@pytest.fixture
+def engine_data(data_dir, monkeypatch):
+    monkeypatch.setattr(optimizer, "ENGINE_DATA_DIR", str(data_dir))
+    return data_dir
+
+
+@pytest.mark.parametrize("days", [DAYS - 4, DAYS])
+def test_optimize_within_data_horizon(engine_data, days):
+    job = optimizer.normalize({"strategy": "D", "parameters": {"days": days, "roll_days": 2, "max_blocks": 1000}})
+    result = optimizer.optimize(job)
+
+    blocks = pq.read_table(engine_data/"blocks.parquet").to_pandas().set_index("block_id")
+    assert result["total_blocks_analyzed"] == int((blocks.lease_day < days).sum())
+    assert sum(result["current_distribution"].values()) == result["total_blocks_analyzed"]
+    assert result["transfers_recommended"] == len(result["recommended_transfers"]) > 0
+    for t in result["recommended_transfers"]:
+        assert blocks.loc[t["block_id"], "qpu_units"] == t["size"]
+        assert blocks.loc[t["block_id"], "lease_day"] < days
+
+
+@pytest.mark.parametrize("body", [
+    [1], "D", None,
+    {"strategy": "D", "parameters": [1, 2]},
+    {"strategy": "D", "parameters": 5},
+    {"strategy": "D", "parameters": "days"},
+    {"strategy": "D", "parameters": {"days": None}},
+    {"strategy": "D", "parameters": {"days": float("inf")}},
+    {"strategy": "D", "parameters": {"nope": 1}},
+    {"strategy": "X"},
+])
+def test_normalize_rejects_malformed_bodies(body):
+    with pytest.raises(ValueError):
+        optimizer.normalize(body)
+
+
+def test_normalize_applies_defaults_and_aliases():
+    job = optimizer.normalize({"strategy": "cost_efficiency", "parameters": {"days": "30"}})
+    assert job == {"strategy": "D", "parameters": {**optimizer.DEFAULTS, "days": 30}}
+    assert optimizer.normalize({"parameters": None})["parameters"] == optimizer.DEFAULTS
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+import engine
+from policy_export import NumpyQPolicy, export_dqn
+
+sb3 = pytest.importorskip("stable_baselines3")
+nn = pytest.importorskip("torch.nn")
+
+
+@pytest.fixture(scope="module", params=["ReLU", "Tanh"])
+def model_and_policy(request, wl, cm, tmp_path_factory):
+    from vec_env import QPUVecEnv
+    path = tmp_path_factory.mktemp("dqn")
+    model = sb3.DQN("MlpPolicy", QPUVecEnv(wl, cm, num_envs=4, seed=0), seed=0, device="cpu",
+                    policy_kwargs=dict(net_arch=[32, 16], activation_fn=getattr(nn, request.param)))
+    model.save(path/"qpu_dqn.zip")
+    return model, NumpyQPolicy.load(export_dqn(path/"qpu_dqn.zip", path/"qpu_dqn.npz"), batch_size=7)
+
+
+def test_numpy_policy_matches_sb3(model_and_policy):
+    model, policy = model_and_policy
+    obs = np.random.default_rng(0).uniform(0, [30, 0.01, 2, 0.01], size=(100, 4)).astype(np.float32)
+    np.testing.assert_array_equal(policy.predict(obs)[0], model.predict(obs, deterministic=True)[0])
+    assert policy.predict(obs[0])[0] == model.predict(obs[0], deterministic=True)[0]
+
+
+def test_strategy_dqn_same_with_either_policy(model_and_policy, wl):
+    model, policy = model_and_policy
+    strategies = engine.STRATEGIES + (engine.POLICY,)
+    a = engine.run_strategies(wl, strategies, policy=policy)
+    b = engine.run_strategies(wl, strategies, policy=model)
+    for name in ("active", "jobs", "retags", "tags"):
+        np.testing.assert_array_equal(getattr(a, name), getattr(b, name), err_msg=name)
@@ -0,0 +1,31 @@
+import pytest
+
+import engine
+import sweep
+from conftest import PRICE_SHEET, ROOT
+from cost_model import PriceTensor
+
+
+def test_sweep_matches_direct_runs(wl):
+    sheets = [PRICE_SHEET, ROOT/"provider_configs"/"vendor_quotes.yml"]
+    points = sweep.grid(atom=(700, 900), photon=(150, 176), roll_days=(2, 7), decay=(0.6, 0.8))
+    res = sweep.run_sweep(wl, points, sheets, workers=2)
+    prices = PriceTensor.load(sheets, wl.n_days)
+    assert len(res) == len(points) * len(prices.providers) * len(engine.STRATEGIES)
+    for p in points[::3]:
+        stats = engine.run_strategies(wl, thresholds=(p.atom_threshold, p.photon_threshold),
+                                      roll_days=p.roll_days, decay=p.decay)
+        totals = prices.price(stats).sum(axis=2)
+        got = res[(res.atom_threshold == p.atom_threshold) & (res.photon_threshold == p.photon_threshold)
+                  & (res.roll_days == p.roll_days) & (res.decay == p.decay)]
+        for k, provider in enumerate(prices.providers):
+            for i, s in enumerate(stats.strategies):
+                row = got[(got.price_sheet == provider) & (got.strategy == s)]
+                assert row.total_cost.item() == pytest.approx(totals[k, i], rel=1e-12)
+    assert res.total_cost.is_monotonic_increasing and res["rank"].iloc[0] == 1
+
+
+def test_empty_grid_is_rejected(wl):
+    assert sweep.grid(atom=(100,), photon=(200,)) == []
+    with pytest.raises(ValueError, match="No parameter points"):
+        sweep.run_sweep(wl, [], [PRICE_SHEET])
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+import engine
+from conftest import DAYS
+
+pytest.importorskip("stable_baselines3")
+from vec_env import QPUVecEnv  # noqa: E402
+
+
+def test_episodes_match_block_histories(wl, cm):
+    env = QPUVecEnv(wl, cm, num_envs=8, seed=1)
+    obs = env.reset()
+    row, start = env.row.copy(), env.day.copy()
+    np.testing.assert_array_equal(obs[:, 3]*1e6, wl.jobs[row, start].astype(np.float32))
+    total = np.zeros(8)
+    for _ in range(3):
+        obs, rewards, dones, _ = env.step(np.full(8, 2))        # stay on Spin
+        if dones.any():
+            break
+        day = env.day - 1
+        first = day == start
+        total += cm.lease_rate[2]*24 + cm.exec_trigger_rate[2]*wl.jobs[row, day] + np.where(first, cm.transfer_rate[2], 0)
+        np.testing.assert_allclose(-rewards, total, rtol=1e-6)
+
+
+def test_blocks_leased_after_horizon_are_not_sampled(data_dir, cm):
+    # blocks.parquet holds every block; the job matrix only the first days
+    short = engine.load_workloads(data_dir, DAYS // 2)
+    assert (short.lease_day >= short.n_days).any()
+    env = QPUVecEnv(short, cm, num_envs=64, seed=0)
+    env.reset()
+    for _ in range(short.n_days):
+        env.step(np.random.default_rng(0).integers(0, 3, size=64))
+    assert (short.lease_day[env.row] < short.n_days).all()
+
+
+def test_set_attr_applies_to_all_envs_only(wl, cm):
+    env = QPUVecEnv(wl, cm, num_envs=4)
+    env.set_attr("n_days", DAYS)
+    with pytest.raises(ValueError):
+        env.set_attr("n_days", DAYS, indices=[0, 1])
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+import engine
+import generator
+from conftest import DAYS
+from workload_store import WorkloadStore, write_store
+
+
+@pytest.fixture(scope="module")
+def store(data_dir, tmp_path_factory):
+    return write_store(tmp_path_factory.mktemp("store"), data_dir, DAYS)
+
+
+def test_store_matches_dense_workloads(store, wl):
+    for name in ("sizes", "lease_day", "file_order"):
+        np.testing.assert_array_equal(getattr(store, name), getattr(wl, name), err_msg=name)
+    assert (store.n_blocks, store.n_days) == (wl.n_blocks, wl.n_days)
+    for d in range(DAYS):
+        for a, b in zip(store.day(d), wl.day(d)):
+            np.testing.assert_array_equal(a, b)
+    np.testing.assert_array_equal(store.dense_rows(np.arange(wl.n_blocks)), wl.jobs)
+    np.testing.assert_array_equal(store.dense_rows(np.array([5, 0, 5])), wl.jobs[[5, 0, 5]])
+    np.testing.assert_array_equal(store.total_jobs(), wl.total_jobs())
+    row = 7
+    np.testing.assert_array_equal(store.dense_row(row), wl.jobs[row])
+    np.testing.assert_array_equal(store.history(int(wl.sizes[row]))[1], wl.jobs[row][wl.jobs[row] > 0])
+
+
+def test_store_reopens(store):
+    again = WorkloadStore.open(store.path)
+    assert again.nnz == store.nnz
+    np.testing.assert_array_equal(again.csr_data, store.csr_data)
+
+
+def test_simulation_on_store_matches_dense(store, wl):
+    for shards in (1, 2):
+        a, b = engine.run_strategies(store, shards=shards), engine.run_strategies(wl)
+        for name in ("active", "jobs", "retags", "tags"):
+            np.testing.assert_array_equal(getattr(a, name), getattr(b, name), err_msg=name)
+
+
+def test_hive_layout_reads_the_same(wl, tmp_path):
+    cfg = generator.GeneratorConfig(days=DAYS, blocks_min=4, blocks_max=12, wl_min=5_000,
+                                    wl_max=60_000, qpu_max=100_000, seed=7)
+    generator.generate(tmp_path, cfg, workers=1, layout="hive")
+    hive = engine.load_workloads(tmp_path, DAYS)
+    np.testing.assert_array_equal(hive.sizes, wl.sizes)
+    np.testing.assert_array_equal(hive.jobs, wl.jobs)